@@ -12,15 +12,22 @@ from models.patient_physician import PatientPhysician
 from models.motion_file import Motion_File
 from models.medication import Medication
 from models.motion_reading import MotionReading
+from models.auth0_identity import Auth0Identity
+from models.ingestion_job import IngestionJob
+from models.converted_file import ConvertedFile
+from models.motion_series import MotionSeries
 import controllers.messaging
 import controllers.connection
 from auth import requires_auth, AuthError
+from role_sync import role_sync
+from metrics import metrics
+from ingestion import ingestion
+from pagination import NEXT_CURSOR_HEADER
+from serializers import OrjsonProvider
 from talisman import Talisman
 from models.patient_document import PatientDocument
 from datetime import datetime, timedelta, timezone
 from azure.storage.blob import generate_container_sas, ContainerSasPermissions, BlobClient, ContainerClient, ContentSettings
-import requests
-import math
 
 
 load_dotenv()
@@ -28,11 +35,12 @@ db_url = os.environ.get('DATABASE_URL')
 frontend_url = os.environ.get('FRONTEND_URL')
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 Talisman(app)
 app.config['SQLALCHEMY_DATABASE_URI'] = db_url
 app.url_map.strict_slashes = False
 
-CORS(app,resources={r'/*': {'origins': frontend_url}})
+CORS(app,resources={r'/*': {'origins': frontend_url}},expose_headers=[NEXT_CURSOR_HEADER])
 db.init_app(app)
 migrate = Migrate(app,db)
 
@@ -63,7 +71,16 @@ app.register_blueprint(medications)
 from controllers.motion_readings import motion_readings
 app.register_blueprint(motion_readings)
 
+from controllers.motion_series import motion_series
+app.register_blueprint(motion_series)
+
+from controllers.file_upload import file_uploads
+app.register_blueprint(file_uploads)
+
 socket.init_app(app=app, cors_allowed_origins=frontend_url)
+role_sync.init_app(app)
+metrics.init_app(app)
+ingestion.init_app(app)
 
 
 @app.errorhandler(AuthError)
@@ -91,77 +108,5 @@ def get_sas_token(container_name):
   )
   return jsonify({'token': sas_token})
 
-@app.route('/file_upload', methods=['POST'])
-def file_upload():
-
-  # Get file data from blob
-  data = request.get_json()
-  filename = data.get('filename')
-  device_id = data.get('device_id')
-  account_name = 'capstorage2025'
-  account_key = os.environ.get('AZURE_ACCESS_KEY')
-  blob = BlobClient(account_url=f'https://{account_name}.blob.core.windows.net',
-                    container_name='motion-files',
-                    blob_name=filename,
-                    credential=account_key)
-  downloader = blob.download_blob(max_concurrency=1, encoding='UTF-8')
-      
-  file_data = downloader.readall()
-  # Send file to converter
-  files = {'file': (filename, file_data)}
-  converter_ip = os.environ.get('CONVERTER_IP_ADDRESS')
-  response = requests.post(f'http://{converter_ip}:5050/convert', files=files)
-
-  # Receive file and upload
-  converted_file = response.content
-  container = ContainerClient(account_url=f'https://{account_name}.blob.core.windows.net',
-                              container_name='motion-files',
-                              credential=account_key)
-  
-  device = db.session.get(Device,device_id)
-  new_filename = f'{device.patient.id}_{datetime.now(timezone.utc)}.gltf'
-  new_blob = container.upload_blob(name=new_filename,
-                        data=converted_file,
-                        overwrite=True,
-                        content_settings=ContentSettings(content_type='model/gltf+json'))
-  # Map file to database
-  motion_file = Motion_File(name=new_filename,
-                            type='gltf',
-                            url=new_blob.url,
-                            patient_id=device.patient.id)
-  db.session.add(motion_file)
-  db.session.flush()
-
-  # Parse sto file and determine min and max values 
-  farr = file_data.split('\n')
-  labelarr = farr[4].split()
-  min_max_dict = {}
-  for line in farr[5:]:
-    readings = line.split()
-    for i in range(len(readings)):
-      double_reading = float(readings[i])*180/math.pi
-      if double_reading != 0:
-        if min_max_dict.get(labelarr[i]):
-          min_max_dict[labelarr[i]][0] = min(min_max_dict[labelarr[i]][0],double_reading)
-          min_max_dict[labelarr[i]][1] = max(min_max_dict[labelarr[i]][1],double_reading)
-        else:
-          min_max_dict[labelarr[i]] = [double_reading,double_reading]
-  motion_readings = []
-  for (key, [minim,maxim]) in min_max_dict.items():
-    if key != 'time':
-      motion_reading = MotionReading(name=key,min=minim,max=maxim,motion_file_id=motion_file.id)
-      db.session.add(motion_reading)
-      db.session.flush()
-      motion_readings.append(motion_reading)
-
-  db.session.commit()
-  # Send new file message to physician
-  chat_id = db.session.scalars(db.select(Chat).filter_by(patient_id=device.patient.id)).first().id
-  file_dict = motion_file.dict()
-  # datetime is not JSON serializable
-  file_dict['createdAt'] = str(file_dict['createdAt'])
-  socket.emit('new_file',data={'motion_file':file_dict,'motion_readings':[mr.dict() for mr in motion_readings]},to=chat_id)
-  return jsonify({'message': 'Successfully uploaded file'})
-
 if __name__ == '__main__':
   socket.run(app,debug=True,port=8000)
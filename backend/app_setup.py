@@ -3,10 +3,15 @@ from extensions import db
 import os
 from dotenv import load_dotenv
 from auth import requires_auth, AuthError
+from role_sync import role_sync
+from metrics import metrics
+from ingestion import ingestion
+from serializers import OrjsonProvider
 
 def create_app():
   load_dotenv()
   app = Flask(__name__)
+  app.json = OrjsonProvider(app)
   app.config.update({
     'TESTING': True,
     'SQLALCHEMY_DATABASE_URI': os.environ.get('TEST_DATABASE_URL')
@@ -35,9 +40,15 @@ def create_app():
   from controllers.motion_readings import motion_readings
   app.register_blueprint(motion_readings)
 
+  from controllers.motion_series import motion_series
+  app.register_blueprint(motion_series)
+
   from controllers.patient_document import patient_documents
   app.register_blueprint(patient_documents)
 
+  from controllers.file_upload import file_uploads
+  app.register_blueprint(file_uploads)
+
   
 
   @app.errorhandler(AuthError)
@@ -53,4 +64,7 @@ def create_app():
     return jsonify(message=response)
 
   db.init_app(app)
+  role_sync.init_app(app)
+  metrics.init_app(app)
+  ingestion.init_app(app)
   return app
\ No newline at end of file
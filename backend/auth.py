@@ -1,12 +1,12 @@
-import json
 import os
-from urllib.request import urlopen
 from functools import wraps
-import requests
 
 from flask import request, g
-from jose import jwt,exceptions
+from jose import jwt,jws,exceptions
 from dotenv import load_dotenv
+from key_provider import provider_from_env, ROLES_CLAIM
+from token_cache import VerifiedTokenCache
+from metrics import metrics, StageTimer
 
 load_dotenv()
 
@@ -14,6 +14,34 @@ AUTH0_DOMAIN = os.environ.get('AUTH0_DOMAIN')
 API_AUDIENCE = os.environ.get('API_AUDIENCE')
 ALGORITHMS = ["RS256"]
 
+# Where verification keys come from, Auth0's JWKS unless configured otherwise
+key_provider = provider_from_env()
+# Payloads of tokens that already passed verification, valid until each token expires
+token_cache = VerifiedTokenCache()
+
+def _token_cache_metrics():
+    stats = token_cache.stats()
+    return "\n".join([
+        "# HELP auth_token_cache_hits_total Requests that reused an already verified token",
+        "# TYPE auth_token_cache_hits_total counter",
+        f"auth_token_cache_hits_total {stats['hits']}",
+        "# HELP auth_token_cache_misses_total Requests that had to verify their token",
+        "# TYPE auth_token_cache_misses_total counter",
+        f"auth_token_cache_misses_total {stats['misses']}",
+        "# HELP auth_token_cache_size Verified tokens currently cached",
+        "# TYPE auth_token_cache_size gauge",
+        f"auth_token_cache_size {stats['size']}"
+    ])
+
+metrics.add_collector(_token_cache_metrics)
+
+def set_key_provider(provider):
+    """Swaps the key provider, e.g. for a LocalKeyProvider in tests and load tests
+    """
+    global key_provider
+    key_provider = provider
+    token_cache.clear()
+
 # Error handler
 class AuthError(Exception):
     def __init__(self, error, status_code):
@@ -49,70 +77,84 @@ def get_token_auth_header():
     token = parts[1]
     return token
 
+def verify_token(token, timer=None):
+    """Checks the token's signature and claims and returns its payload
+    """
+    timer = timer or StageTimer()
+    with timer.stage("token_header"):
+        try:
+            unverified_header = jwt.get_unverified_header(token)
+        except exceptions.JWTError:
+            raise AuthError({
+                "code": "invalid_token",
+                "description": "Error decoding token headers. The token may be malformed or missing parts."
+            }, 401)
+
+    kid = unverified_header.get("kid")
+    with timer.stage("jwks"):
+        keys = key_provider.get_keys(kid)
+    with timer.stage("key_match"):
+        rsa_key = keys.get(kid)
+    if not rsa_key:
+        raise AuthError({"code": "invalid_header",
+                        "description": "Unable to find appropriate key"}, 401)
+    try:
+        with timer.stage("signature"):
+            jws.verify(token, rsa_key, ALGORITHMS)
+        with timer.stage("claims"):
+            # The signature was checked above, this only validates exp, aud, iss, etc.
+            return jwt.decode(
+                token,
+                rsa_key,
+                algorithms=ALGORITHMS,
+                options={"verify_signature": False},
+                audience=key_provider.audience,
+                issuer=key_provider.issuer
+            )
+    except exceptions.ExpiredSignatureError:
+        raise AuthError({"code": "token_expired",
+                        "description": "token is expired"}, 401)
+    except exceptions.JWTClaimsError:
+        raise AuthError({"code": "invalid_claims",
+                        "description":
+                            "incorrect claims,"
+                            "please check the audience and issuer"}, 401)
+    except Exception:
+        raise AuthError({"code": "invalid_header",
+                        "description":
+                            "Unable to parse authentication"
+                            " token."}, 401)
+
 def requires_auth(allowed_roles=[]):
     def requires_auth_decorator(f):
         """Determines if the Access Token is valid
         """
         @wraps(f)
         def decorated(*args, **kwargs):
-            token = get_token_auth_header()
-            jsonurl = urlopen("https://"+AUTH0_DOMAIN+"/.well-known/jwks.json")
-            jwks = json.loads(jsonurl.read())
+            # Time each stage so auth overhead shows up in /metrics and Server-Timing
+            timer = StageTimer()
             try:
-                unverified_header = jwt.get_unverified_header(token)
-            except exceptions.JWTError:
-                raise AuthError({
-                    "code": "invalid_token",
-                    "description": "Error decoding token headers. The token may be malformed or missing parts."
-                }, 401)
-
-            rsa_key = {}
-            for key in jwks["keys"]:
-                if key["kid"] == unverified_header["kid"]:
-                    rsa_key = {
-                        "kty": key["kty"],
-                        "kid": key["kid"],
-                        "use": key["use"],
-                        "n": key["n"],
-                        "e": key["e"]
-                    }
-            if rsa_key:
-                try:
-                    payload = jwt.decode(
-                        token,
-                        rsa_key,
-                        algorithms=ALGORITHMS,
-                        audience=API_AUDIENCE,
-                        issuer="https://"+AUTH0_DOMAIN+"/"
-                    )
-                except exceptions.ExpiredSignatureError:
-                    raise AuthError({"code": "token_expired",
-                                    "description": "token is expired"}, 401)
-                except exceptions.JWTClaimsError:
-                    raise AuthError({"code": "invalid_claims",
-                                    "description":
-                                        "incorrect claims,"
-                                        "please check the audience and issuer"}, 401)
-                except Exception:
-                    raise AuthError({"code": "invalid_header",
-                                    "description":
-                                        "Unable to parse authentication"
-                                        " token."}, 401)
-                
-                g.current_user_roles = payload.get('https://yourapp.com/roles')
-                g.token_payload = payload
-                # Check if the user has any of the allowed roles
-                if allowed_roles != [] and not any(role in g.current_user_roles for role in allowed_roles):
-                    raise AuthError({
-                        "code": "unauthorized",
-                        "description": "You do not have the required permissions."
-                    }, 401)
-                
-                return f(*args, **kwargs)
-            raise AuthError({"code": "invalid_header",
-                            "description": "Unable to find appropriate key"}, 401)
-        return decorated
-    return requires_auth_decorator
-
+                with timer.stage("authorization_header"):
+                    token = get_token_auth_header()
+                # Tokens are reused across many requests, so skip verification if we've seen this one
+                with timer.stage("cache"):
+                    payload = token_cache.get(token)
+                if payload is None:
+                    payload = verify_token(token, timer)
+                    token_cache.put(token, payload)
 
+                with timer.stage("roles"):
+                    g.current_user_roles = payload.get(ROLES_CLAIM)
+                    g.token_payload = payload
+                    # Check if the user has any of the allowed roles
+                    if allowed_roles != [] and not any(role in g.current_user_roles for role in allowed_roles):
+                        raise AuthError({
+                            "code": "unauthorized",
+                            "description": "You do not have the required permissions."
+                        }, 401)
+            finally:
+                metrics.record_auth(timer)
 
+            return f(*args, **kwargs)
+        return decorated
+    return requires_auth_decorator
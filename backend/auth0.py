@@ -1,26 +1,216 @@
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 from auth import AUTH0_DOMAIN
 load_dotenv()
 
-def delete_auth0_user(email):
-  AUTH0_MANAGEMENT_ID = os.environ.get('AUTH0_MANAGEMENT_ID')
-  AUTH0_MANAGEMENT_SECRET = os.environ.get('AUTH0_MANAGEMENT_SECRET')
-  body= {
+# Refresh the management token this many seconds before Auth0 expires it
+MANAGEMENT_TOKEN_REFRESH_MARGIN = float(os.environ.get('MANAGEMENT_TOKEN_REFRESH_MARGIN', 300))
+MANAGEMENT_TOKEN_MAX_RETRIES = int(os.environ.get('MANAGEMENT_TOKEN_MAX_RETRIES', 5))
+# Connect and read timeouts for every call to Auth0
+AUTH0_CONNECT_TIMEOUT = float(os.environ.get('AUTH0_CONNECT_TIMEOUT', 3.05))
+AUTH0_READ_TIMEOUT = float(os.environ.get('AUTH0_READ_TIMEOUT', 10))
+# Keep-alive connections kept open to Auth0, also the fan out width for bulk operations
+AUTH0_POOL_SIZE = int(os.environ.get('AUTH0_POOL_SIZE', 10))
+# Send Management API calls somewhere other than the tenant, e.g. the local stub
+AUTH0_MANAGEMENT_URL = os.environ.get('AUTH0_MANAGEMENT_URL')
+# How long and how many user profiles are kept for reconnecting sockets
+AUTH0_PROFILE_CACHE_TTL = float(os.environ.get('AUTH0_PROFILE_CACHE_TTL', 600))
+AUTH0_PROFILE_CACHE_SIZE = int(os.environ.get('AUTH0_PROFILE_CACHE_SIZE', 1024))
+
+def auth0_url(path, base_url=None):
+  return (base_url or 'https://'+AUTH0_DOMAIN)+path
+
+class ManagementTokenManager:
+  """Hands out a cached Auth0 Management API token
+
+  The client_credentials grant is only requested when there is no usable token.
+  Once the token is inside the refresh margin, callers keep getting it while a
+  background thread fetches the replacement. Rate limited (429) responses are
+  retried with backoff, honouring Retry-After when Auth0 sends it.
+  """
+  def __init__(self, refresh_margin=MANAGEMENT_TOKEN_REFRESH_MARGIN, max_retries=MANAGEMENT_TOKEN_MAX_RETRIES,
+               session=None, base_url=None, timeout=(AUTH0_CONNECT_TIMEOUT, AUTH0_READ_TIMEOUT)):
+    self.refresh_margin = refresh_margin
+    self.max_retries = max_retries
+    self.session = session or requests
+    self.base_url = base_url
+    self.timeout = timeout
+    self._token = None
+    self._expires_at = 0.0
+    # Guards _token and _expires_at. Callers with no usable token hold it while they fetch,
+    # so only one of them asks Auth0, they would all have to wait for a token anyway
+    self._lock = threading.Lock()
+    # Held by the background refresh for as long as it runs, only ever taken without blocking
+    self._refresh_lock = threading.Lock()
+
+  def get_token(self):
+    now = time.monotonic()
+    token = self._token
+    if token and now < self._expires_at - self.refresh_margin:
+      return token
+    if token and now < self._expires_at:
+      # Still valid, refresh without making this caller wait
+      self._refresh_in_background()
+      return token
+    with self._lock:
+      # Another caller may have refreshed while we waited
+      if self._token and time.monotonic() < self._expires_at:
+        return self._token
+      self._token, self._expires_at = self._fetch()
+      return self._token
+
+  def invalidate(self):
+    with self._lock:
+      self._token = None
+      self._expires_at = 0.0
+
+  def _refresh_in_background(self):
+    if not self._refresh_lock.acquire(blocking=False):
+      return
+    def refresh():
+      try:
+        token, expires_at = self._fetch()
+        with self._lock:
+          self._token, self._expires_at = token, expires_at
+      except Exception:
+        # The token is still valid, the next caller will try again
+        pass
+      finally:
+        self._refresh_lock.release()
+    threading.Thread(target=refresh, daemon=True).start()
+
+  # Returns (token, expires_at) and sets neither, the background refresh calls it without the lock
+  def _fetch(self):
+    body = {
       'grant_type': 'client_credentials',
-      'client_id': AUTH0_MANAGEMENT_ID,
-      'client_secret': AUTH0_MANAGEMENT_SECRET,
-      'audience': 'https://'+AUTH0_DOMAIN+'/api/v2/'
-  }
-  # Get management token to get current user's info
-  management_token = requests.post('https://'+AUTH0_DOMAIN+'/oauth/token',
-                                  data=body).json().get('access_token')
+      'client_id': os.environ.get('AUTH0_MANAGEMENT_ID'),
+      'client_secret': os.environ.get('AUTH0_MANAGEMENT_SECRET'),
+      'audience': 'https://'+str(AUTH0_DOMAIN)+'/api/v2/'
+    }
+    delay = 1.0
+    for attempt in range(self.max_retries + 1):
+      requested_at = time.monotonic()
+      response = self.session.post(auth0_url('/oauth/token', self.base_url), data=body, timeout=self.timeout)
+      if response.status_code == 429 and attempt < self.max_retries:
+        retry_after = response.headers.get('Retry-After')
+        time.sleep(float(retry_after) if retry_after and retry_after.isdigit() else delay)
+        delay = min(delay * 2, 30)
+        continue
+      response.raise_for_status()
+      data = response.json()
+      return data['access_token'], requested_at + float(data.get('expires_in', 86400))
+
+class Auth0Client:
+  """Gateway for every call the backend makes to the Auth0 Management API
+
+  Calls share one keep-alive connection pool and always carry a timeout. Operations
+  that touch several users or roles are issued concurrently on a small thread pool.
+  base_url points the client at another server, e.g. stubs/auth0_server.py.
+  """
+  def __init__(self, base_url=None, pool_size=AUTH0_POOL_SIZE, timeout=(AUTH0_CONNECT_TIMEOUT, AUTH0_READ_TIMEOUT)):
+    self.base_url = base_url
+    self.timeout = timeout
+    self.session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    self.session.mount('https://', adapter)
+    self.session.mount('http://', adapter)
+    self.tokens = ManagementTokenManager(session=self.session, base_url=base_url, timeout=timeout)
+    self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='auth0')
+    # user_id -> (fetched at, profile)
+    self._profiles = OrderedDict()
+    self._profiles_lock = threading.Lock()
+
+  def request(self, method, path, **kwargs):
+    kwargs.setdefault('timeout', self.timeout)
+    headers = kwargs.pop('headers', {})
+    response = self.session.request(method, auth0_url(path, self.base_url),
+                                    headers={**headers, 'Authorization': 'Bearer '+self.tokens.get_token()}, **kwargs)
+    # The token may have been revoked or rotated, get a new one and try once more
+    if response.status_code == 401:
+      self.tokens.invalidate()
+      response = self.session.request(method, auth0_url(path, self.base_url),
+                                      headers={**headers, 'Authorization': 'Bearer '+self.tokens.get_token()}, **kwargs)
+    response.raise_for_status()
+    return response
+
+  def get_user(self, user_id):
+    return self.request('GET', '/api/v2/users/'+user_id).json()
+
+  def get_user_profile(self, user_id, ttl=AUTH0_PROFILE_CACHE_TTL, maxsize=AUTH0_PROFILE_CACHE_SIZE):
+    """Same as get_user but answers repeat lookups from a bounded in-memory cache"""
+    with self._profiles_lock:
+      entry = self._profiles.get(user_id)
+      if entry and time.monotonic() - entry[0] < ttl:
+        self._profiles.move_to_end(user_id)
+        return entry[1]
+    profile = self.get_user(user_id)
+    with self._profiles_lock:
+      self._profiles[user_id] = (time.monotonic(), profile)
+      self._profiles.move_to_end(user_id)
+      while len(self._profiles) > maxsize:
+        self._profiles.popitem(last=False)
+    return profile
+
   # Returns a list of users with that email due to there being different providers
-  auth0_users = requests.get('https://'+AUTH0_DOMAIN+'/api/v2/users-by-email',
-                              headers={'Authorization': 'Bearer '+management_token},
-                              params={'email': email}).json()
-  for user in auth0_users:
-    requests.delete('https://'+AUTH0_DOMAIN+'/api/v2/users/'+user['user_id'],
-                              headers={'Authorization': 'Bearer '+management_token})
+  def get_users_by_email(self, email):
+    return self.request('GET', '/api/v2/users-by-email', params={'email': email}).json()
+
+  def assign_role(self, role_id, user_ids):
+    self.request('POST', '/api/v2/roles/'+role_id+'/users', json={'users': list(user_ids)})
+
+  def assign_role_batches(self, assignments, batch_size=100):
+    """Assigns {role_id: user_ids} with concurrent calls of up to batch_size users
+
+    Returns {role_id: exception} for the roles that could not be fully assigned.
+    """
+    calls = []
+    for role_id, user_ids in assignments.items():
+      user_ids = sorted(user_ids)
+      for i in range(0, len(user_ids), batch_size):
+        calls.append((role_id, user_ids[i:i+batch_size]))
+    futures = [(role_id, self._executor.submit(self.assign_role, role_id, user_ids)) for role_id, user_ids in calls]
+    errors = {}
+    for role_id, future in futures:
+      error = future.exception()
+      if error is not None:
+        errors[role_id] = error
+    return errors
+
+  def delete_user(self, user_id):
+    with self._profiles_lock:
+      self._profiles.pop(user_id, None)
+    try:
+      self.request('DELETE', '/api/v2/users/'+user_id)
+    except requests.HTTPError as error:
+      # Already deleted
+      if error.response is None or error.response.status_code != 404:
+        raise
 
+  def delete_users(self, user_ids):
+    self._fan_out(self.delete_user, user_ids)
+
+  def delete_users_by_email(self, email):
+    self.delete_users([user['user_id'] for user in self.get_users_by_email(email)])
+
+  def _fan_out(self, fn, items):
+    items = list(items)
+    if len(items) == 1:
+      fn(items[0])
+      return
+    # Wait for every call so one failure doesn't leave the others running unobserved
+    futures = [self._executor.submit(fn, item) for item in items]
+    errors = [future.exception() for future in futures]
+    for error in errors:
+      if error is not None:
+        raise error
+
+auth0_client = Auth0Client(base_url=AUTH0_MANAGEMENT_URL)
+
+def delete_auth0_user(email):
+  auth0_client.delete_users_by_email(email)
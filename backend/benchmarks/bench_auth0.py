@@ -0,0 +1,73 @@
+"""Compares bare requests calls against the pooled Auth0Client on the local stub
+
+  python benchmarks/bench_auth0.py --users 50 --identities 3 --latency 20 --handshake-latency 40
+"""
+import argparse
+import os
+import sys
+import time
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from auth0 import Auth0Client
+from stubs.auth0_server import start_auth0_stub
+
+ROLES = ['admin-role', 'physician-role', 'patient-role']
+
+def seed(state, users, identities):
+  for i in range(users):
+    for j in range(identities):
+      state.add_user(f'provider{j}|{i}', f'user{i}@test.com')
+
+# What the controllers did before the gateway: a token grant, a fresh connection and sequential calls
+def legacy_connect(base_url, user_id):
+  token = requests.post(base_url+'/oauth/token', data={'grant_type': 'client_credentials'}).json()['access_token']
+  requests.get(base_url+'/api/v2/users/'+user_id, headers={'Authorization': 'Bearer '+token}).json()
+  for role in ROLES:
+    requests.post(base_url+'/api/v2/roles/'+role+'/users', headers={'Authorization': 'Bearer '+token}, json={'users': [user_id]})
+
+def legacy_delete(base_url, email):
+  token = requests.post(base_url+'/oauth/token', data={'grant_type': 'client_credentials'}).json()['access_token']
+  users = requests.get(base_url+'/api/v2/users-by-email', headers={'Authorization': 'Bearer '+token}, params={'email': email}).json()
+  for user in users:
+    requests.delete(base_url+'/api/v2/users/'+user['user_id'], headers={'Authorization': 'Bearer '+token})
+
+def gateway_connect(client, user_id):
+  client.get_user(user_id)
+  client.assign_role_batches({role: [user_id] for role in ROLES})
+
+def gateway_delete(client, email):
+  client.delete_users_by_email(email)
+
+def run(name, server, fn, items):
+  state = server.state
+  connections, calls = state.connections, state.requests
+  start = time.perf_counter()
+  for item in items:
+    fn(item)
+  elapsed = time.perf_counter() - start
+  print(f'{name:<18} {elapsed / len(items) * 1000:8.2f} ms/op  {state.requests - calls:5d} requests  {state.connections - connections:5d} connections')
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--users', type=int, default=50)
+  parser.add_argument('--identities', type=int, default=3)
+  parser.add_argument('--latency', type=float, default=20, help='milliseconds per request')
+  parser.add_argument('--handshake-latency', type=float, default=40, help='milliseconds per new connection')
+  args = parser.parse_args()
+
+  server, base_url = start_auth0_stub(latency=args.latency / 1000, handshake_latency=args.handshake_latency / 1000)
+  client = Auth0Client(base_url=base_url)
+  user_ids = [f'provider0|{i}' for i in range(args.users)]
+  emails = [f'user{i}@test.com' for i in range(args.users)]
+
+  seed(server.state, args.users, args.identities)
+  run('legacy connect', server, lambda user_id: legacy_connect(base_url, user_id), user_ids)
+  run('gateway connect', server, lambda user_id: gateway_connect(client, user_id), user_ids)
+  run('legacy delete', server, lambda email: legacy_delete(base_url, email), emails)
+  seed(server.state, args.users, args.identities)
+  run('gateway delete', server, lambda email: gateway_delete(client, email), emails)
+  server.shutdown()
+
+if __name__ == '__main__':
+  main()
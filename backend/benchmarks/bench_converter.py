@@ -0,0 +1,63 @@
+"""Compares one converter reached with bare requests.post against ConverterClient over several stubs
+
+  python benchmarks/bench_converter.py --backends 3 --uploads 60 --concurrency 12 --latency 200 --capacity 4
+"""
+import argparse
+import io
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from converter import ConverterClient
+from stubs.converter_server import start_converter_stub
+
+# What file_upload did before the client
+def legacy_convert(base_url, data):
+  return requests.post(base_url+'/convert', files={'file': ('session.sto', data)}).content
+
+def run(name, fn, uploads, concurrency):
+  start = time.perf_counter()
+  with ThreadPoolExecutor(max_workers=concurrency) as executor:
+    results = list(executor.map(lambda _: fn(), range(uploads)))
+  elapsed = time.perf_counter() - start
+  print(f'{name:<28} {uploads / elapsed:8.1f} uploads/s  {elapsed:6.2f} s')
+  return results
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--backends', type=int, default=3)
+  parser.add_argument('--uploads', type=int, default=60)
+  parser.add_argument('--concurrency', type=int, default=12)
+  parser.add_argument('--max-concurrency', type=int, default=4, help='cap per backend')
+  parser.add_argument('--latency', type=float, default=200, help='milliseconds per conversion')
+  parser.add_argument('--capacity', type=int, default=4, help='conversions each stub works on at once')
+  parser.add_argument('--size', type=float, default=1, help='megabytes per .sto')
+  args = parser.parse_args()
+  # Failover warnings would drown the results
+  logging.basicConfig(level=logging.ERROR)
+
+  data = b'0.0\t' * int(args.size * 1e6 / 4)
+  servers = [start_converter_stub(latency=args.latency / 1000, capacity=args.capacity) for _ in range(args.backends)]
+  urls = [base_url for _, base_url in servers]
+
+  run('legacy, 1 backend', lambda: legacy_convert(urls[0], data), args.uploads, args.concurrency)
+
+  for server, _ in servers:
+    server.state.requests = 0
+  client = ConverterClient(urls, max_concurrency=args.max_concurrency, health_interval=1)
+  run(f'client, {args.backends} backends', lambda: client.convert('session.sto', io.BytesIO(data)), args.uploads, args.concurrency)
+  print('  per backend:', [server.state.requests for server, _ in servers])
+
+  # One backend starts failing, its share moves to the others
+  servers[0][0].state.failing = True
+  for server, _ in servers:
+    server.state.requests = 0
+  run(f'client, 1 of {args.backends} failing', lambda: client.convert('session.sto', io.BytesIO(data)), args.uploads, args.concurrency)
+  print('  per backend:', [server.state.requests for server, _ in servers], ' failures:', [backend['failures'] for backend in client.stats()])
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,65 @@
+"""Compares .gltf output with .glb and .glb with keyframe reduction, size and parse time per file
+
+Parsing is what a loader has to do before it can touch the animation: the
+JSON document plus base64 decoding for .gltf, the chunk headers and a much
+smaller JSON document for .glb.
+
+  python benchmarks/bench_glb.py --seconds 10 60 300 --noise 0.2 --rotation-tolerance 0.5 --translation-tolerance 1
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from bench_gltf_converter import make_opensim_sto
+from gltf_converter import RigConverter
+
+def parse_gltf(data):
+  gltf = json.loads(data)
+  return gltf, [base64.b64decode(buffer['uri'].split(',', 1)[1]) for buffer in gltf['buffers']]
+
+def parse_glb(data):
+  json_length, = struct.unpack_from('<I', data, 12)
+  bin_length, = struct.unpack_from('<I', data, 20 + json_length)
+  return json.loads(data[20:20 + json_length]), [memoryview(data)[28 + json_length:28 + json_length + bin_length]]
+
+def parse_time(parse, data, repeat):
+  best = float('inf')
+  for _ in range(repeat):
+    start = time.perf_counter()
+    parse(data)
+    best = min(best, time.perf_counter() - start)
+  return best
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--seconds', type=float, nargs='+', default=[10, 60, 300], help='recording lengths at 60 Hz')
+  parser.add_argument('--noise', type=float, default=0.2, help='degrees of sensor jitter on every coordinate')
+  parser.add_argument('--rotation-tolerance', type=float, default=0.5, help='degrees')
+  parser.add_argument('--translation-tolerance', type=float, default=1, help='millimetres')
+  parser.add_argument('--repeat', type=int, default=5)
+  args = parser.parse_args()
+
+  full = RigConverter()
+  reduced = RigConverter(rotation_tolerance=args.rotation_tolerance, translation_tolerance=args.translation_tolerance)
+  print(f'{"recording":>10} {"output":<14} {"size":>10} {"saved":>7} {"parse":>10} {"saved":>7}')
+  for seconds in args.seconds:
+    data = make_opensim_sto(seconds, noise=args.noise)
+    outputs = [('.gltf', full.convert('session.sto', io.BytesIO(data)), parse_gltf),
+               ('.glb', full.convert('session.sto', io.BytesIO(data), binary=True), parse_glb),
+               ('.glb reduced', reduced.convert('session.sto', io.BytesIO(data), binary=True), parse_glb)]
+    baseline_size = baseline_parse = None
+    for name, output, parse in outputs:
+      seconds_parsing = parse_time(parse, output, args.repeat)
+      baseline_size = baseline_size or len(output)
+      baseline_parse = baseline_parse or seconds_parsing
+      print(f'{seconds:>9.0f}s {name:<14} {len(output) / 1e6:>8.2f}MB {1 - len(output) / baseline_size:>7.0%} '
+            f'{seconds_parsing * 1000:>8.2f}ms {1 - seconds_parsing / baseline_parse:>7.0%}')
+
+if __name__ == '__main__':
+  main()
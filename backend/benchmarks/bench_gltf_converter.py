@@ -0,0 +1,66 @@
+"""Compares converting an .sto in process with sending it to a converter service
+
+The remote side is the converter stub, which does no work of its own, so its
+numbers are the floor of the remote path: the upload, the HTTP round trip and
+--latency of conversion time on top.
+
+  python benchmarks/bench_gltf_converter.py --seconds 60 --uploads 20 --latency 0
+"""
+import argparse
+import io
+import logging
+import math
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from converter import ConverterClient
+from gltf_converter import JOINTS, PELVIS_TRANSLATION, RigConverter
+from stubs.converter_server import start_converter_stub
+
+def make_opensim_sto(seconds, rate=60, noise=0.0, seed=0):
+  """Every coordinate the rig is driven by, swinging through a sine wave, plus noise degrees of jitter"""
+  labels = ['time'] + [column for coordinates in JOINTS.values() for column, _, _ in coordinates] + list(PELVIS_TRANSLATION)
+  times = np.arange(int(seconds * rate)) / rate
+  rng = np.random.default_rng(seed)
+  swings = np.column_stack([0.5 * np.sin(times * (1 + i / 10)) for i in range(len(labels) - 1)])
+  values = np.column_stack([times, swings + rng.normal(0, np.radians(noise), swings.shape)])
+  lines = ['Coordinates', 'version=1', f'nRows={len(times)}', f'nColumns={len(labels)}', 'inDegrees=no', 'endheader', '\t'.join(labels)]
+  lines += ['\t'.join(f'{value:.8f}' for value in row) for row in values]
+  return ('\n'.join(lines) + '\n').encode()
+
+def run(name, fn, uploads):
+  times = []
+  for _ in range(uploads):
+    start = time.perf_counter()
+    result = fn()
+    times.append(time.perf_counter() - start)
+  times.sort()
+  print(f'{name:<10} median {times[len(times) // 2] * 1000:8.1f} ms  max {times[-1] * 1000:8.1f} ms  {len(result) / 1e6:6.2f} MB out')
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--seconds', type=float, default=60, help='length of the recording at 60 Hz')
+  parser.add_argument('--uploads', type=int, default=20)
+  parser.add_argument('--latency', type=float, default=0, help='milliseconds the remote converter spends per file')
+  args = parser.parse_args()
+  logging.basicConfig(level=logging.ERROR)
+
+  data = make_opensim_sto(args.seconds)
+  print(f'{len(data) / 1e6:.2f} MB .sto, {math.ceil(args.seconds * 60)} frames')
+  converter = RigConverter()
+  # Loading the rig happens once per process, keep it out of the per file numbers
+  start = time.perf_counter()
+  converter.convert('session.sto', io.BytesIO(data))
+  print(f'first local conversion, rig load included: {(time.perf_counter() - start) * 1000:.1f} ms')
+  run('local', lambda: converter.convert('session.sto', io.BytesIO(data)), args.uploads)
+
+  server, base_url = start_converter_stub(latency=args.latency / 1000)
+  client = ConverterClient([base_url], health_interval=0)
+  run('remote', lambda: client.convert('session.sto', io.BytesIO(data)), args.uploads)
+  server.shutdown()
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,87 @@
+"""Compares the per-cell .sto min/max loop with the vectorised and streaming parsers
+
+  python benchmarks/bench_sto.py --rows 100000 --columns 40 --chunk-size 4
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from sto import range_of_motion, read_range_of_motion
+
+# The loop file_upload ran before sto.py
+def legacy_range_of_motion(file_data):
+  farr = file_data.split('\n')
+  labelarr = farr[4].split()
+  min_max_dict = {}
+  for line in farr[5:]:
+    readings = line.split()
+    for i in range(len(readings)):
+      double_reading = float(readings[i])*180/math.pi
+      if double_reading != 0:
+        if min_max_dict.get(labelarr[i]):
+          min_max_dict[labelarr[i]][0] = min(min_max_dict[labelarr[i]][0],double_reading)
+          min_max_dict[labelarr[i]][1] = max(min_max_dict[labelarr[i]][1],double_reading)
+        else:
+          min_max_dict[labelarr[i]] = [double_reading,double_reading]
+  return {key: (minim, maxim) for key, [minim, maxim] in min_max_dict.items() if key != 'time'}
+
+def make_sto(rows, columns, seed=0):
+  rng = random.Random(seed)
+  labels = ['time'] + [f'joint_{i}' for i in range(columns - 1)]
+  lines = ['motion', 'version=1', f'nRows={rows}', f'nColumns={columns}', '\t'.join(labels)]
+  for row in range(rows):
+    # Some joints sit at exactly zero, like unused degrees of freedom in real recordings
+    cells = [f'{row / 60:.6f}'] + ['0' if i % 7 == 0 else f'{rng.uniform(-math.pi, math.pi):.8f}' for i in range(columns - 1)]
+    lines.append('\t'.join(cells))
+  return '\n'.join(lines) + '\n'
+
+# What ingestion does now, off the downloaded temp file
+def streaming_range_of_motion(path, chunk_size):
+  with open(path, 'rb') as sto_file:
+    return read_range_of_motion(sto_file, chunk_size)
+
+def read_all(path):
+  with open(path, encoding='utf-8') as sto_file:
+    return sto_file.read()
+
+def run(name, fn, repeat):
+  best = float('inf')
+  for _ in range(repeat):
+    start = time.perf_counter()
+    result = fn()
+    best = min(best, time.perf_counter() - start)
+  tracemalloc.start()
+  fn()
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  print(f'{name:<12} {best * 1000:10.1f} ms  {peak / 1e6:8.1f} MB peak')
+  return result
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--rows', type=int, default=100000)
+  parser.add_argument('--columns', type=int, default=40)
+  parser.add_argument('--chunk-size', type=float, default=4, help='megabytes per streamed chunk')
+  parser.add_argument('--repeat', type=int, default=3)
+  args = parser.parse_args()
+
+  with tempfile.NamedTemporaryFile('w', suffix='.sto', delete=False) as sto_file:
+    sto_file.write(make_sto(args.rows, args.columns))
+  path = sto_file.name
+  try:
+    print(f'{args.rows} rows x {args.columns} columns, {os.path.getsize(path) / 1e6:.1f} MB')
+    legacy = run('legacy', lambda: legacy_range_of_motion(read_all(path)), args.repeat)
+    vectorised = run('vectorised', lambda: range_of_motion(read_all(path)), args.repeat)
+    streaming = run('streaming', lambda: streaming_range_of_motion(path, int(args.chunk_size * 1e6)), args.repeat)
+    assert legacy == vectorised == streaming, 'results differ'
+  finally:
+    os.remove(path)
+
+if __name__ == '__main__':
+  main()
@@ -1,9 +1,13 @@
 import pytest
 import os
 import requests
+from contextlib import contextmanager
+from sqlalchemy import event
 from dotenv import load_dotenv
 from extensions import db
 from app_setup import create_app
+from auth import set_key_provider
+from key_provider import LocalKeyProvider
 from models.user import User
 from models.chat import Chat
 from models.chat_message import ChatMessage
@@ -13,6 +17,10 @@ from models.motion_file import Motion_File
 from models.patient_document import PatientDocument, DocumentType
 from models.medication import Medication
 from models.motion_reading import MotionReading
+from models.auth0_identity import Auth0Identity
+from models.ingestion_job import IngestionJob
+from models.converted_file import ConvertedFile
+from models.motion_series import MotionSeries
 
 @pytest.fixture(scope='module')
 def app():
@@ -30,6 +38,26 @@ def app():
 def client(app):
   return app.test_client()
 
+@pytest.fixture(scope='function')
+def count_queries(app):
+  """`with count_queries() as queries:` collects every statement sent to the database inside the block
+
+  count_queries(parameters=True) collects (statement, parameters) pairs instead.
+  """
+  @contextmanager
+  def counter(parameters=False):
+    with app.app_context():
+      engine = db.engine
+    statements = []
+    def record(conn, cursor, statement, statement_parameters, context, executemany):
+      statements.append((statement, statement_parameters) if parameters else statement)
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+      yield statements
+    finally:
+      event.remove(engine, 'before_cursor_execute', record)
+  return counter
+
 @pytest.fixture(scope='function')
 def populate_database(app):
   with app.app_context():
@@ -62,6 +90,7 @@ def populate_database(app):
     db.session.commit()
   yield
   with app.app_context():
+    db.session.query(IngestionJob).delete()
     db.session.query(MotionReading).delete()
     db.session.query(Motion_File).delete()
     db.session.query(PatientDocument).delete()
@@ -70,8 +99,9 @@ def populate_database(app):
     db.session.query(ChatMessage).delete()
     db.session.query(Chat).delete()
     db.session.query(PatientPhysician).delete()
+    db.session.query(Auth0Identity).delete()
     db.session.query(User).delete()
-    db.session.execute(db.text('TRUNCATE TABLE users,chats,chat_messages,devices,patient_physicians,motion_files,patient_documents,medications,motion_readings RESTART IDENTITY;'))
+    db.session.execute(db.text('TRUNCATE TABLE users,chats,chat_messages,devices,patient_physicians,motion_files,patient_documents,medications,motion_readings,auth0_identities,ingestion_jobs,converted_files,motion_series RESTART IDENTITY;'))
     db.session.commit()
 
 @pytest.fixture(scope='session')
@@ -82,6 +112,11 @@ def access_token():
   AUTH0_CLIENT_ID = os.environ.get('AUTH0_CLIENT_ID')
   EMAIL = os.environ.get('TEST_USER_EMAIL')
   PASSWORD = os.environ.get('TEST_USER_PASSWORD')
+  # Without test credentials for the Auth0 tenant, sign tokens locally instead
+  if not EMAIL or not PASSWORD:
+    provider = LocalKeyProvider('https://'+str(AUTH0_DOMAIN)+'/', API_AUDIENCE)
+    set_key_provider(provider)
+    return provider.mint_token(roles=['Admin', 'Physician', 'Patient'])
   data = {
     'grant_type': 'password',
     'username': EMAIL,
@@ -1,10 +1,10 @@
 from flask import Blueprint, jsonify, request, g
 from extensions import db
 from models.user import User
-from auth import requires_auth, AUTH0_DOMAIN
+from auth import requires_auth
 from auth0 import delete_auth0_user
+from role_sync import role_sync
 import os
-import requests
 
 admins = Blueprint('admins', __name__, url_prefix='/admins')
 
@@ -12,7 +12,7 @@ admins = Blueprint('admins', __name__, url_prefix='/admins')
 @admins.route('/', methods=['GET'])
 @requires_auth(allowed_roles=['Admin'])
 def get_admins():
-  admins = db.session.scalars(db.select(User).filter_by(is_admin=True))
+  admins = db.session.scalars(db.select(User).filter_by(is_admin=True).options(*User.dict_options()))
   return jsonify([admin.dict() for admin in admins])
 
 # Get info for one admin by id
@@ -54,33 +54,13 @@ def create_admin():
       return jsonify({'error': 'Admin already exists'}), 422
     return jsonify({'error': 'User already exists'}), 422
   
-  AUTH0_MANAGEMENT_ID = os.environ.get('AUTH0_MANAGEMENT_ID')
-  AUTH0_MANAGEMENT_SECRET = os.environ.get('AUTH0_MANAGEMENT_SECRET')
-  body= {
-      'grant_type': 'client_credentials',
-      'client_id': AUTH0_MANAGEMENT_ID,
-      'client_secret': AUTH0_MANAGEMENT_SECRET,
-      'audience': 'https://'+AUTH0_DOMAIN+'/api/v2/'
-  }
-  # Get management token to get current user's info
-  management_token = requests.post('https://'+AUTH0_DOMAIN+'/oauth/token',
-                                  data=body).json().get('access_token')
-  pending = True
-  # Returns a list of users with that email due to there being different providers
-  auth0_users = requests.get('https://'+AUTH0_DOMAIN+'/api/v2/users-by-email',
-                              headers={'Authorization': 'Bearer '+management_token},
-                              params={'email': email_address}).json()
-  # Update user's roles in Auth0
-  if auth0_users and 'Admin' not in g.current_user_roles:
-    pending = False
-    role = os.environ.get('AUTH0_ADMIN_ROLE_ID')
-    requests.post('https://'+AUTH0_DOMAIN+'/api/v2/roles/'+role+'/users',
-                      headers={'Authorization': 'Bearer '+management_token},
-                      json={'users': [user['user_id'] for user in auth0_users]})
-
-  admin = User(first_name=first_name,last_name=last_name,email_address=email_address,is_admin=True,pending=pending)
+  # Stays pending until the admin's Auth0 account has the Admin role
+  admin = User(first_name=first_name,last_name=last_name,email_address=email_address,is_admin=True,pending=True)
   db.session.add(admin)
   db.session.commit()
+  # Update user's roles in Auth0 in the background
+  if 'Admin' not in g.current_user_roles:
+    role_sync.enqueue([os.environ.get('AUTH0_ADMIN_ROLE_ID')], user_id=admin.id, email=email_address)
   return jsonify(admin.dict())
 
 # Delete admin by id
@@ -3,12 +3,19 @@ from extensions import db
 from models.chat import Chat
 from models.chat_message import ChatMessage
 from auth import requires_auth
+from pagination import PaginationError, paginate, page_response
 
 chat_messages = Blueprint('chat_messages', __name__, url_prefix='/chat_messages')
 
 @chat_messages.route('/<int:patient_id>/<int:physician_id>', methods=['GET'])
 @requires_auth(allowed_roles=['Physician', 'Patient'])
 def get_chat_messages(patient_id,physician_id):
-  chat_id = db.session.query(Chat).filter_by(patient_id=patient_id,physician_id=physician_id).first().id
-  chat_messages = db.session.execute(db.select(ChatMessage).filter_by(chat_id=chat_id)).scalars()
-  return jsonify([chat_message.dict() for chat_message in chat_messages])
+  chat = db.session.query(Chat).filter_by(patient_id=patient_id,physician_id=physician_id).first()
+  if not chat:
+    return jsonify({'error': 'Chat does not exist'}), 422
+  # Pages walk back from the latest message, each page is newest first
+  try:
+    chat_messages, next_cursor = paginate(db.session, db.select(ChatMessage).filter_by(chat_id=chat.id), ChatMessage.timestamp, ChatMessage.id)
+  except PaginationError as e:
+    return jsonify({'error': str(e)}), 400
+  return page_response(jsonify([chat_message.dict() for chat_message in chat_messages]), next_cursor)
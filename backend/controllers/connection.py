@@ -1,31 +1,25 @@
 from extensions import socket, db
 from flask import g, request
 from models.user import User
-from auth import requires_auth, AUTH0_DOMAIN
+from models.auth0_identity import Auth0Identity
+from auth import requires_auth
+from auth0 import auth0_client
+from role_sync import role_sync
 import os
-import requests
 
 @socket.on('connect')
 @requires_auth(allowed_roles=[])
 def on_connect():
-  AUTH0_MANAGEMENT_ID = os.environ.get('AUTH0_MANAGEMENT_ID')
-  AUTH0_MANAGEMENT_SECRET = os.environ.get('AUTH0_MANAGEMENT_SECRET')
-
-  body= {
-      'grant_type': 'client_credentials',
-      'client_id': AUTH0_MANAGEMENT_ID,
-      'client_secret': AUTH0_MANAGEMENT_SECRET,
-      'audience': 'https://'+AUTH0_DOMAIN+'/api/v2/'
-  }
-
-  # Get management token to get current user's info
-  management_token = requests.post('https://'+AUTH0_DOMAIN+'/oauth/token',
-                                  data=body).json().get('access_token')
-  # This endpoint gets the user's info using their id from the 'sub' key in their access token payload
-  auth0_user = requests.get('https://'+AUTH0_DOMAIN+'/api/v2/users/'+g.token_payload['sub'],
-                                headers={'Authorization': 'Bearer '+management_token}).json()
-  
-  user = db.session.scalars(db.select(User).filter_by(email_address=auth0_user.get('email'))).first()
+  sub = g.token_payload['sub']
+  # Returning users are found by the identity they signed in with, without asking Auth0
+  user = db.session.scalars(db.select(User).join(Auth0Identity).filter(Auth0Identity.sub==sub)).first()
+  if not user:
+    # This endpoint gets the user's info using their id from the 'sub' key in their access token payload
+    auth0_user = auth0_client.get_user_profile(sub)
+    user = db.session.scalars(db.select(User).filter_by(email_address=auth0_user.get('email'))).first()
+    if user: # Remember this identity so the next connect skips Auth0
+      db.session.merge(Auth0Identity(sub=sub,user_id=user.id))
+      db.session.commit()
   if not user:
     if g.current_user_roles: # When a user that already has roles signs in, create them in the database
       email_address = auth0_user.get('email')
@@ -42,6 +36,7 @@ def on_connect():
         is_patient = is_patient or role == 'Patient'
         is_physician = is_physician or role == 'Physician'
       user = User(email_address=email_address,first_name=first_name,last_name=last_name,is_admin=is_admin,is_patient=is_patient,is_physician=is_physician)
+      user.auth0_identities.append(Auth0Identity(sub=sub))
       db.session.add(user)
       db.session.flush()
       if user.last_name == '':
@@ -61,14 +56,8 @@ def on_connect():
       if user.is_patient:
         roles.append(os.environ.get('AUTH0_PATIENT_ROLE_ID'))
       
-      for role in roles:
-        # Update user's role in Auth0
-        requests.post('https://'+AUTH0_DOMAIN+'/api/v2/roles/'+role+'/users',
-                      headers={'Authorization': 'Bearer '+management_token},
-                      json={'users': [auth0_user['user_id']]})
-      user.pending = False
-      db.session.add(user)
-      db.session.commit()
+      # Update user's roles in Auth0 in the background, it clears pending when done
+      role_sync.enqueue(roles, user_id=user.id, auth0_ids=[sub])
       socket.emit('relogin', {'message': 'Please login again to update your credentials.'}, to=request.sid)
     else: # Possibly update their roles on Auth0 if they're using a new authentication provider
       user_roles = []
@@ -88,14 +77,8 @@ def on_connect():
             roles.append(os.environ.get('AUTH0_PHYSICIAN_ROLE_ID'))
           elif role == 'Patient' and (not g.current_user_roles or role not in g.current_user_roles):
             roles.append(os.environ.get('AUTH0_PATIENT_ROLE_ID'))
-        for role in roles:
-          # Update user's role in Auth0
-          requests.post('https://'+AUTH0_DOMAIN+'/api/v2/roles/'+role+'/users',
-                        headers={'Authorization': 'Bearer '+management_token},
-                        json={'users': [auth0_user['user_id']]})
+        # Update user's roles in Auth0 in the background
+        role_sync.enqueue(roles, auth0_ids=[sub])
         socket.emit('relogin', {'message': 'Please login again to update your credentials.'}, to=request.sid)
       else:
         socket.emit('user_info', user.dict(), to=request.sid)
-
-
-      
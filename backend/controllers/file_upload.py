@@ -0,0 +1,38 @@
+from flask import Blueprint, jsonify, request, url_for
+from extensions import db
+from models.device import Device
+from models.ingestion_job import IngestionJob
+from ingestion import ingestion, QueueFull
+
+file_uploads = Blueprint('file_uploads', __name__, url_prefix='/file_upload')
+
+# Queue an uploaded .sto file for conversion, poll the returned status_url for progress
+@file_uploads.route('/', methods=['POST'])
+def file_upload():
+  data = request.get_json(silent=True)
+  if not data or not data.get('filename') or data.get('device_id') is None:
+    return jsonify({'error': 'Missing required fields: filename and/or device_id'}), 400
+
+  device = db.session.get(Device, data.get('device_id'))
+  if not device:
+    return jsonify({'error': 'Device does not exist'}), 422
+  if not device.patient:
+    return jsonify({'error': 'Device is not assigned to a patient'}), 422
+
+  try:
+    job = ingestion.submit(data.get('filename'), device.id)
+  except QueueFull:
+    return jsonify({'error': 'Too many uploads waiting to be processed, try again later'}), 503
+
+  return jsonify({'job_id': job.token,
+                  'status': job.status,
+                  'status_url': url_for('file_uploads.get_job', token=job.token)}), 202
+
+# Get the progress of an upload
+# Devices poll this without a login, so it is found by the job's random token and only says how far it got
+@file_uploads.route('/jobs/<token>', methods=['GET'])
+def get_job(token):
+  job = db.session.scalars(db.select(IngestionJob).filter_by(token=token)).first()
+  if job:
+    return jsonify({'status': job.status, 'stage': job.stage, 'motion_file_id': job.motion_file_id})
+  return jsonify({'error': 'Job does not exist'}), 404
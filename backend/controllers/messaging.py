@@ -27,6 +27,4 @@ def on_message(data):
   chat_message = ChatMessage(chat_id=chat_id,sender=sender,content=content)
   db.session.add(chat_message)
   db.session.commit()
-  chat_json = chat_message.dict()
-  chat_json['timestamp'] = str(chat_json['timestamp'])
-  socket.send(chat_json,to=chat_id)
\ No newline at end of file
+  socket.send(chat_message.dict(),to=chat_id)
\ No newline at end of file
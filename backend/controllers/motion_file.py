@@ -1,10 +1,13 @@
 from flask import Blueprint, jsonify, request, g
 from sqlalchemy import except_, null
+from sqlalchemy.orm import selectinload
 from extensions import db
 from models.motion_file import Motion_File
 from models.user import User
 from auth import requires_auth
+from pagination import PaginationError, paginate, page_response
 from datetime import datetime
+from azure.core.exceptions import ResourceNotFoundError
 from azure.storage.blob import BlobClient
 from dotenv import load_dotenv
 import os
@@ -18,8 +21,11 @@ motion_files = Blueprint('motion_files', __name__, url_prefix='/motion_files')
 @motion_files.route('/', methods=['GET'])
 @requires_auth(allowed_roles=['Patient', 'Physician'])
 def get_motion_files():
-  motion_files = db.session.execute(db.select(Motion_File)).scalars()
-  return jsonify([motion_file.dict() for motion_file in motion_files])
+  try:
+    motion_files, next_cursor = paginate(db.session, db.select(Motion_File), Motion_File.createdAt, Motion_File.id)
+  except PaginationError as e:
+    return jsonify({'error': str(e)}), 400
+  return page_response(jsonify([motion_file.dict() for motion_file in motion_files]), next_cursor)
 
 # Get motion_file by id
 @motion_files.route('<int:id>', methods=['GET'])
@@ -98,14 +104,20 @@ def delete_motion_file(id):
   if not motion_file:
     return jsonify({'error': 'Motion_File does not exist'}), 422
   
-  # Delete blob as well
+  # Delete blob as well, along with its lower sample rate levels
   account_name = 'capstorage2025'
   account_key = os.environ.get('AZURE_ACCESS_KEY')
-  blob = BlobClient(account_url=f'https://{account_name}.blob.core.windows.net',
-                      container_name='motion-files',
-                      blob_name=motion_file.name,
-                      credential=account_key)
-  blob.delete_blob()
+  blob_names = {motion_file.name} | {level['name'] for level in motion_file.levels or []}
+  for blob_name in blob_names:
+    blob = BlobClient(account_url=f'https://{account_name}.blob.core.windows.net',
+                        container_name='motion-files',
+                        blob_name=blob_name,
+                        credential=account_key)
+    try:
+      blob.delete_blob()
+    except ResourceNotFoundError:
+      # Already gone, which is all deleting it was for
+      pass
   db.session.delete(motion_file)
   db.session.commit()
   return jsonify({'message': 'Motion_File deleted successfully'})
@@ -114,9 +126,13 @@ def delete_motion_file(id):
 @motion_files.route('/patient/<int:patient_id>', methods=['GET'])
 @requires_auth(allowed_roles=['Patient', 'Physician'])
 def get_patient_motion_files(patient_id):
-  assignments = db.session.query(Motion_File).filter_by(patient_id=patient_id).all()
-  if assignments:
-    return jsonify([assignment.dict() for assignment in assignments])
+  try:
+    assignments, next_cursor = paginate(db.session, db.select(Motion_File).filter_by(patient_id=patient_id), Motion_File.createdAt, Motion_File.id)
+  except PaginationError as e:
+    return jsonify({'error': str(e)}), 400
+  # Running off the end of the history is an empty page, not a missing patient
+  if assignments or 'cursor' in request.args:
+    return page_response(jsonify([assignment.dict() for assignment in assignments]), next_cursor)
   return jsonify({'error': 'No motion_file assigned to this patient'}), 404
 
 
@@ -133,3 +149,26 @@ def get_patient_motion_files_after_date(patient_id, date):
 
   except ValueError:
       return jsonify({'error': 'Invalid date format. Please use YYYY-MM-DD'}), 400
+
+# Get motion_files for a patient with their motion_readings, optionally after given date
+# Two queries, the files then every file's readings, instead of a request per file for its readings
+@motion_files.route('patient/<int:patient_id>/with_readings', methods=['GET'])
+@motion_files.route('patient/<int:patient_id>/with_readings/after/<date>', methods=['GET'])
+@requires_auth(allowed_roles=['Patient', 'Physician'])
+def get_patient_motion_files_with_readings(patient_id, date=None):
+  select = db.select(Motion_File).filter_by(patient_id=patient_id).options(selectinload(Motion_File.motion_readings))
+  if date:
+    try:
+      select = select.filter(Motion_File.createdAt >= datetime.strptime(date, '%Y-%m-%d'))
+    except ValueError:
+      return jsonify({'error': 'Invalid date format. Please use YYYY-MM-DD'}), 400
+  try:
+    assignments, next_cursor = paginate(db.session, select, Motion_File.createdAt, Motion_File.id)
+  except PaginationError as e:
+    return jsonify({'error': str(e)}), 400
+  if assignments or 'cursor' in request.args:
+    return page_response(jsonify([{**assignment.dict(), 'motion_readings': [motion_reading.dict() for motion_reading in assignment.motion_readings]}
+                                  for assignment in assignments]), next_cursor)
+  if date:
+    return jsonify({'error': f'No motion_files found for patient {patient_id} after {date}'}), 404
+  return jsonify({'error': 'No motion_file assigned to this patient'}), 404
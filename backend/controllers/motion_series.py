@@ -0,0 +1,37 @@
+import numpy as np
+from flask import Blueprint, jsonify, request
+from extensions import db
+from models.motion_series import MotionSeries
+from auth import requires_auth
+from sto import column_unit
+
+motion_series = Blueprint('motion_series', __name__, url_prefix='/motion_series')
+
+# Get joint angles of a motion file, e.g. /motion_series/1?joints=knee_angle_r,hip_flexion_r&start=2&end=4.5
+@motion_series.route('/<int:motion_file_id>', methods=['GET'])
+@requires_auth(allowed_roles=['Patient', 'Physician'])
+def get_motion_series(motion_file_id):
+  series = db.session.get(MotionSeries, motion_file_id)
+  if not series:
+    return jsonify({'error': 'Motion series does not exist'}), 422
+
+  joints = [joint for joint in request.args.get('joints', '').split(',') if joint] or None
+  unknown = [joint for joint in joints or [] if joint not in series.joints]
+  if unknown:
+    return jsonify({'error': f'Unknown joints: {", ".join(unknown)}'}), 400
+  try:
+    start = float(request.args['start']) if 'start' in request.args else None
+    end = float(request.args['end']) if 'end' in request.args else None
+  except ValueError:
+    return jsonify({'error': 'start and end must be numbers of seconds'}), 400
+
+  times, columns = series.columns(joints, start, end)
+  return jsonify({'motion_file_id': motion_file_id,
+                  'sample_rate': series.sample_rate,
+                  'units': {joint: column_unit(joint) for joint in columns},
+                  'time': _rounded(times),
+                  'joints': {joint: _rounded(values) for joint, values in columns.items()}})
+
+def _rounded(values):
+  # float32 printed as float64 drags along digits that were never recorded
+  return np.round(values.astype(np.float64), 4).tolist()
@@ -3,9 +3,9 @@ from extensions import db
 from models.user import User
 from models.patient_physician import PatientPhysician
 from models.chat import Chat
-from auth import requires_auth, AUTH0_DOMAIN
+from auth import requires_auth
 from auth0 import delete_auth0_user
-import requests
+from role_sync import role_sync
 import os
 
 patients = Blueprint('patients', __name__, url_prefix='/patients')
@@ -14,7 +14,7 @@ patients = Blueprint('patients', __name__, url_prefix='/patients')
 @patients.route('/', methods=['GET'])
 @requires_auth(allowed_roles=['Physician'])
 def get_patients():
-  patients = db.session.scalars(db.select(User).filter_by(is_patient=True))
+  patients = db.session.scalars(db.select(User).filter_by(is_patient=True).options(*User.dict_options()))
   return jsonify([patient.dict() for patient in patients])
 
 # Get info for one patient by id
@@ -57,33 +57,13 @@ def create_patient():
       return jsonify({'error': 'Patient already exists'}), 422
     return jsonify({'error': 'User already exists'}), 422
   
-  AUTH0_MANAGEMENT_ID = os.environ.get('AUTH0_MANAGEMENT_ID')
-  AUTH0_MANAGEMENT_SECRET = os.environ.get('AUTH0_MANAGEMENT_SECRET')
-  body= {
-      'grant_type': 'client_credentials',
-      'client_id': AUTH0_MANAGEMENT_ID,
-      'client_secret': AUTH0_MANAGEMENT_SECRET,
-      'audience': 'https://'+AUTH0_DOMAIN+'/api/v2/'
-  }
-  # Get management token to get current user's info
-  management_token = requests.post('https://'+AUTH0_DOMAIN+'/oauth/token',
-                                  data=body).json().get('access_token')
-  pending = True
-  # Returns a list of users with that email due to there being different providers
-  auth0_users = requests.get('https://'+AUTH0_DOMAIN+'/api/v2/users-by-email',
-                              headers={'Authorization': 'Bearer '+management_token},
-                              params={'email': email_address}).json()
-  # Update user's roles in Auth0
-  if auth0_users and 'Patient' not in g.current_user_roles:
-    pending = False
-    role = os.environ.get('AUTH0_PATIENT_ROLE_ID')
-    requests.post('https://'+AUTH0_DOMAIN+'/api/v2/roles/'+role+'/users',
-                      headers={'Authorization': 'Bearer '+management_token},
-                      json={'users': [user['user_id'] for user in auth0_users]})
-    
-  patient = User(first_name=first_name,last_name=last_name,email_address=email_address,is_patient=True,pending=pending)
+  # Stays pending until the patient's Auth0 account has the Patient role
+  patient = User(first_name=first_name,last_name=last_name,email_address=email_address,is_patient=True,pending=True)
   db.session.add(patient)
   db.session.commit()
+  # Update user's roles in Auth0 in the background
+  if 'Patient' not in g.current_user_roles:
+    role_sync.enqueue([os.environ.get('AUTH0_PATIENT_ROLE_ID')], user_id=patient.id, email=email_address)
   # Try to find the physician
   physician = db.session.get(User, physician_id)
   if not physician or not physician.is_physician:
@@ -3,6 +3,7 @@ from extensions import db
 from models.patient_document import PatientDocument, DocumentType
 from models.user import User
 from auth import requires_auth
+from pagination import PaginationError, paginate, page_response
 from datetime import datetime
 from azure.storage.blob import BlobClient
 from dotenv import load_dotenv
@@ -128,10 +129,13 @@ def delete_patient_document(id):
 @patient_documents.route('/patient/<int:patient_id>', methods=['GET'])
 @requires_auth(allowed_roles=['Patient', 'Physician'])
 def get_patient_documents_for_patient(patient_id):
-    documents = db.session.query(PatientDocument).filter_by(patient_id=patient_id).all()
-    if documents:
-        return jsonify([document.dict() for document in documents])
-    return jsonify([]), 200  # Return empty array instead of error when no documents found
+    try:
+        documents, next_cursor = paginate(db.session, db.select(PatientDocument).filter_by(patient_id=patient_id),
+                                          PatientDocument.createdAt, PatientDocument.id)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
+    # An empty array rather than an error when there are no documents
+    return page_response(jsonify([document.dict() for document in documents]), next_cursor)
 
 # Get patient documents by type
 @patient_documents.route('/patient/<int:patient_id>/type/<string:doc_type>', methods=['GET'])
@@ -0,0 +1,229 @@
+import io
+import logging
+import os
+import threading
+import time
+import uuid
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+from gltf_converter import gltf_to_glb, rig_converter
+
+load_dotenv()
+
+# 'remote' posts files to the conversion services below, 'local' converts them in this process
+CONVERTER_MODE = os.environ.get('CONVERTER_MODE', 'remote')
+# 'gltf' keeps JSON with base64 buffers, 'glb' stores binary glTF
+CONVERTER_OUTPUT = os.environ.get('CONVERTER_OUTPUT', 'gltf')
+# Comma separated base URLs of the conversion services, e.g. http://10.0.0.4:5050,http://10.0.0.5:5050
+CONVERTER_BACKENDS = os.environ.get('CONVERTER_BACKENDS')
+# Conversions sent to one backend at a time, more wait for a free slot
+CONVERTER_MAX_CONCURRENCY = int(os.environ.get('CONVERTER_MAX_CONCURRENCY', 4))
+CONVERTER_CONNECT_TIMEOUT = float(os.environ.get('CONVERTER_CONNECT_TIMEOUT', 3.05))
+# Long recordings take a while to convert
+CONVERTER_READ_TIMEOUT = float(os.environ.get('CONVERTER_READ_TIMEOUT', 300))
+# Seconds between health probes of every backend
+CONVERTER_HEALTH_INTERVAL = float(os.environ.get('CONVERTER_HEALTH_INTERVAL', 10))
+
+logger = logging.getLogger(__name__)
+
+class ConverterError(Exception):
+  pass
+
+class MultipartFile:
+  """multipart/form-data body holding one file, read lazily from the file object
+
+  requests builds multipart bodies in memory, this is handed over as a
+  file-like body with a known length so the file is streamed off disk instead.
+  """
+  def __init__(self, field, filename, file, content_type='application/octet-stream'):
+    boundary = uuid.uuid4().hex
+    filename = filename.replace('"', '%22')
+    head = (f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n').encode()
+    tail = f'\r\n--{boundary}--\r\n'.encode()
+    file.seek(0, io.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    self.content_type = f'multipart/form-data; boundary={boundary}'
+    self._length = len(head) + size + len(tail)
+    self._parts = [io.BytesIO(head), file, io.BytesIO(tail)]
+
+  def __len__(self):
+    return self._length
+
+  def read(self, size=-1):
+    data = b''
+    while self._parts and (size < 0 or len(data) < size):
+      chunk = self._parts[0].read(-1 if size < 0 else size - len(data))
+      if not chunk:
+        self._parts.pop(0)
+        continue
+      data += chunk
+    return data
+
+class ConverterBackend:
+  def __init__(self, url, max_concurrency):
+    self.url = url.rstrip('/')
+    self.max_concurrency = max_concurrency
+    self.outstanding = 0
+    self.healthy = True
+    self.requests = 0
+    self.failures = 0
+
+  def dict(self):
+    return {'url': self.url, 'outstanding': self.outstanding, 'healthy': self.healthy,
+            'requests': self.requests, 'failures': self.failures}
+
+class ConverterClient:
+  """Spreads conversions over one or more converter services
+
+  Each conversion goes to the healthy backend with the fewest requests in
+  flight, and no backend is sent more than max_concurrency at once. Requests
+  reuse keep-alive connections. A backend that refuses a connection or answers
+  with a 5xx is marked unhealthy and the conversion is retried on another one;
+  a background thread probes every backend so it is used again once it
+  recovers. When every backend is unhealthy they are all tried anyway.
+  """
+  def __init__(self, backends=None, max_concurrency=CONVERTER_MAX_CONCURRENCY,
+               timeout=(CONVERTER_CONNECT_TIMEOUT, CONVERTER_READ_TIMEOUT), health_interval=CONVERTER_HEALTH_INTERVAL):
+    if backends is None:
+      backends = default_backends()
+    self.backends = [ConverterBackend(url, max_concurrency) for url in backends]
+    self.timeout = timeout
+    self.health_interval = health_interval
+    self.session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max(len(self.backends), 1), pool_maxsize=max_concurrency)
+    self.session.mount('http://', adapter)
+    self.session.mount('https://', adapter)
+    self._condition = threading.Condition()
+    self._next = 0
+    self._health_thread = None
+
+  def convert(self, filename, file):
+    """Sends an .sto file to a converter and returns the glTF it produces"""
+    if not self.backends:
+      raise ConverterError('No converter backends configured')
+    self._start_health_checks()
+    tried = set()
+    last_error = None
+    while len(tried) < len(self.backends):
+      backend = self._acquire(tried)
+      tried.add(backend)
+      try:
+        body = MultipartFile('file', filename, file)
+        response = self.session.post(backend.url+'/convert', data=body,
+                                     headers={'Content-Type': body.content_type}, timeout=self.timeout)
+      except requests.RequestException as e:
+        self._release(backend, failed=True)
+        logger.warning('Converter %s failed: %s', backend.url, e)
+        last_error = e
+        continue
+      if response.status_code >= 500:
+        self._release(backend, failed=True)
+        logger.warning('Converter %s answered %s', backend.url, response.status_code)
+        last_error = ConverterError(f'{backend.url} answered {response.status_code}')
+        continue
+      self._release(backend)
+      if response.status_code >= 400:
+        # The file itself was rejected, another backend would do the same
+        raise ConverterError(f'Converter rejected {filename}: {response.status_code} {response.text[:200]}')
+      return response.content
+    raise ConverterError(f'Every converter backend failed, last error: {last_error}')
+
+  def stats(self):
+    with self._condition:
+      return [backend.dict() for backend in self.backends]
+
+  def check_health(self):
+    """Probes every backend once, anything that answers below 500 counts as up"""
+    for backend in self.backends:
+      try:
+        healthy = self.session.get(backend.url+'/health', timeout=(self.timeout[0], 5)).status_code < 500
+      except requests.RequestException:
+        healthy = False
+      with self._condition:
+        if healthy and not backend.healthy:
+          logger.info('Converter %s is back', backend.url)
+        backend.healthy = healthy
+        self._condition.notify_all()
+
+  def _acquire(self, tried):
+    with self._condition:
+      while True:
+        candidates = [backend for backend in self.backends if backend not in tried]
+        healthy = [backend for backend in candidates if backend.healthy]
+        free = [backend for backend in (healthy or candidates) if backend.outstanding < backend.max_concurrency]
+        if free:
+          # Rotate the starting point so ties don't always land on the first backend
+          self._next = (self._next + 1) % len(self.backends)
+          free.sort(key=lambda backend: (backend.outstanding, (self.backends.index(backend) - self._next) % len(self.backends)))
+          backend = free[0]
+          backend.outstanding += 1
+          backend.requests += 1
+          return backend
+        self._condition.wait()
+
+  def _release(self, backend, failed=False):
+    with self._condition:
+      backend.outstanding -= 1
+      if failed:
+        backend.failures += 1
+        backend.healthy = False
+      self._condition.notify_all()
+
+  def _start_health_checks(self):
+    with self._condition:
+      if self.health_interval <= 0 or (self._health_thread and self._health_thread.is_alive()):
+        return
+      self._health_thread = threading.Thread(target=self._health_loop, name='converter-health', daemon=True)
+      self._health_thread.start()
+
+  def _health_loop(self):
+    while True:
+      time.sleep(self.health_interval)
+      try:
+        self.check_health()
+      except Exception:
+        logger.exception('Converter health check failed')
+
+def default_backends():
+  """CONVERTER_BACKENDS, or the single converter at CONVERTER_IP_ADDRESS on port 5050"""
+  if CONVERTER_BACKENDS:
+    return [url.strip() for url in CONVERTER_BACKENDS.split(',') if url.strip()]
+  converter_ip = os.environ.get('CONVERTER_IP_ADDRESS')
+  return [f'http://{converter_ip}:5050'] if converter_ip else []
+
+converter_client = ConverterClient()
+
+def check_converter():
+  """Fails at startup rather than on the first upload when CONVERTER_MODE is local and the rig is missing"""
+  if CONVERTER_MODE != 'local':
+    return
+  try:
+    rig_converter.check()
+  except OSError as e:
+    raise ConverterError(f'CONVERTER_MODE is local but the rig could not be loaded from {rig_converter.rig_path}: {e}')
+
+def convert(filename, file):
+  """Converts an .sto file with the converter CONVERTER_MODE picks
+
+  Returns a .gltf, or a .glb when CONVERTER_OUTPUT is 'glb'; gltf_converter.file_type tells them apart.
+  """
+  binary = CONVERTER_OUTPUT == 'glb'
+  if CONVERTER_MODE == 'local':
+    file.seek(0)
+    try:
+      return rig_converter.convert(filename, file, binary=binary)
+    except ValueError as e:
+      raise ConverterError(f'Could not convert {filename}: {e}')
+  converted = converter_client.convert(filename, file)
+  if not binary:
+    return converted
+  try:
+    return gltf_to_glb(converted)
+  except ValueError as e:
+    # Still a usable model, just not the smaller one
+    logger.warning('Keeping %s as .gltf: %s', filename, e)
+    return converted
@@ -8,16 +8,24 @@ from models.chat_message import ChatMessage
 from models.device import Device
 from models.patient_physician import PatientPhysician
 from models.motion_file import Motion_File
+from models.auth0_identity import Auth0Identity
+from models.ingestion_job import IngestionJob
+from models.converted_file import ConvertedFile
+from models.motion_series import MotionSeries
 load_dotenv()
 
 engine = create_engine(os.environ.get('DATABASE_URL'))
 
 with Session(engine) as session:
+  session.query(IngestionJob).delete()
   session.query(ChatMessage).delete()
   session.query(Chat).delete()
   session.query(Device).delete()
   session.query(PatientPhysician).delete()
+  session.query(Auth0Identity).delete()
+  session.query(ConvertedFile).delete()
+  session.query(MotionSeries).delete()
   session.query(Motion_File).delete()
   session.query(User).delete()
-  session.execute(text('TRUNCATE TABLE users,chats,chat_messages,devices,patient_physicians,motion_files RESTART IDENTITY;'))
+  session.execute(text('TRUNCATE TABLE users,chats,chat_messages,devices,patient_physicians,motion_files,auth0_identities,ingestion_jobs,converted_files,motion_series RESTART IDENTITY;'))
   session.commit()
\ No newline at end of file
@@ -1,6 +1,8 @@
 from models.base import Base
+from flask import json
 from flask_sqlalchemy import SQLAlchemy
 from flask_socketio import SocketIO
 
 db = SQLAlchemy(model_class=Base)
-socket = SocketIO()
\ No newline at end of file
+# Socket payloads go through the app's JSON provider, so model dicts encode the same as in responses
+socket = SocketIO(json=json)
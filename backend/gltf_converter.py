@@ -0,0 +1,482 @@
+import base64
+import copy
+import json
+import os
+import struct
+import threading
+import numpy as np
+from dotenv import load_dotenv
+from sto import read_table
+
+load_dotenv()
+
+# The rigged character the frontend already ships, its buffer ends up inside every converted file.
+# The deploy copies it into backend/rig since only backend/ is shipped, a checkout uses the frontend's copy
+BUNDLED_RIG_PATH = os.path.join(os.path.dirname(__file__), 'rig', 'RemyV2.gltf')
+FRONTEND_RIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'public', 'Models', 'RemyV2', 'RemyV2.gltf')
+CONVERTER_RIG_PATH = os.environ.get('CONVERTER_RIG_PATH',
+                                    BUNDLED_RIG_PATH if os.path.exists(BUNDLED_RIG_PATH) else FRONTEND_RIG_PATH)
+# Where browsers can fetch the rig's textures, e.g. https://<frontend>/Models/RemyV2/. Without it the model is untextured
+CONVERTER_TEXTURE_URL = os.environ.get('CONVERTER_TEXTURE_URL') or (
+  os.environ.get('FRONTEND_URL').rstrip('/') + '/Models/RemyV2/' if os.environ.get('FRONTEND_URL') else None)
+
+# Keyframes are dropped while linear interpolation stays within these of the recording, 0 keeps every frame
+CONVERTER_ROTATION_TOLERANCE = float(os.environ.get('CONVERTER_ROTATION_TOLERANCE', 0))  # degrees
+CONVERTER_TRANSLATION_TOLERANCE = float(os.environ.get('CONVERTER_TRANSLATION_TOLERANCE', 0))  # millimetres
+
+# Height of the pelvis above the feet in metres, the remote converter placed the pelvis at the origin
+PELVIS_HEIGHT = 0.95
+# Frames per second assumed for files without a time column
+DEFAULT_FRAME_RATE = 60
+
+# OpenSim axes in the rig's Y-up world. X points forward, which is +Z for the rig,
+# Y points up for both, Z points to the subject's right, which is -X for the rig
+AXES = {'X': (0.0, 0.0, 1.0), 'Y': (0.0, 1.0, 0.0), 'Z': (-1.0, 0.0, 0.0)}
+
+def _sided_joints():
+  joints = {}
+  for suffix, side, sign in (('_r', 'Right', 1), ('_l', 'Left', -1)):
+    # Adduction and internal rotation axes are mirrored on the left
+    joints[f'mixamorig:{side}UpLeg'] = [(f'hip_flexion{suffix}', 'Z', 1), (f'hip_adduction{suffix}', 'X', sign), (f'hip_rotation{suffix}', 'Y', sign)]
+    joints[f'mixamorig:{side}Leg'] = [(f'knee_angle{suffix}', 'Z', 1)]
+    joints[f'mixamorig:{side}Foot'] = [(f'ankle_angle{suffix}', 'Z', 1)]
+    joints[f'mixamorig:{side}ToeBase'] = [(f'mtp_angle{suffix}', 'Z', 1)]
+    joints[f'mixamorig:{side}Arm'] = [(f'arm_flex{suffix}', 'Z', 1), (f'arm_add{suffix}', 'X', sign), (f'arm_rot{suffix}', 'Y', sign)]
+    joints[f'mixamorig:{side}ForeArm'] = [(f'elbow_flex{suffix}', 'Z', 1), (f'pro_sup{suffix}', 'Y', sign)]
+    joints[f'mixamorig:{side}Hand'] = [(f'wrist_flex{suffix}', 'Z', 1), (f'wrist_dev{suffix}', 'X', sign)]
+  return joints
+
+# Rig bone -> the OpenSim coordinates driving it, as (column, axis, sign) applied in order
+JOINTS = {
+  'mixamorig:Hips': [('pelvis_tilt', 'Z', 1), ('pelvis_list', 'X', 1), ('pelvis_rotation', 'Y', 1)],
+  'mixamorig:Spine': [('lumbar_extension', 'Z', 1), ('lumbar_bending', 'X', 1), ('lumbar_rotation', 'Y', 1)],
+  **_sided_joints()
+}
+PELVIS_TRANSLATION = ('pelvis_tx', 'pelvis_ty', 'pelvis_tz')
+# The rig stands in a T-pose, OpenSim's zero pose has the arms hanging by the sides
+ARMS = ('mixamorig:LeftArm', 'mixamorig:RightArm')
+
+# glTF componentType of 32-bit floats
+FLOAT = 5126
+GLB_MAGIC = b'glTF'
+GLB_VERSION = 2
+GLB_JSON = 0x4E4F534A
+GLB_BIN = 0x004E4942
+
+class RigConverter:
+  """Turns OpenSim joint angles into an animation of the RemyV2 rig
+
+  Does what the conversion service does without leaving the process: each
+  coordinate column becomes a rotation about the matching axis of its parent
+  segment, composed per bone and written as one linear rotation channel. The
+  rig's mesh, skin and materials are copied into every file along with the
+  animation so the result loads on its own.
+  """
+  def __init__(self, rig_path=CONVERTER_RIG_PATH, texture_url=CONVERTER_TEXTURE_URL,
+               rotation_tolerance=CONVERTER_ROTATION_TOLERANCE, translation_tolerance=CONVERTER_TRANSLATION_TOLERANCE):
+    self.rig_path = rig_path
+    self.texture_url = texture_url
+    self.rotation_tolerance = rotation_tolerance
+    self.translation_tolerance = translation_tolerance
+    self._rig = None
+    self._lock = threading.Lock()
+
+  def convert(self, filename, file, binary=False):
+    """Converts an .sto file object and returns the glTF as bytes, or a .glb if binary"""
+    gltf, buffer = self.build(file)
+    return pack_glb(gltf, buffer) if binary else pack_gltf(gltf, buffer)
+
+  def build(self, file):
+    """Returns the glTF document and the one binary buffer it refers to"""
+    labels, values = read_table(file)
+    if not len(values):
+      raise ValueError('.sto file has no rows')
+    columns = {label: values[:, i] for i, label in enumerate(labels)}
+    rig = self._load()
+    gltf = copy.deepcopy(rig.gltf)
+    gltf.pop('animations', None)
+    self._textures(gltf)
+
+    times = columns.get('time')
+    times = times - times[0] if times is not None else np.arange(len(values)) / DEFAULT_FRAME_RATE
+    # The animation is appended to the rig's buffer so the file keeps a single one
+    chunks = [rig.buffer]
+    length = len(rig.buffer)
+    def add(data, type, **accessor):
+      nonlocal length
+      data = np.ascontiguousarray(data, dtype='<f4')
+      padding = _padded(length) - length
+      gltf['bufferViews'].append({'buffer': 0, 'byteOffset': length + padding, 'byteLength': data.nbytes})
+      gltf['accessors'].append({'bufferView': len(gltf['bufferViews']) - 1, 'componentType': FLOAT,
+                                'count': len(data), 'type': type, **accessor})
+      chunks.extend([b'\0' * padding, data.tobytes()])
+      length += padding + data.nbytes
+      return len(gltf['accessors']) - 1
+
+    shared_times = add(times, 'SCALAR', min=[float(times.min())], max=[float(times.max())])
+    samplers, channels = [], []
+    def animate(node, path, values, tolerance):
+      frames = reduce_keyframes(times, values, tolerance) if tolerance > 0 else None
+      if frames is None or len(frames) == len(times):
+        input = shared_times
+      else:
+        values = values[frames]
+        input = add(times[frames], 'SCALAR', min=[float(times[frames[0]])], max=[float(times[frames[-1]])])
+      samplers.append({'input': input, 'interpolation': 'LINEAR', 'output': add(values, 'VEC4' if path == 'rotation' else 'VEC3')})
+      channels.append({'sampler': len(samplers) - 1, 'target': {'node': node, 'path': path}})
+
+    # Components of a unit quaternion move by at most half the angle, and there are four of them
+    rotation_tolerance = np.radians(self.rotation_tolerance) / 4
+    for bone, coordinates in JOINTS.items():
+      if not any(column in columns for column, _, _ in coordinates):
+        continue
+      node = rig.nodes[bone]
+      animate(node, 'rotation', rig.local_rotations(node, coordinates, columns, len(times)), rotation_tolerance)
+    if all(column in columns for column in PELVIS_TRANSLATION):
+      translations = rig.pelvis_translations(*(columns[column] for column in PELVIS_TRANSLATION))
+      # The armature works in centimetres
+      animate(rig.nodes['mixamorig:Hips'], 'translation', translations, self.translation_tolerance / 10)
+    if not channels:
+      raise ValueError('.sto file has none of the coordinates the rig is animated with')
+
+    for bone in ARMS:
+      gltf['nodes'][rig.nodes[bone]]['rotation'] = rig.rest[rig.nodes[bone]].tolist()
+    gltf['nodes'].append(rig.root_node())
+    gltf['scenes'][gltf.get('scene', 0)]['nodes'] = [len(gltf['nodes']) - 1]
+    gltf['animations'] = [{'name': 'motion', 'samplers': samplers, 'channels': channels}]
+    gltf['asset'] = {'version': '2.0', 'generator': 'CSCE482-Stroke-Rehab gltf_converter'}
+    return gltf, b''.join(chunks)
+
+  def _textures(self, gltf):
+    if self.texture_url:
+      base = self.texture_url if self.texture_url.endswith('/') else self.texture_url + '/'
+      for image in gltf.get('images', []):
+        image['uri'] = base + image['uri']
+      return
+    # Relative image paths wouldn't resolve next to the blob, so the model goes without
+    for key in ('images', 'textures', 'samplers'):
+      gltf.pop(key, None)
+    for material in gltf.get('materials', []):
+      _strip_textures(material)
+
+  def check(self):
+    """Loads the rig now, raising OSError if the .gltf or its buffer cannot be read"""
+    self._load()
+
+  @property
+  def name(self):
+    """What the frontend serves the rig as, /Models/<name>/<name>.gltf"""
+    return os.path.splitext(os.path.basename(self.rig_path))[0]
+
+  def can_play(self, data):
+    """Whether a converted file is built on this rig, so its animation can be played on the frontend's copy
+
+    Every node of the rig has to be in the file, and the animation may only move nodes.
+    """
+    gltf, _ = unpack(data)
+    nodes = {node.get('name') for node in gltf.get('nodes', [])}
+    channels = [channel for animation in gltf.get('animations', []) for channel in animation['channels']]
+    return (bool(channels) and set(self._load().nodes) <= nodes and
+            all(channel['target'].get('path') in ('rotation', 'translation', 'scale') for channel in channels))
+
+  def _load(self):
+    with self._lock:
+      if self._rig is None:
+        self._rig = Rig.load(self.rig_path)
+      return self._rig
+
+class Rig:
+  """The rig's node tree with rest rotations worked out once"""
+  def __init__(self, gltf, buffer):
+    self.gltf = gltf
+    self.buffer = buffer
+    self.nodes = {node.get('name'): i for i, node in enumerate(gltf['nodes'])}
+    self.parents = {child: i for i, node in enumerate(gltf['nodes']) for child in node.get('children', [])}
+    self.rest = {i: np.array(node.get('rotation', [0, 0, 0, 1]), dtype=np.float64) for i, node in enumerate(gltf['nodes'])}
+    self.armature = self.parents[self.nodes['mixamorig:Hips']]
+    for bone in ARMS:
+      self._hang(self.nodes[bone])
+
+  @classmethod
+  def load(cls, path):
+    with open(path) as rig_file:
+      gltf = json.load(rig_file)
+    # The rig's buffer is stored next to it
+    with open(os.path.join(os.path.dirname(path), gltf['buffers'][0]['uri']), 'rb') as buffer_file:
+      buffer = buffer_file.read()
+    return cls(gltf, buffer)
+
+  def world_rotation(self, node):
+    rotation = self.rest[node]
+    while node in self.parents:
+      node = self.parents[node]
+      rotation = quat_multiply(self.rest[node], rotation)
+    return rotation
+
+  def local_rotations(self, node, coordinates, columns, frames):
+    """Rest rotation of node followed by the coordinates, turned about its parent's axes"""
+    motion = np.tile([0.0, 0.0, 0.0, 1.0], (frames, 1))
+    for column, axis, sign in coordinates:
+      if column in columns:
+        motion = quat_multiply(motion, axis_angle(AXES[axis], sign * columns[column]))
+    parent = self.world_rotation(self.parents[node])
+    # Expressed in the parent's frame: conj(parent) * motion * parent * rest
+    local = quat_multiply(quat_multiply(quat_conjugate(parent), motion), quat_multiply(parent, self.rest[node]))
+    local /= np.linalg.norm(local, axis=1, keepdims=True)
+    # q and -q are the same rotation, keep neighbours on the same side so interpolation takes the short way
+    flips = np.cumprod(np.where(np.einsum('ij,ij->i', local[1:], local[:-1]) < 0, -1.0, 1.0))
+    local[1:] *= flips[:, None]
+    return local
+
+  def pelvis_translations(self, tx, ty, tz):
+    """Hips translations in the armature's centimetres, relative to where the recording starts"""
+    start = np.array(self.gltf['nodes'][self.nodes['mixamorig:Hips']].get('translation', [0, 0, 0]))
+    # The armature is Z-up, so OpenSim (x, y, z) in metres is (-z, x, -y) in its centimetres
+    moved = np.stack([-(tz - tz[0]), tx - tx[0], -(ty - ty[0])], axis=1) * 100
+    return start + moved
+
+  def root_node(self):
+    """Node holding the armature, scaled and placed like the remote converter's output
+
+    The frontend turns every file -90 degrees about X and expects the pelvis at the origin.
+    """
+    hips = self.nodes['mixamorig:Hips']
+    armature = self.gltf['nodes'][self.armature]
+    height = quat_rotate(self.rest[self.armature], np.array(self.gltf['nodes'][hips]['translation']) * armature.get('scale', [1, 1, 1]))[1]
+    scale = PELVIS_HEIGHT / height
+    rotation = axis_angle((1.0, 0.0, 0.0), np.array([np.pi / 2]))[0]
+    translation = quat_rotate(rotation, np.array([0.0, -PELVIS_HEIGHT, 0.0]))
+    return {'name': 'Root', 'children': [self.armature], 'rotation': rotation.tolist(),
+            'scale': [scale] * 3, 'translation': translation.tolist()}
+
+  def _hang(self, node):
+    # Swing the upper arm from the T-pose to straight down, about the shortest arc
+    child = self.gltf['nodes'][node]['children'][0]
+    world = self.world_rotation(node)
+    direction = quat_rotate(world, np.array(self.gltf['nodes'][child]['translation']))
+    swing = shortest_arc(direction, np.array([0.0, -1.0, 0.0]))
+    parent = self.world_rotation(self.parents[node])
+    self.rest[node] = quat_multiply(quat_multiply(quat_conjugate(parent), swing), quat_multiply(parent, self.rest[node]))
+
+def reduce_keyframes(times, values, tolerance):
+  """Indices of the frames to keep so interpolating linearly between them rebuilds the rest within tolerance
+
+  Ramer-Douglas-Peucker on every component at once: a span is split at its
+  worst frame until no dropped frame is further than tolerance from the line
+  between the frames either side of it.
+  """
+  values = np.asarray(values).reshape(len(times), -1)
+  keep = np.zeros(len(times), dtype=bool)
+  keep[[0, -1]] = True
+  spans = [(0, len(times) - 1)]
+  while spans:
+    start, end = spans.pop()
+    if end - start < 2:
+      continue
+    fraction = (times[start + 1:end] - times[start]) / (times[end] - times[start])
+    interpolated = values[start] + fraction[:, None] * (values[end] - values[start])
+    error = np.abs(values[start + 1:end] - interpolated).max(axis=1)
+    worst = int(error.argmax())
+    if error[worst] > tolerance:
+      split = start + 1 + worst
+      keep[split] = True
+      spans += [(start, split), (split, end)]
+  return np.flatnonzero(keep)
+
+def pack_glb(gltf, buffer):
+  """Binary glTF holding the document and its one buffer, without base64"""
+  gltf = dict(gltf, buffers=[{'byteLength': len(buffer)}])
+  document = json.dumps(gltf, separators=(',', ':')).encode()
+  # Both chunks have to end on a multiple of 4, JSON with spaces and the buffer with zeros
+  document += b' ' * (_padded(len(document)) - len(document))
+  buffer += b'\0' * (_padded(len(buffer)) - len(buffer))
+  length = 12 + 8 + len(document) + 8 + len(buffer)
+  return b''.join([struct.pack('<4sII', GLB_MAGIC, GLB_VERSION, length),
+                   struct.pack('<II', len(document), GLB_JSON), document,
+                   struct.pack('<II', len(buffer), GLB_BIN), buffer])
+
+def pack_gltf(gltf, buffer):
+  """.gltf with its one buffer embedded as base64"""
+  gltf = dict(gltf, buffers=[{'byteLength': len(buffer),
+                              'uri': 'data:application/octet-stream;base64,' + base64.b64encode(buffer).decode()}])
+  return json.dumps(gltf, separators=(',', ':')).encode()
+
+def unpack(data):
+  """Returns the document and one buffer holding every buffer of a .glb or a .gltf with embedded buffers"""
+  if data[:4] == GLB_MAGIC:
+    json_length, = struct.unpack_from('<I', data, 12)
+    gltf = json.loads(data[20:20 + json_length])
+    if len(data) <= 20 + json_length:
+      return gltf, b''
+    bin_length, = struct.unpack_from('<I', data, 20 + json_length)
+    return gltf, data[28 + json_length:28 + json_length + bin_length]
+  gltf = json.loads(data)
+  chunks, offsets, length = [], [], 0
+  for buffer in gltf.get('buffers', []):
+    uri = buffer.get('uri', '')
+    if not uri.startswith('data:'):
+      raise ValueError(f'buffer {uri!r} is not embedded')
+    decoded = base64.b64decode(uri.split(',', 1)[1])
+    padding = _padded(length) - length
+    chunks.extend([b'\0' * padding, decoded])
+    offsets.append(length + padding)
+    length += padding + len(decoded)
+  for view in gltf.get('bufferViews', []):
+    view['byteOffset'] = view.get('byteOffset', 0) + offsets[view['buffer']]
+    view['buffer'] = 0
+  return gltf, b''.join(chunks)
+
+def gltf_to_glb(data):
+  """Repacks a .gltf whose buffers are all embedded as base64 into a .glb"""
+  return pack_glb(*unpack(data))
+
+def decimate(data, step):
+  """The same model keeping every step-th keyframe of its animations, in the format it came in
+
+  Animation data is rewritten and everything else, like the rig's mesh, is
+  copied over untouched. The last keyframe is always kept so the animation
+  runs for as long as the original.
+  """
+  gltf, buffer = unpack(data)
+  accessors = gltf.get('accessors', [])
+  samplers = [sampler for animation in gltf.get('animations', []) for sampler in animation['samplers']]
+  if not samplers:
+    raise ValueError('there is no animation to decimate')
+  frames = {}
+  for sampler in samplers:
+    if sampler.get('interpolation', 'LINEAR') == 'CUBICSPLINE':
+      raise ValueError('cubic spline animations cannot be decimated')
+    count = accessors[sampler['input']]['count']
+    keep = np.unique(np.append(np.arange(0, count, step), count - 1))
+    frames[sampler['input']] = keep
+    frames[sampler['output']] = keep
+
+  # bufferViews holding nothing but animation data are left behind, the decimated data is appended instead
+  users = {}
+  for i, accessor in enumerate(accessors):
+    if 'bufferView' in accessor:
+      users.setdefault(accessor['bufferView'], set()).add(i)
+  views, chunks, length, moved = [], [], 0, {}
+  def append(data, view):
+    nonlocal length
+    padding = _padded(length) - length
+    chunks.extend([b'\0' * padding, data])
+    views.append(dict(view, buffer=0, byteOffset=length + padding, byteLength=len(data)))
+    length += padding + len(data)
+    return len(views) - 1
+  for i, view in enumerate(gltf.get('bufferViews', [])):
+    if i not in users or not users[i] <= frames.keys():
+      start = view.get('byteOffset', 0)
+      moved[i] = append(buffer[start:start + view['byteLength']], view)
+  for i, accessor in enumerate(accessors):
+    if i in frames:
+      values = _read_floats(gltf, buffer, accessor)[frames[i]]
+      accessor['count'] = len(values)
+      accessor['bufferView'] = append(np.ascontiguousarray(values, dtype='<f4').tobytes(), {})
+      accessor.pop('byteOffset', None)
+      if 'min' in accessor:
+        accessor['min'] = np.atleast_1d(values.min(axis=0)).tolist()
+        accessor['max'] = np.atleast_1d(values.max(axis=0)).tolist()
+    elif 'bufferView' in accessor:
+      accessor['bufferView'] = moved[accessor['bufferView']]
+  for image in gltf.get('images', []):
+    if 'bufferView' in image:
+      image['bufferView'] = moved[image['bufferView']]
+  gltf['bufferViews'] = views
+  buffer = b''.join(chunks)
+  return pack_glb(gltf, buffer) if data[:4] == GLB_MAGIC else pack_gltf(gltf, buffer)
+
+def animation_only(data):
+  """Just the node tree and animations of a model, in the format it came in
+
+  Meshes, skins, materials and textures are left out along with the buffer data
+  only they used, what is left is the nodes' names and transforms and the keyframes.
+  A client dresses the nodes in the meshes of its own copy of the rig.
+  """
+  gltf, buffer = unpack(data)
+  animations = copy.deepcopy(gltf.get('animations', []))
+  accessors, views, chunks, length = [], [], [], 0
+  moved_accessors, moved_views = {}, {}
+  def move_view(i):
+    nonlocal length
+    if i not in moved_views:
+      view = gltf['bufferViews'][i]
+      start = view.get('byteOffset', 0)
+      padding = _padded(length) - length
+      chunks.extend([b'\0' * padding, buffer[start:start + view['byteLength']]])
+      views.append(dict(view, buffer=0, byteOffset=length + padding))
+      length += padding + view['byteLength']
+      moved_views[i] = len(views) - 1
+    return moved_views[i]
+  def move_accessor(i):
+    if i not in moved_accessors:
+      accessor = dict(gltf['accessors'][i])
+      if 'bufferView' in accessor:
+        accessor['bufferView'] = move_view(accessor['bufferView'])
+      accessors.append(accessor)
+      moved_accessors[i] = len(accessors) - 1
+    return moved_accessors[i]
+  for animation in animations:
+    for sampler in animation['samplers']:
+      sampler['input'] = move_accessor(sampler['input'])
+      sampler['output'] = move_accessor(sampler['output'])
+  nodes = [{key: value for key, value in node.items() if key not in ('mesh', 'skin', 'camera', 'extensions')}
+           for node in gltf.get('nodes', [])]
+  skeleton = {'asset': gltf['asset'], 'nodes': nodes, 'animations': animations, 'accessors': accessors, 'bufferViews': views}
+  for key in ('scene', 'scenes'):
+    if key in gltf:
+      skeleton[key] = gltf[key]
+  buffer = b''.join(chunks)
+  return pack_glb(skeleton, buffer) if data[:4] == GLB_MAGIC else pack_gltf(skeleton, buffer)
+
+def file_type(data):
+  """(extension, content type) of converter output"""
+  if data[:4] == GLB_MAGIC:
+    return 'glb', 'model/gltf-binary'
+  return 'gltf', 'model/gltf+json'
+
+def quat_multiply(a, b):
+  """Hamilton product of (x, y, z, w) quaternions, either may be a stack of them"""
+  ax, ay, az, aw = np.moveaxis(np.asarray(a), -1, 0)
+  bx, by, bz, bw = np.moveaxis(np.asarray(b), -1, 0)
+  return np.stack([aw*bx + ax*bw + ay*bz - az*by,
+                   aw*by - ax*bz + ay*bw + az*bx,
+                   aw*bz + ax*by - ay*bx + az*bw,
+                   aw*bw - ax*bx - ay*by - az*bz], axis=-1)
+
+def quat_conjugate(q):
+  return np.asarray(q) * np.array([-1.0, -1.0, -1.0, 1.0])
+
+def quat_rotate(q, v):
+  return quat_multiply(quat_multiply(q, np.append(v, 0.0)), quat_conjugate(q))[:3]
+
+def axis_angle(axis, angles):
+  half = np.asarray(angles, dtype=np.float64) / 2
+  return np.concatenate([np.outer(np.sin(half), axis), np.cos(half)[:, None]], axis=1)
+
+def shortest_arc(a, b):
+  a, b = a / np.linalg.norm(a), b / np.linalg.norm(b)
+  q = np.append(np.cross(a, b), 1.0 + np.dot(a, b))
+  return q / np.linalg.norm(q)
+
+def _read_floats(gltf, buffer, accessor):
+  width = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4}[accessor['type']]
+  view = gltf['bufferViews'][accessor['bufferView']]
+  if accessor['componentType'] != FLOAT or 'sparse' in accessor or view.get('byteStride', width * 4) != width * 4:
+    raise ValueError('only tightly packed float animation data can be decimated')
+  values = np.frombuffer(buffer, dtype='<f4', count=accessor['count'] * width,
+                         offset=view.get('byteOffset', 0) + accessor.get('byteOffset', 0))
+  return values.reshape(accessor['count'], width) if width > 1 else values
+
+def _padded(length):
+  # bufferViews holding floats have to start on a multiple of 4
+  return (length + 3) & ~3
+
+def _strip_textures(value):
+  if isinstance(value, dict):
+    for key in [key for key in value if key.endswith('Texture')]:
+      del value[key]
+    for child in value.values():
+      _strip_textures(child)
+
+rig_converter = RigConverter()
@@ -0,0 +1,420 @@
+import hashlib
+import logging
+import os
+import queue
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from azure.core.exceptions import ResourceNotFoundError
+from azure.storage.blob import BlobClient, ContainerClient, ContentSettings
+from dotenv import load_dotenv
+from sqlalchemy.dialects.postgresql import insert
+from extensions import db, socket
+from models.chat import Chat
+from models.converted_file import ConvertedFile
+from models.device import Device
+from models.ingestion_job import IngestionJob
+from models.motion_file import Motion_File
+from models.motion_reading import MotionReading, insert_motion_readings
+from models.motion_series import MotionSeries
+from converter import check_converter, convert
+from gltf_converter import animation_only, decimate, file_type, rig_converter
+from sto import read_range_of_motion_and_series
+from metrics import metrics, StageTimer
+
+load_dotenv()
+
+# Conversions that can run at once, each holds a converter request and a temp file
+INGESTION_WORKERS = int(os.environ.get('INGESTION_WORKERS', 2))
+# Uploads waiting for a worker before /file_upload starts turning devices away
+INGESTION_QUEUE_SIZE = int(os.environ.get('INGESTION_QUEUE_SIZE', 100))
+# A job holding a recording's claim longer than this is taken for dead and another job may convert it instead
+INGESTION_CLAIM_TIMEOUT = float(os.environ.get('INGESTION_CLAIM_TIMEOUT', 900))
+# Seconds before a job waiting on another job's conversion of the same recording is queued again
+INGESTION_CLAIM_RETRY = float(os.environ.get('INGESTION_CLAIM_RETRY', 5))
+# Lower sample rates stored next to each motion file for a quick first load, as divisors of the full rate
+MOTION_FILE_LEVELS = [int(step) for step in os.environ.get('MOTION_FILE_LEVELS', '4,16').split(',') if step.strip()]
+
+ACCOUNT_NAME = 'capstorage2025'
+CONTAINER_NAME = 'motion-files'
+
+logger = logging.getLogger(__name__)
+
+class QueueFull(Exception):
+  pass
+
+class ConversionPending(Exception):
+  """Another job is converting the same recording for the patient"""
+
+class LocalJobQueue:
+  """Queue backend living in this process, queued jobs are lost if it exits"""
+  def __init__(self, maxsize=INGESTION_QUEUE_SIZE):
+    self._queue = queue.Queue(maxsize)
+
+  def put(self, job_id):
+    try:
+      self._queue.put_nowait(job_id)
+    except queue.Full:
+      raise QueueFull()
+
+  def get(self):
+    return self._queue.get()
+
+  def task_done(self):
+    self._queue.task_done()
+
+  def join(self):
+    self._queue.join()
+
+class IngestionWorker:
+  """Turns uploaded .sto files into motion files on a bounded pool of threads
+
+  submit() records an IngestionJob and returns straight away. A worker then
+  downloads the blob, converts it, uploads the glTF, saves the motion file,
+  its readings and joint angles and emits 'new_file' to the patient's chat,
+  updating the job's stage as it goes so clients can poll it. A job whose
+  recording another job is already converting is set 'waiting' and queued
+  again after retry_delay seconds rather than holding a worker meanwhile.
+  """
+  def __init__(self, backend=None, workers=INGESTION_WORKERS, retry_delay=INGESTION_CLAIM_RETRY):
+    self.backend = backend or LocalJobQueue()
+    self.workers = workers
+    self.retry_delay = retry_delay
+    self._app = None
+    self._threads = []
+    # Timers that will queue waiting jobs again
+    self._retries = set()
+    self._lock = threading.Lock()
+
+  def init_app(self, app):
+    check_converter()
+    self._app = app
+
+  def submit(self, filename, device_id):
+    """Queues a job for the upload, must be called inside an app context"""
+    job = IngestionJob(filename=filename, device_id=device_id)
+    db.session.add(job)
+    db.session.commit()
+    self._start()
+    try:
+      self.backend.put(job.id)
+    except QueueFull:
+      job.status = 'failed'
+      job.error = 'Too many uploads waiting to be processed'
+      db.session.commit()
+      raise
+    return job
+
+  def flush(self):
+    """Blocks until every queued job has finished, waiting ones included"""
+    while True:
+      self.backend.join()
+      with self._lock:
+        retries = list(self._retries)
+      if not retries:
+        return
+      for retry in retries:
+        retry.join()
+
+  def _start(self):
+    with self._lock:
+      self._threads = [thread for thread in self._threads if thread.is_alive()]
+      while len(self._threads) < self.workers:
+        thread = threading.Thread(target=self._run, name=f'ingestion-{len(self._threads)}', daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+  def _run(self):
+    while True:
+      job_id = self.backend.get()
+      try:
+        with self._app.app_context():
+          self._process(job_id)
+      except Exception:
+        logger.exception('Ingestion job %s could not be updated', job_id)
+      finally:
+        self.backend.task_done()
+
+  def _process(self, job_id):
+    job = db.session.get(IngestionJob, job_id)
+    job.status = 'running'
+    timer = StageTimer()
+    try:
+      with timer.stage('total'):
+        motion_file, motion_readings = ingest(job, lambda stage: self._set_stage(job, stage), timer)
+    except ConversionPending:
+      job.status = 'waiting'
+      job.timings = _timings(timer)
+      db.session.commit()
+      self._retry_later(job.id)
+      return
+    except Exception as e:
+      logger.exception('Ingestion job %s failed at %s', job.id, job.stage)
+      db.session.rollback()
+      job.status = 'failed'
+      job.error = str(e) or type(e).__name__
+      job.timings = _timings(timer)
+      db.session.commit()
+      return
+    finally:
+      metrics.record_ingestion(timer)
+    job.status = 'succeeded'
+    job.stage = None
+    job.motion_file_id = motion_file.id
+    job.timings = _timings(timer)
+    db.session.commit()
+
+  def _retry_later(self, job_id):
+    retry = threading.Timer(self.retry_delay, self._requeue, [job_id])
+    retry.daemon = True
+    with self._lock:
+      self._retries.add(retry)
+    retry.start()
+
+  def _requeue(self, job_id):
+    try:
+      self.backend.put(job_id)
+    except QueueFull:
+      with self._app.app_context():
+        job = db.session.get(IngestionJob, job_id)
+        job.status = 'failed'
+        job.error = 'Too many uploads waiting to be processed'
+        db.session.commit()
+    finally:
+      with self._lock:
+        self._retries.discard(threading.current_thread())
+
+  @staticmethod
+  def _set_stage(job, stage):
+    job.stage = stage
+    db.session.commit()
+
+def ingest(job, set_stage, timer):
+  """Runs every stage for one job and returns the new motion file and its readings
+
+  Only the download has to finish first. The statistics pass reads the .sto
+  off disk while the converter works on it, and the chat lookup and upload
+  happen on this thread in the meantime, so a job takes about as long as
+  download + convert + upload rather than the sum of every stage.
+  """
+  device = db.session.get(Device, job.device_id) if job.device_id is not None else None
+  if device is None or device.patient is None:
+    raise ValueError('Device is not assigned to a patient')
+  patient_id = device.patient.id
+
+  claim_id = None
+  if job.sha256:
+    # Back from waiting on another job converting this recording, see how that went before downloading it again
+    claim_id, existing = _claim(job.sha256, patient_id, set_stage, timer)
+    if existing:
+      return _reuse(existing, set_stage)
+
+  with tempfile.NamedTemporaryFile() as sto_file:
+    try:
+      # Stream the blob to disk instead of holding all of it, hashing it on the way
+      set_stage('download')
+      with timer.stage('download'):
+        digest = hashlib.sha256()
+        for chunk in download_blob_chunks(job.filename):
+          sto_file.write(chunk)
+          digest.update(chunk)
+        sto_file.flush()
+        sha256 = digest.hexdigest()
+
+      if claim_id is None:
+        # Devices retry uploads, a recording this patient already has was converted and announced before,
+        # or is being converted by another job right now
+        job.sha256 = sha256
+        claim_id, existing = _claim(sha256, patient_id, set_stage, timer)
+        if existing:
+          return _reuse(existing, set_stage)
+
+      return _convert_and_save(job, set_stage, timer, sto_file, patient_id, sha256)
+    except Exception:
+      # Let a retry of this recording have a go rather than wait out the claim
+      if claim_id is not None:
+        release_claim(claim_id)
+      raise
+
+def _claim(sha256, patient_id, set_stage, timer):
+  set_stage('lookup')
+  with timer.stage('lookup'):
+    return claim_conversion(sha256, patient_id)
+
+def _reuse(motion_file, set_stage):
+  set_stage('reuse')
+  return motion_file, db.session.scalars(db.select(MotionReading).filter_by(motion_file_id=motion_file.id)).all()
+
+def _convert_and_save(job, set_stage, timer, sto_file, patient_id, sha256):
+  set_stage('convert')
+  with ThreadPoolExecutor(max_workers=2, thread_name_prefix=f'ingestion-job-{job.id}') as executor:
+    conversion = executor.submit(_timed, timer, 'convert', convert, job.filename, sto_file)
+    statistics = executor.submit(_timed, timer, 'statistics', _read_statistics, sto_file.name)
+    with timer.stage('prepare'):
+      new_filename = f'{patient_id}_{datetime.now(timezone.utc)}'
+      chat = db.session.scalars(db.select(Chat).filter_by(patient_id=patient_id)).first()
+    converted_file = conversion.result()
+    extension, content_type = file_type(converted_file)
+
+    with timer.stage('levels'):
+      levels = make_levels(new_filename, extension, converted_file)
+
+    set_stage('upload')
+    with timer.stage('upload'):
+      for level in levels:
+        level['url'] = upload_gltf(level['name'], level.pop('data'), content_type)
+    new_filename, url = levels[-1]['name'], levels[-1]['url']
+    readings, (labels, values) = statistics.result()
+
+  # Map file to database and record the statistics and the angles of each joint
+  set_stage('save')
+  with timer.stage('save'):
+    motion_file = Motion_File(name=new_filename,
+                              type=extension,
+                              url=url,
+                              levels=levels,
+                              patient_id=patient_id)
+    db.session.add(motion_file)
+    db.session.flush()
+    motion_readings = insert_motion_readings(db.session, motion_file.id, readings)
+    if 'time' in labels:
+      db.session.add(MotionSeries.from_table(labels, values, motion_file_id=motion_file.id))
+    if not save_conversion(sha256, patient_id, motion_file.id):
+      # Ran past INGESTION_CLAIM_TIMEOUT, and the job that took the claim over saved this recording first
+      db.session.rollback()
+      for level in levels:
+        delete_gltf(level['name'])
+      return _reuse(find_converted(sha256, patient_id), set_stage)
+    db.session.commit()
+
+  # Send new file message to physician
+  set_stage('notify')
+  with timer.stage('notify'):
+    if chat:
+      socket.emit('new_file',data={'motion_file':motion_file.dict(),'motion_readings':[mr.dict() for mr in motion_readings]},to=chat.id)
+  return motion_file, motion_readings
+
+def find_converted(sha256, patient_id):
+  """Returns the patient's motion file converted from a .sto with this hash, if there is one"""
+  return db.session.scalars(db.select(Motion_File)
+                            .join(ConvertedFile, ConvertedFile.motion_file_id == Motion_File.id)
+                            .filter(ConvertedFile.sha256 == sha256, ConvertedFile.patient_id == patient_id)).first()
+
+def claim_conversion(sha256, patient_id, timeout=INGESTION_CLAIM_TIMEOUT):
+  """Claims converting this recording for the patient
+
+  Returns (claim id, None) when the caller should convert it and save it with
+  save_conversion, or (None, motion file) when another job already converted it.
+  Raises ConversionPending while another job holds the claim. The claim is one
+  INSERT ... ON CONFLICT DO NOTHING on (patient_id, sha256), so of any number of jobs
+  racing for the same recording exactly one gets it. If the claiming job fails its
+  claim is released, if it dies the claim is taken over once it is timeout seconds old.
+  """
+  for _ in range(2):
+    claim_id = db.session.scalar(insert(ConvertedFile).values(patient_id=patient_id, sha256=sha256)
+                                 .on_conflict_do_nothing(index_elements=['patient_id', 'sha256'])
+                                 .returning(ConvertedFile.id))
+    db.session.commit()
+    if claim_id is not None:
+      return claim_id, None
+    existing = find_converted(sha256, patient_id)
+    if existing:
+      return None, existing
+    # Compared on the database's clock, the one claimedAt was set by
+    abandoned = db.session.execute(db.delete(ConvertedFile).filter(ConvertedFile.patient_id == patient_id,
+                                                                   ConvertedFile.sha256 == sha256,
+                                                                   ConvertedFile.motion_file_id.is_(None),
+                                                                   ConvertedFile.claimedAt < db.func.now() - timedelta(seconds=timeout)))
+    db.session.commit()
+    if not abandoned.rowcount:
+      break
+  raise ConversionPending(f'Recording {sha256} is already being converted')
+
+def save_conversion(sha256, patient_id, motion_file_id):
+  """Points the recording's claim at the motion file made from it, in the caller's transaction
+
+  An upsert rather than an update of the caller's own row, which is gone if the claim
+  was taken over. Returns False when another job has already saved the recording.
+  """
+  values = insert(ConvertedFile).values(patient_id=patient_id, sha256=sha256, motion_file_id=motion_file_id)
+  return db.session.scalar(values.on_conflict_do_update(index_elements=['patient_id', 'sha256'],
+                                                        set_={'motion_file_id': values.excluded.motion_file_id},
+                                                        where=ConvertedFile.motion_file_id.is_(None))
+                           .returning(ConvertedFile.id)) is not None
+
+def release_claim(claim_id):
+  db.session.rollback()
+  db.session.execute(db.delete(ConvertedFile).filter(ConvertedFile.id == claim_id, ConvertedFile.motion_file_id.is_(None)))
+  db.session.commit()
+
+def make_levels(name, extension, data):
+  """The converted file and its MOTION_FILE_LEVELS, coarsest first, ready to upload
+
+  Levels hold only the node tree and the decimated animation, clients play them on
+  their own copy of the rig the level names, so even a short recording's 1/16 level
+  is a few kilobytes instead of the whole mesh again. A file not built on the rig
+  gets no levels.
+  """
+  full = {'step': 1, 'name': f'{name}.{extension}', 'data': data}
+  steps = sorted(set(MOTION_FILE_LEVELS) - {1}, reverse=True)
+  if not steps:
+    return [full]
+  try:
+    playable = rig_converter.can_play(data)
+  except (OSError, ValueError) as e:
+    logger.warning('No levels for %s: %s', name, e)
+    return [full]
+  if not playable:
+    # The full file still works, clients just have nothing smaller to start with
+    logger.info('No levels for %s: it is not built on the %s rig', name, rig_converter.name)
+    return [full]
+  levels = []
+  for step in steps:
+    try:
+      levels.append({'step': step, 'name': f'{name}_{step}.{extension}', 'rig': rig_converter.name,
+                     'data': animation_only(decimate(data, step))})
+    except ValueError as e:
+      logger.warning('No 1/%s level for %s: %s', step, name, e)
+  return levels + [full]
+
+def _timed(timer, stage, fn, *args):
+  with timer.stage(stage):
+    return fn(*args)
+
+def _read_statistics(path):
+  # A handle of its own, the converter request is reading the other one
+  with open(path, 'rb') as sto_file:
+    return read_range_of_motion_and_series(sto_file)
+
+def _timings(timer):
+  return {stage: round(seconds, 4) for stage, seconds in timer.stages}
+
+def download_blob_chunks(filename):
+  blob = BlobClient(account_url=f'https://{ACCOUNT_NAME}.blob.core.windows.net',
+                    container_name=CONTAINER_NAME,
+                    blob_name=filename,
+                    credential=os.environ.get('AZURE_ACCESS_KEY'))
+  return blob.download_blob(max_concurrency=1).chunks()
+
+def upload_gltf(name, data, content_type='model/gltf+json'):
+  container = ContainerClient(account_url=f'https://{ACCOUNT_NAME}.blob.core.windows.net',
+                              container_name=CONTAINER_NAME,
+                              credential=os.environ.get('AZURE_ACCESS_KEY'))
+  new_blob = container.upload_blob(name=name,
+                                   data=data,
+                                   overwrite=True,
+                                   content_settings=ContentSettings(content_type=content_type))
+  return new_blob.url
+
+def delete_gltf(name):
+  container = ContainerClient(account_url=f'https://{ACCOUNT_NAME}.blob.core.windows.net',
+                              container_name=CONTAINER_NAME,
+                              credential=os.environ.get('AZURE_ACCESS_KEY'))
+  try:
+    container.delete_blob(name)
+  except ResourceNotFoundError:
+    # Already gone, which is all deleting it was for
+    pass
+
+ingestion = IngestionWorker()
@@ -0,0 +1,104 @@
+import json
+import os
+import threading
+import time
+from urllib.request import urlopen
+from jose import jwk
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# How long fetched signing keys are trusted before they are refetched
+JWKS_CACHE_TTL = float(os.environ.get('JWKS_CACHE_TTL', 600))
+# Unknown kids can't force a refetch more often than this (protects Auth0 from junk tokens)
+JWKS_MIN_REFRESH_INTERVAL = float(os.environ.get('JWKS_MIN_REFRESH_INTERVAL', 30))
+JWKS_FETCH_TIMEOUT = float(os.environ.get('JWKS_FETCH_TIMEOUT', 5))
+
+class JWKSStore:
+  """Process-wide cache of JWKS signing keys indexed by kid
+
+  Keys are converted into verification keys once when fetched so a request only
+  pays for a dict lookup. A refetch happens when the TTL runs out or a token
+  names a kid we haven't seen, and only one thread performs it at a time.
+  """
+  def __init__(self, url, ttl=JWKS_CACHE_TTL, min_refresh_interval=JWKS_MIN_REFRESH_INTERVAL, timeout=JWKS_FETCH_TIMEOUT):
+    self.url = url
+    self.ttl = ttl
+    self.min_refresh_interval = min_refresh_interval
+    self.timeout = timeout
+    self._keys = {}
+    self._fetched_at = None
+    # Bumped on every refresh, failed or not, so waiting threads know the attempt is over
+    self._generation = 0
+    # (when, error) of the last fetch that failed with no keys to fall back on
+    self._failure = None
+    self._lock = threading.Lock()
+
+  def get_key(self, kid):
+    """Returns the verification key for kid, or None if the issuer doesn't publish it"""
+    return self.get_keys(kid).get(kid)
+
+  def get_keys(self, kid=None):
+    """Returns the current {kid: key} set, refetching it if it is stale or lacks kid"""
+    generation = self._generation
+    keys = self._keys
+    if not self._is_expired() and (kid is None or kid in keys):
+      return keys
+    # Unknown kid on fresh keys, only refetch if we haven't just done so
+    if not self._is_expired() and not self._can_refresh():
+      return keys
+    self._refresh(generation)
+    return self._keys
+
+  def clear(self):
+    with self._lock:
+      self._keys = {}
+      self._fetched_at = None
+      self._failure = None
+      self._generation += 1
+
+  def _is_expired(self):
+    return self._fetched_at is None or time.monotonic() - self._fetched_at >= self.ttl
+
+  def _can_refresh(self):
+    return self._fetched_at is None or time.monotonic() - self._fetched_at >= self.min_refresh_interval
+
+  def _refresh(self, seen_generation):
+    with self._lock:
+      # Another thread refreshed while we waited for the lock, share its outcome
+      if self._generation != seen_generation:
+        if self._failure:
+          raise self._failure[1]
+        return
+      # Nothing cached and the last fetch just failed, back off instead of asking again
+      if self._failure and time.monotonic() - self._failure[0] < self.min_refresh_interval:
+        raise self._failure[1]
+      try:
+        jwks = self._fetch()
+      except Exception as e:
+        self._generation += 1
+        # Keep serving the keys we have if Auth0 is unreachable and retry shortly
+        if self._keys:
+          self._fetched_at = time.monotonic() - self.ttl + self.min_refresh_interval
+          return
+        self._failure = (time.monotonic(), e)
+        raise
+      keys = {}
+      for key in jwks.get('keys', []):
+        if 'kid' not in key or key.get('kty') != 'RSA':
+          continue
+        keys[key['kid']] = jwk.construct({
+          'kty': key['kty'],
+          'kid': key['kid'],
+          'use': key.get('use', 'sig'),
+          'n': key['n'],
+          'e': key['e']
+        }, algorithm=key.get('alg', 'RS256'))
+      self._keys = keys
+      self._fetched_at = time.monotonic()
+      self._failure = None
+      self._generation += 1
+
+  def _fetch(self):
+    with urlopen(self.url, timeout=self.timeout) as response:
+      return json.loads(response.read())
@@ -0,0 +1,102 @@
+import argparse
+import os
+import time
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from dotenv import load_dotenv
+from jwks import JWKSStore
+
+load_dotenv()
+
+ROLES_CLAIM = 'https://yourapp.com/roles'
+
+class Auth0KeyProvider:
+  """Verification keys published by the Auth0 tenant"""
+  def __init__(self, domain, audience):
+    self.issuer = 'https://'+str(domain)+'/'
+    self.audience = audience
+    self.jwks_store = JWKSStore('https://'+str(domain)+'/.well-known/jwks.json')
+
+  def get_key(self, kid):
+    return self.jwks_store.get_key(kid)
+
+  def get_keys(self, kid=None):
+    return self.jwks_store.get_keys(kid)
+
+class LocalKeyProvider:
+  """Offline stand-in for Auth0 that signs its own tokens with a local RSA keypair
+
+  Tokens carry the same issuer, audience and role claim as Auth0's so they go
+  through the real verification path. Pass key_path to share one key between the
+  server and whatever mints tokens for it (it is generated on first use).
+  """
+  def __init__(self, issuer, audience, key_path=None, kid='local'):
+    self.issuer = issuer
+    self.audience = audience
+    self.kid = kid
+    private_key = self._load_private_key(key_path)
+    self._private_pem = private_key.private_bytes(serialization.Encoding.PEM,
+                                                  serialization.PrivateFormat.PKCS8,
+                                                  serialization.NoEncryption())
+    public_pem = private_key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                       serialization.PublicFormat.SubjectPublicKeyInfo)
+    self._public_key = jwk.construct(public_pem, algorithm='RS256')
+
+  def get_key(self, kid):
+    return self._public_key if kid == self.kid else None
+
+  def get_keys(self, kid=None):
+    return {self.kid: self._public_key}
+
+  def jwks(self):
+    """The public key in the same shape as Auth0's /.well-known/jwks.json"""
+    return {'keys': [{**self._public_key.to_dict(), 'kid': self.kid, 'use': 'sig'}]}
+
+  def mint_token(self, sub='local|test', roles=[], expires_in=3600, **claims):
+    now = int(time.time())
+    payload = {
+      'iss': self.issuer,
+      'sub': sub,
+      'iat': now,
+      'exp': now + expires_in,
+      ROLES_CLAIM: list(roles),
+      **claims
+    }
+    if self.audience:
+      payload['aud'] = self.audience
+    return jwt.encode(payload, self._private_pem, algorithm='RS256', headers={'kid': self.kid})
+
+  @staticmethod
+  def _load_private_key(key_path):
+    if key_path and os.path.exists(key_path):
+      with open(key_path, 'rb') as key_file:
+        return serialization.load_pem_private_key(key_file.read(), password=None)
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if key_path:
+      with open(key_path, 'wb') as key_file:
+        key_file.write(private_key.private_bytes(serialization.Encoding.PEM,
+                                                 serialization.PrivateFormat.PKCS8,
+                                                 serialization.NoEncryption()))
+    return private_key
+
+def provider_from_env():
+  """Auth0 unless AUTH_KEY_PROVIDER=local, which signs with AUTH_LOCAL_KEY_PATH"""
+  domain = os.environ.get('AUTH0_DOMAIN')
+  audience = os.environ.get('API_AUDIENCE')
+  if os.environ.get('AUTH_KEY_PROVIDER') == 'local':
+    return LocalKeyProvider('https://'+str(domain)+'/', audience, key_path=os.environ.get('AUTH_LOCAL_KEY_PATH'))
+  return Auth0KeyProvider(domain, audience)
+
+# Prints a token for a backend running with AUTH_KEY_PROVIDER=local and the same AUTH_LOCAL_KEY_PATH
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description='Mint a locally signed access token')
+  parser.add_argument('--sub', default='local|test')
+  parser.add_argument('--roles', nargs='*', default=['Admin', 'Physician', 'Patient'])
+  parser.add_argument('--expires-in', type=int, default=3600)
+  args = parser.parse_args()
+  if not os.environ.get('AUTH_LOCAL_KEY_PATH'):
+    parser.error('AUTH_LOCAL_KEY_PATH must point at the key the backend uses')
+  provider = LocalKeyProvider('https://'+str(os.environ.get('AUTH0_DOMAIN'))+'/', os.environ.get('API_AUDIENCE'),
+                              key_path=os.environ.get('AUTH_LOCAL_KEY_PATH'))
+  print(provider.mint_token(sub=args.sub, roles=args.roles, expires_in=args.expires_in))
@@ -0,0 +1,125 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from flask import Response, g, request
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Upper bounds in seconds, auth stages range from microseconds (cache hits) to a JWKS fetch
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+class Histogram:
+  """Thread-safe histogram with labels, rendered in the Prometheus text format"""
+  def __init__(self, name, description, label_names, buckets=DEFAULT_BUCKETS):
+    self.name = name
+    self.description = description
+    self.label_names = label_names
+    self.buckets = buckets
+    # label values -> [bucket counts..., sum, count]
+    self._series = {}
+    self._lock = threading.Lock()
+
+  def observe(self, value, *label_values):
+    with self._lock:
+      series = self._series.get(label_values)
+      if series is None:
+        series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+      for i, bound in enumerate(self.buckets):
+        if value <= bound:
+          series[i] += 1
+      series[-2] += value
+      series[-1] += 1
+
+  def render(self):
+    lines = [f'# HELP {self.name} {self.description}', f'# TYPE {self.name} histogram']
+    with self._lock:
+      series = {labels: list(values) for labels, values in self._series.items()}
+    for label_values, values in sorted(series.items()):
+      labels = ','.join(f'{name}="{value}"' for name, value in zip(self.label_names, label_values))
+      for bound, count in zip(self.buckets, values):
+        lines.append(f'{self.name}_bucket{{{labels},le="{bound}"}} {count}')
+      lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {values[-1]}')
+      lines.append(f'{self.name}_sum{{{labels}}} {values[-2]}')
+      lines.append(f'{self.name}_count{{{labels}}} {values[-1]}')
+    return '\n'.join(lines)
+
+class StageTimer:
+  """Collects how long each stage of a single operation took"""
+  def __init__(self):
+    self.stages = []
+
+  @contextmanager
+  def stage(self, name):
+    start = time.perf_counter()
+    try:
+      yield
+    finally:
+      self.stages.append((name, time.perf_counter() - start))
+
+class Metrics:
+  """Serves /metrics and adds a Server-Timing header with the request's auth stages
+
+  /metrics answers only 'Authorization: Bearer <METRICS_TOKEN>', and is a 404 while METRICS_TOKEN is unset.
+  """
+  def __init__(self):
+    self.auth_stages = Histogram('auth_stage_duration_seconds',
+                                 'Time spent in each stage of requires_auth',
+                                 ('stage', 'route'))
+    self.ingestion_stages = Histogram('ingestion_stage_duration_seconds',
+                                      'Time spent in each stage of a file_upload ingestion job',
+                                      ('stage',),
+                                      buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0))
+    # Extra text sections for /metrics, e.g. cache counters
+    self._collectors = []
+
+  def init_app(self, app):
+    app.after_request(self._add_server_timing)
+    app.add_url_rule('/metrics', 'metrics', self._metrics_view)
+
+  def add_collector(self, collector):
+    self._collectors.append(collector)
+
+  def record_auth(self, timer):
+    route = self._route()
+    for stage, seconds in timer.stages:
+      self.auth_stages.observe(seconds, stage, route)
+    g.auth_timings = timer.stages
+
+  def record_ingestion(self, timer):
+    for stage, seconds in timer.stages:
+      self.ingestion_stages.observe(seconds, stage)
+
+  def render(self):
+    sections = [self.auth_stages.render(), self.ingestion_stages.render()] + [collector() for collector in self._collectors]
+    return '\n'.join(sections) + '\n'
+
+  def _metrics_view(self):
+    metrics_token = os.environ.get('METRICS_TOKEN')
+    # Per route timings are nobody's business on an API holding patient data, so no token means no endpoint
+    if not metrics_token:
+      return Response('Not Found\n', status=404, mimetype='text/plain')
+    if request.headers.get('Authorization') != 'Bearer '+metrics_token:
+      return Response('Unauthorized\n', status=401, mimetype='text/plain')
+    return Response(self.render(), mimetype='text/plain; version=0.0.4')
+
+  def _add_server_timing(self, response):
+    timings = g.get('auth_timings')
+    if timings:
+      entries = [f'auth-{stage};dur={seconds * 1000:.3f}' for stage, seconds in timings]
+      entries.append(f'auth;dur={sum(seconds for _, seconds in timings) * 1000:.3f}')
+      response.headers.add('Server-Timing', ', '.join(entries))
+    return response
+
+  @staticmethod
+  def _route():
+    # Socket.IO handlers run under the engine.io request, label them by event instead
+    event = getattr(request, 'event', None)
+    if event:
+      return 'socket:'+str(event.get('message'))
+    if request.url_rule is not None:
+      return request.url_rule.rule
+    return request.path
+
+metrics = Metrics()
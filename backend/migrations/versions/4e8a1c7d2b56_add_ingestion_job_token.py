@@ -0,0 +1,34 @@
+"""Add ingestion job token
+
+Revision ID: 4e8a1c7d2b56
+Revises: 9d3f6b2a8c41
+Create Date: 2026-10-19 09:14:52.661043
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e8a1c7d2b56'
+down_revision = '9d3f6b2a8c41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('ingestion_jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('token', sa.String(), nullable=True))
+
+    # Jobs from before get a token too, so every row can be polled the same way
+    op.execute("UPDATE ingestion_jobs SET token = replace(gen_random_uuid()::text, '-', '')")
+
+    with op.batch_alter_table('ingestion_jobs', schema=None) as batch_op:
+        batch_op.alter_column('token', existing_type=sa.String(), nullable=False)
+        batch_op.create_unique_constraint(batch_op.f('ingestion_jobs_token_key'), ['token'])
+
+
+def downgrade():
+    with op.batch_alter_table('ingestion_jobs', schema=None) as batch_op:
+        batch_op.drop_constraint(batch_op.f('ingestion_jobs_token_key'), type_='unique')
+        batch_op.drop_column('token')
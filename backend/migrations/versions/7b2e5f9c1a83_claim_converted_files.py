@@ -0,0 +1,61 @@
+"""Claim converted files before converting
+
+Revision ID: 7b2e5f9c1a83
+Revises: 4e8a1c7d2b56
+Create Date: 2026-10-19 14:37:20.184529
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2e5f9c1a83'
+down_revision = '4e8a1c7d2b56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('converted_files', schema=None) as batch_op:
+        batch_op.drop_constraint('converted_files_pkey', type_='primary')
+        batch_op.drop_index(batch_op.f('ix_converted_files_sha256'))
+
+    # A serial like every other table's id, numbering the rows already there
+    op.execute('ALTER TABLE converted_files ADD COLUMN id SERIAL NOT NULL')
+
+    with op.batch_alter_table('converted_files', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('patient_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('claimedAt', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+        batch_op.create_primary_key('converted_files_pkey', ['id'])
+        batch_op.alter_column('motion_file_id', existing_type=sa.Integer(), nullable=True)
+
+    # Existing rows are all finished conversions, keep the first of any the same patient got twice
+    op.execute('UPDATE converted_files SET patient_id = motion_files.patient_id '
+               'FROM motion_files WHERE motion_files.id = converted_files.motion_file_id')
+    op.execute('DELETE FROM converted_files WHERE patient_id IS NULL')
+    op.execute('DELETE FROM converted_files a USING converted_files b '
+               'WHERE a.patient_id = b.patient_id AND a.sha256 = b.sha256 AND a.motion_file_id > b.motion_file_id')
+
+    with op.batch_alter_table('converted_files', schema=None) as batch_op:
+        batch_op.alter_column('patient_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key(batch_op.f('converted_files_patient_id_fkey'), 'users', ['patient_id'], ['id'], ondelete='CASCADE')
+        batch_op.create_unique_constraint(batch_op.f('converted_files_patient_id_sha256_key'), ['patient_id', 'sha256'])
+        batch_op.create_unique_constraint(batch_op.f('converted_files_motion_file_id_key'), ['motion_file_id'])
+
+
+def downgrade():
+    # Claims still converting have no motion file to key on
+    op.execute('DELETE FROM converted_files WHERE motion_file_id IS NULL')
+
+    with op.batch_alter_table('converted_files', schema=None) as batch_op:
+        batch_op.drop_constraint(batch_op.f('converted_files_motion_file_id_key'), type_='unique')
+        batch_op.drop_constraint(batch_op.f('converted_files_patient_id_sha256_key'), type_='unique')
+        batch_op.drop_constraint(batch_op.f('converted_files_patient_id_fkey'), type_='foreignkey')
+        batch_op.drop_constraint('converted_files_pkey', type_='primary')
+        batch_op.drop_column('claimedAt')
+        batch_op.drop_column('patient_id')
+        batch_op.drop_column('id')
+        batch_op.alter_column('motion_file_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_primary_key('converted_files_pkey', ['motion_file_id'])
+        batch_op.create_index(batch_op.f('ix_converted_files_sha256'), ['sha256'], unique=False)
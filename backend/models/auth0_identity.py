@@ -0,0 +1,23 @@
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+from sqlalchemy.orm import relationship
+from models.base import Base
+from serializers import serialize
+
+# Maps an Auth0 'sub' to the user it belongs to
+# A user can have several, one for each authentication provider they sign in with
+class Auth0Identity(Base):
+  __tablename__ = 'auth0_identities'
+
+  sub: Mapped[str] = mapped_column(primary_key=True)
+  user_id: Mapped[int] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'), index=True)
+
+  user: Mapped['User'] = relationship(back_populates='auth0_identities')
+
+
+  def __repr__(self) -> str:
+    return f'Auth0Identity({self.dict()})'
+  
+  def dict(self):
+    return serialize(self)
@@ -1,3 +1,9 @@
 from sqlalchemy.orm import DeclarativeBase
+from serializers import register
+
 class Base(DeclarativeBase):
-  pass
\ No newline at end of file
+  def __init_subclass__(cls, **kwargs):
+    # Mapping happens in DeclarativeBase, after which the table is there to compile the model's serializer from
+    super().__init_subclass__(**kwargs)
+    if '__table__' in cls.__dict__:
+      register(cls)
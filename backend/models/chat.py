@@ -4,6 +4,7 @@ from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import relationship
 from typing import List
 from models.base import Base
+from serializers import serialize
 
 class Chat(Base):
   __tablename__ = 'chats'
@@ -19,4 +20,4 @@ class Chat(Base):
     return f'Chat({self.dict()})'
   
   def dict(self):
-    return {c.name: getattr(self, c.name) for c in self.__table__.columns}
\ No newline at end of file
+    return serialize(self)
\ No newline at end of file
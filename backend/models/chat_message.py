@@ -1,13 +1,16 @@
 from datetime import datetime
 from sqlalchemy.sql import func
-from sqlalchemy import ForeignKey, DateTime
+from sqlalchemy import ForeignKey, DateTime, Index
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import relationship
 from models.base import Base
+from serializers import serialize
 
 class ChatMessage(Base):
   __tablename__ = 'chat_messages'
+  # A chat's history in (timestamp, id) order, how it is listed and paginated
+  __table_args__ = (Index('ix_chat_messages_chat_id_timestamp', 'chat_id', 'timestamp', 'id'),)
 
   id: Mapped[int] = mapped_column(primary_key=True)
   sender: Mapped[int] = mapped_column(ForeignKey('users.id'))
@@ -22,4 +25,4 @@ class ChatMessage(Base):
     return f'ChatMessage({self.dict()})'
   
   def dict(self):
-    return {c.name: getattr(self, c.name) for c in self.__table__.columns}
\ No newline at end of file
+    return serialize(self)
\ No newline at end of file
@@ -0,0 +1,32 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from models.base import Base
+from serializers import serialize
+
+# SHA-256 of the .sto a motion file was converted from
+# Lets a repeated upload of the same recording reuse the glTF and readings already made for it
+# The row is claimed before converting, motion_file_id stays empty until the claiming job has saved the file,
+# so a retry arriving meanwhile waits for that job instead of converting the recording a second time
+class ConvertedFile(Base):
+  __tablename__ = 'converted_files'
+  __table_args__ = (UniqueConstraint('patient_id', 'sha256'),)
+
+  id: Mapped[int] = mapped_column(primary_key=True)
+  patient_id: Mapped[int] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'))
+  sha256: Mapped[str]
+  motion_file_id: Mapped[Optional[int]] = mapped_column(ForeignKey('motion_files.id', ondelete='CASCADE'), unique=True)
+  claimedAt: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+  motion_file: Mapped[Optional['Motion_File']] = relationship()
+
+
+  def __repr__(self) -> str:
+    return f'ConvertedFile({self.dict()})'
+  
+  def dict(self):
+    return serialize(self)
@@ -5,6 +5,7 @@ from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import relationship
 from typing import Optional
 from models.base import Base
+from serializers import serialize
 
 class Device(Base):
   __tablename__ = 'devices'
@@ -19,10 +20,5 @@ class Device(Base):
     return f'Device({self.dict()})'
   
   def dict(self):
-    device_dict = {c.name: getattr(self, c.name) for c in self.__table__.columns}
-    # Add patient information if assigned
-    if self.patient:
-      device_dict['patient_id'] = self.patient.id
-    else:
-      device_dict['patient_id'] = None
-    return device_dict
+    # patient_id is a column, reading the patient relationship here would cost a query per row in listings
+    return serialize(self)
@@ -0,0 +1,40 @@
+import uuid
+from sqlalchemy import Column, ForeignKey, DateTime, JSON
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from typing import Optional
+from models.base import Base
+from serializers import serialize
+
+# A device upload being turned into a motion file in the background
+# status goes queued -> running -> succeeded or failed, stage is the step it is on. A job whose recording
+# another job is converting goes from running to waiting and back to running when it is queued again
+class IngestionJob(Base):
+  __tablename__ = 'ingestion_jobs'
+
+  id: Mapped[int] = mapped_column(primary_key=True)
+  # What the uploader polls the job by, ids are sequential and would let anyone walk every upload
+  token: Mapped[str] = mapped_column(unique=True, default=lambda: uuid.uuid4().hex)
+  filename: Mapped[str]
+  device_id: Mapped[Optional[int]] = mapped_column(ForeignKey('devices.id', ondelete='SET NULL'))
+  status: Mapped[str] = mapped_column(default='queued')
+  stage: Mapped[Optional[str]]
+  error: Mapped[Optional[str]]
+  # SHA-256 of the downloaded .sto, kept so a waiting job can check on the other conversion without downloading again
+  sha256: Mapped[Optional[str]]
+  # Seconds spent in each stage, stages that overlap are timed separately
+  timings = Column(JSON)
+  motion_file_id: Mapped[Optional[int]] = mapped_column(ForeignKey('motion_files.id', ondelete='SET NULL'), index=True)
+  createdAt = Column(DateTime(timezone=True), server_default=func.now())
+  updatedAt = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+  motion_file: Mapped[Optional['Motion_File']] = relationship()
+
+
+  def __repr__(self) -> str:
+    return f'IngestionJob({self.dict()})'
+  
+  def dict(self):
+    return serialize(self)
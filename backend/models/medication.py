@@ -4,12 +4,13 @@ from sqlalchemy.orm import mapped_column
 from datetime import datetime
 from typing import Optional
 from models.base import Base
+from serializers import serialize
 
 class Medication(Base):
     __tablename__ = 'medications'
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    patient_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
+    patient_id: Mapped[int] = mapped_column(ForeignKey('users.id'), index=True)
     name: Mapped[str] = mapped_column(String(100))
     dosage: Mapped[str] = mapped_column(String(50))
     instructions: Mapped[str] = mapped_column(String(200))
@@ -22,8 +23,4 @@ class Medication(Base):
         return f'Medication({self.dict()})'
     
     def dict(self):
-        result = {c.name: getattr(self, c.name) for c in self.__table__.columns}
-        \
-        if self.last_taken:
-            result['last_taken'] = self.last_taken.isoformat()
-        return result
\ No newline at end of file
+        return serialize(self)
\ No newline at end of file
@@ -1,34 +1,35 @@
 from enum import unique
-from sqlalchemy import Column, ForeignKey, Integer, DateTime
+from sqlalchemy import Column, ForeignKey, Index, Integer, DateTime, JSON
 from sqlalchemy.orm import Mapped 
 from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from typing import Optional
+from typing import List, Optional
 from models.base import Base
+from serializers import serialize
 
 class Motion_File(Base):
   __tablename__ = 'motion_files'
+  # A patient's files by date, and everyone's for the paginated listing, both in (createdAt, id) order
+  __table_args__ = (Index('ix_motion_files_patient_id_createdAt', 'patient_id', 'createdAt', 'id'),
+                    Index('ix_motion_files_createdAt', 'createdAt', 'id'))
 
   id: Mapped[int] = mapped_column(primary_key=True)
   name: Mapped[str]
   url: Mapped[str] 
   type: Mapped[str]
+  # The same animation at lower sample rates, coarsest first, as [{'step', 'name', 'url'}], step 1 is this file
+  levels = Column(JSON)
   createdAt = Column(DateTime(timezone=True), server_default=func.now())
    
   patient_id = Column(Integer, ForeignKey('users.id'))
   patient = relationship("User", back_populates="motion_files")
-  motion_readings: Mapped['MotionReading'] = relationship(cascade='all, delete', back_populates='motion_file')
+  motion_readings: Mapped[List['MotionReading']] = relationship(cascade='all, delete', back_populates='motion_file')
   
   def __repr__(self) -> str:
     return f'Device({self.dict()})'
   
   def dict(self):
-    device_dict = {c.name: getattr(self, c.name) for c in self.__table__.columns}
-    # Add patient information if assigned
-    if self.patient:
-      device_dict['patient_id'] = self.patient.id
-    else:
-      device_dict['patient_id'] = None
-    return device_dict
+    # patient_id is a column, reading the patient relationship here would cost a query per row in listings
+    return serialize(self)
 
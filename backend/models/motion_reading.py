@@ -1,5 +1,7 @@
+from typing import Optional
 from models.base import Base
-from sqlalchemy import ForeignKey
+from serializers import serialize
+from sqlalchemy import Column, ForeignKey, JSON, insert
 from sqlalchemy.orm import Mapped, mapped_column, relationship 
 
 class MotionReading(Base):
@@ -7,11 +9,31 @@ class MotionReading(Base):
 
   id: Mapped[int] = mapped_column(primary_key=True)
   name: Mapped[str]
-  motion_file_id: Mapped[int] = mapped_column(ForeignKey('motion_files.id'))
+  motion_file_id: Mapped[int] = mapped_column(ForeignKey('motion_files.id'), index=True)
   min: Mapped[float]
   max: Mapped[float]
+  # Robust to the odd noisy sample, unlike min and max. Empty for readings saved before they were computed
+  mean: Mapped[Optional[float]]
+  stdev: Mapped[Optional[float]]
+  p5: Mapped[Optional[float]]
+  p50: Mapped[Optional[float]]
+  p95: Mapped[Optional[float]]
+  # {'start': degrees, 'width': degrees, 'counts': [...]} with the bins side by side from start
+  histogram = Column(JSON)
 
   motion_file: Mapped['Motion_File'] = relationship(back_populates='motion_readings')
 
   def dict(self):
-    return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+    return serialize(self)
+
+def insert_motion_readings(session, motion_file_id, readings):
+  """Saves {name: {min, max, ...}} for a motion file in one multi-row INSERT ... RETURNING
+
+  Returns the new MotionReadings in the order of readings. Anything that
+  writes readings in bulk, like ingestion or a backfill, should go through
+  here rather than adding and flushing them one at a time.
+  """
+  if not readings:
+    return []
+  rows = [{'name': name, 'motion_file_id': motion_file_id, **statistics} for name, statistics in readings.items()]
+  return list(session.scalars(insert(MotionReading).returning(MotionReading, sort_by_parameter_order=True), rows))
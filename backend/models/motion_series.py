@@ -0,0 +1,46 @@
+import numpy as np
+from sqlalchemy import ForeignKey, JSON, LargeBinary
+from sqlalchemy.orm import Mapped
+from sqlalchemy.orm import mapped_column
+from sqlalchemy.orm import relationship
+from models.base import Base
+
+# The joint angles of a motion file, so charts don't need the original .sto
+# data is little-endian float32 stored a column at a time: time first, then each joint in the order of joints
+class MotionSeries(Base):
+  __tablename__ = 'motion_series'
+
+  motion_file_id: Mapped[int] = mapped_column(ForeignKey('motion_files.id', ondelete='CASCADE'), primary_key=True)
+  joints = mapped_column(JSON, nullable=False)
+  # Samples per second, worked out from the time column
+  sample_rate: Mapped[float]
+  frames: Mapped[int]
+  data = mapped_column(LargeBinary, nullable=False)
+
+  motion_file: Mapped['Motion_File'] = relationship()
+
+  @classmethod
+  def from_table(cls, labels, values, **kwargs):
+    """Builds a series from an .sto table with a time column, angles in degrees"""
+    times = values[:, labels.index('time')]
+    joints = [label for label in labels if label != 'time']
+    columns = np.asarray(values[:, [labels.index('time')] + [labels.index(joint) for joint in joints]], dtype='<f4')
+    sample_rate = 1 / float(np.median(np.diff(times))) if len(times) > 1 else 0.0
+    # Transposed so each column is one contiguous run of bytes
+    return cls(joints=joints, sample_rate=sample_rate, frames=len(times), data=columns.T.tobytes(), **kwargs)
+
+  def columns(self, joints=None, start=None, end=None):
+    """Returns (times, {joint: values}) for the joints asked for, between start and end seconds"""
+    data = np.frombuffer(self.data, dtype='<f4').reshape(len(self.joints) + 1, self.frames)
+    times = data[0]
+    first = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+    last = self.frames if end is None else int(np.searchsorted(times, end, side='right'))
+    joints = self.joints if joints is None else joints
+    return times[first:last], {joint: data[self.joints.index(joint) + 1, first:last] for joint in joints}
+
+  def __repr__(self) -> str:
+    return f'MotionSeries({self.dict()})'
+
+  def dict(self):
+    return {'motion_file_id': self.motion_file_id, 'joints': self.joints, 'sample_rate': self.sample_rate,
+            'frames': self.frames, 'bytes': len(self.data)}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, DateTime, Enum
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, DateTime, Enum
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import relationship
@@ -6,6 +6,7 @@ from sqlalchemy.sql import func
 from typing import Optional
 import enum
 from models.base import Base
+from serializers import serialize
 
 class DocumentType(enum.Enum):
     MEDICAL_HISTORY = "medical_history"
@@ -14,6 +15,8 @@ class DocumentType(enum.Enum):
 
 class PatientDocument(Base):
     __tablename__ = 'patient_documents'
+    # A patient's documents by date, the type filter uses the patient_id prefix
+    __table_args__ = (Index('ix_patient_documents_patient_id_createdAt', 'patient_id', 'createdAt', 'id'),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str]
@@ -29,8 +32,4 @@ class PatientDocument(Base):
         return f'PatientDocument({self.dict()})'
 
     def dict(self):
-        document_dict = {c.name: getattr(self, c.name) for c in self.__table__.columns}
-        # Convert Enum to string for JSON serialization
-        if 'type' in document_dict and isinstance(document_dict['type'], DocumentType):
-            document_dict['type'] = document_dict['type'].value
-        return document_dict
\ No newline at end of file
+        return serialize(self)
\ No newline at end of file
@@ -2,6 +2,7 @@ from sqlalchemy import ForeignKey
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
 from models.base import Base
+from serializers import serialize
 
 # Defines the patient-physician relationship
 # Patients can only have one physician
@@ -17,4 +18,4 @@ class PatientPhysician(Base):
     return f'PatientPhysician({self.dict()})'
   
   def dict(self):
-    return {c.name: getattr(self, c.name) for c in self.__table__.columns}
\ No newline at end of file
+    return serialize(self)
\ No newline at end of file
@@ -1,8 +1,10 @@
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
 from sqlalchemy.orm import relationship
+from sqlalchemy.orm import selectinload
 from typing import List
 from models.base import Base
+from serializers import serialize
 
 class User(Base):
   __tablename__ = 'users'
@@ -44,22 +46,21 @@ class User(Base):
 
   medications = relationship("Medication", back_populates="patient", cascade="all, delete-orphan")
 
+  auth0_identities: Mapped[List['Auth0Identity']] = relationship(back_populates='user', cascade='all, delete-orphan', passive_deletes=True)
+
 
 
   def __repr__(self) -> str:
     return f'User({self.dict()})'
   
+  @classmethod
+  def dict_options(cls):
+    # What dict() reads besides the row, pass to select(User).options() so a listing loads each relation in one query for every user
+    return (selectinload(cls.physician), selectinload(cls.patients))
+
   def dict(self):
-    user_dict = {c.name: getattr(self, c.name) for c in self.__table__.columns}
+    user_dict = serialize(self)
     # To prevent recursively calling the dict function forever
-    if self.physician:
-      physician_dict = {c.name: getattr(self.physician, c.name) for c in self.physician.__table__.columns}
-    else:
-      physician_dict = {}
-    user_dict['physician'] = physician_dict
-    if self.patients:
-      patient_dicts = [{c.name: getattr(patient, c.name) for c in patient.__table__.columns} for patient in self.patients]
-    else:
-      patient_dicts = []
-    user_dict['patients'] = patient_dicts
+    user_dict['physician'] = serialize(self.physician) if self.physician else {}
+    user_dict['patients'] = [serialize(patient) for patient in self.patients]
     return user_dict
\ No newline at end of file
@@ -0,0 +1,54 @@
+import base64
+import json
+import os
+from datetime import datetime
+from flask import request
+from sqlalchemy import tuple_
+
+# Listings are always cut into pages, ?limit= picks a smaller or larger one up to MAX_PAGE_SIZE
+PAGE_SIZE = int(os.environ.get('PAGE_SIZE', 50))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 200))
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+class PaginationError(ValueError):
+  pass
+
+def encode_cursor(created, id):
+  return base64.urlsafe_b64encode(json.dumps([created.isoformat(), id]).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+  try:
+    created, id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    return datetime.fromisoformat(created), int(id)
+  except (ValueError, TypeError):
+    raise PaginationError('Invalid cursor')
+
+def page_size():
+  try:
+    limit = int(request.args.get('limit', PAGE_SIZE))
+  except ValueError:
+    raise PaginationError('limit must be an integer')
+  if limit < 1:
+    raise PaginationError('limit must be at least 1')
+  return min(limit, MAX_PAGE_SIZE)
+
+def paginate(session, select, created, id):
+  """One page of select, newest first, walking (created, id) down from the request's cursor
+
+  Returns the rows and the cursor of the page after it, None on the last page. The keyset
+  comparison lets the database start reading at the cursor instead of counting past an offset,
+  so every page costs the same however deep into the history it is.
+  """
+  limit = page_size()
+  if 'cursor' in request.args:
+    select = select.where(tuple_(created, id) < decode_cursor(request.args['cursor']))
+  rows = session.execute(select.order_by(created.desc(), id.desc()).limit(limit + 1)).scalars().all()
+  if len(rows) <= limit:
+    return rows, None
+  last = rows[limit - 1]
+  return rows[:limit], encode_cursor(getattr(last, created.key), last.id)
+
+def page_response(response, next_cursor):
+  if next_cursor:
+    response.headers[NEXT_CURSOR_HEADER] = next_cursor
+  return response
@@ -0,0 +1,148 @@
+import logging
+import os
+import queue
+import threading
+import time
+from dotenv import load_dotenv
+from extensions import db
+from models.user import User
+from auth0 import auth0_client
+
+load_dotenv()
+
+# How long the worker waits for more assignments before sending a batch
+ROLE_SYNC_BATCH_WINDOW = float(os.environ.get('ROLE_SYNC_BATCH_WINDOW', 0.5))
+ROLE_SYNC_MAX_BATCH = int(os.environ.get('ROLE_SYNC_MAX_BATCH', 100))
+ROLE_SYNC_MAX_RETRIES = int(os.environ.get('ROLE_SYNC_MAX_RETRIES', 5))
+
+logger = logging.getLogger(__name__)
+
+class RoleSyncJob:
+  def __init__(self, role_ids, user_id=None, auth0_ids=None, email=None):
+    self.role_ids = [role_id for role_id in role_ids if role_id]
+    # Database user whose pending flag is cleared once the roles are assigned
+    self.user_id = user_id
+    # Auth0 user ids, looked up from the email when not known yet
+    self.auth0_ids = auth0_ids
+    self.email = email
+    self.attempts = 0
+    self.not_before = 0.0
+
+class RoleSyncWorker:
+  """Assigns Auth0 roles on a background thread instead of during the request
+
+  Jobs that arrive within the batch window are grouped by role, so every role
+  gets a single call listing all of its users. Failed jobs are retried with
+  exponential backoff. When a job finishes, its user's pending flag is cleared.
+  """
+  def __init__(self, client=auth0_client, batch_window=ROLE_SYNC_BATCH_WINDOW, max_batch=ROLE_SYNC_MAX_BATCH, max_retries=ROLE_SYNC_MAX_RETRIES):
+    self.client = client
+    self.batch_window = batch_window
+    self.max_batch = max_batch
+    self.max_retries = max_retries
+    self._app = None
+    self._queue = queue.Queue()
+    self._thread = None
+    self._lock = threading.Lock()
+
+  def init_app(self, app):
+    self._app = app
+
+  def enqueue(self, role_ids, user_id=None, auth0_ids=None, email=None):
+    job = RoleSyncJob(role_ids, user_id=user_id, auth0_ids=auth0_ids, email=email)
+    if not job.role_ids:
+      return
+    self._start()
+    self._queue.put(job)
+
+  def flush(self):
+    """Blocks until every queued job has been attempted at least once"""
+    self._queue.join()
+
+  def _start(self):
+    with self._lock:
+      if self._thread is None or not self._thread.is_alive():
+        self._thread = threading.Thread(target=self._run, name='role-sync', daemon=True)
+        self._thread.start()
+
+  def _run(self):
+    retries = []
+    while True:
+      now = time.monotonic()
+      timeout = max(min(job.not_before for job in retries) - now, 0) if retries else None
+      received = []
+      try:
+        received.append(self._queue.get(timeout=timeout))
+        # Coalesce whatever else arrives within the batch window
+        deadline = time.monotonic() + self.batch_window
+        while len(received) < self.max_batch:
+          remaining = deadline - time.monotonic()
+          if remaining <= 0:
+            break
+          received.append(self._queue.get(timeout=remaining))
+      except queue.Empty:
+        pass
+      now = time.monotonic()
+      due = [job for job in retries if job.not_before <= now]
+      retries = [job for job in retries if job.not_before > now]
+      batch = received + due
+      try:
+        try:
+          failed = self._process(batch)
+        except Exception:
+          logger.exception('Auth0 role sync failed')
+          failed = batch
+        for job in failed:
+          job.attempts += 1
+          if job.attempts > self.max_retries:
+            logger.error('Giving up on Auth0 role sync for user %s', job.user_id or job.email)
+            continue
+          job.not_before = time.monotonic() + min(2 ** job.attempts, 60)
+          retries.append(job)
+      finally:
+        for _ in received:
+          self._queue.task_done()
+
+  def _process(self, jobs):
+    """Syncs a batch of jobs and returns the ones that need to be retried"""
+    failed = []
+    ready = []
+    for job in jobs:
+      if job.auth0_ids is None:
+        try:
+          job.auth0_ids = [user['user_id'] for user in self.client.get_users_by_email(job.email)]
+        except Exception:
+          logger.exception('Auth0 user lookup failed for %s', job.email)
+          failed.append(job)
+          continue
+      # The user hasn't signed up with Auth0 yet, on_connect assigns their roles later
+      if job.auth0_ids:
+        ready.append(job)
+
+    assignments = {}
+    for job in ready:
+      for role_id in job.role_ids:
+        assignments.setdefault(role_id, set()).update(job.auth0_ids)
+    failed_roles = set()
+    for role_id, error in self.client.assign_role_batches(assignments, self.max_batch).items():
+      logger.error('Auth0 role assignment failed for role %s: %s', role_id, error)
+      failed_roles.add(role_id)
+
+    synced_users = []
+    for job in ready:
+      job_failed_roles = [role_id for role_id in job.role_ids if role_id in failed_roles]
+      if job_failed_roles:
+        job.role_ids = job_failed_roles
+        failed.append(job)
+      elif job.user_id is not None:
+        synced_users.append(job.user_id)
+    if synced_users:
+      self._clear_pending(synced_users)
+    return failed
+
+  def _clear_pending(self, user_ids):
+    with self._app.app_context():
+      db.session.execute(db.update(User).where(User.id.in_(user_ids)).values(pending=False))
+      db.session.commit()
+
+role_sync = RoleSyncWorker()
@@ -0,0 +1,296 @@
+import codecs
+import math
+import numpy as np
+
+# Give up on files that never get to their column labels
+MAX_HEADER_LINES = 1000
+# How much of a file is parsed at a time when reading it from disk
+READ_CHUNK_SIZE = 1 << 20
+# Degrees covered by the stored histogram of each joint, angles outside land in the end bins
+HISTOGRAM_RANGE = (-180, 180)
+HISTOGRAM_BIN_WIDTH = 10
+# Width in degrees of the finer bins percentiles are read from, which bounds their error
+PERCENTILE_RESOLUTION = 0.25
+PERCENTILES = (5, 50, 95)
+
+class StoHeader:
+  """Reads the header of a .sto file one line at a time
+
+  The header is 'key=value' lines and a title ending at 'endheader', followed
+  by the column labels. Files without 'endheader' are accepted as well, their
+  labels are the last line before the first row of numbers.
+  """
+  def __init__(self):
+    self.metadata = {}
+    self.labels = None
+    self._ended = False
+    self._previous = None
+    self._lines = 0
+
+  @property
+  def in_degrees(self):
+    return self.metadata.get('inDegrees', 'no').lower() == 'yes'
+
+  def feed(self, line):
+    """Returns False once line is data rather than header, labels are set by then"""
+    if self.labels is not None:
+      return False
+    self._lines += 1
+    if self._lines > MAX_HEADER_LINES:
+      raise ValueError(f'no column labels in the first {MAX_HEADER_LINES} lines')
+    stripped = line.strip()
+    if not stripped:
+      return True
+    if self._ended:
+      self.labels = stripped.split()
+    elif stripped.lower() == 'endheader':
+      self._ended = True
+    elif _is_numeric(stripped):
+      if self._previous is None:
+        raise ValueError('data starts before the column labels')
+      self.labels = self._previous.split()
+      return False
+    else:
+      key, sep, value = stripped.partition('=')
+      if sep:
+        self.metadata[key.strip()] = value.strip()
+      self._previous = stripped
+    return True
+
+class StoReader:
+  """Parses .sto text handed over in arbitrary pieces, a batch of rows at a time
+
+  Only the current piece and the last partial line are held on to, subclasses
+  decide what to keep of each batch of rows in _fold().
+  """
+  def __init__(self):
+    self.header = StoHeader()
+    self.rows = 0
+    self._partial = ''
+
+  def feed(self, text):
+    lines = (self._partial + text).split('\n')
+    # The last piece may be a row cut off by the chunk boundary
+    self._partial = lines.pop()
+    self._feed_lines(lines)
+
+  def close(self):
+    if self._partial:
+      self._feed_lines([self._partial])
+      self._partial = ''
+    return self.result()
+
+  def result(self):
+    raise NotImplementedError
+
+  def _fold(self, values):
+    raise NotImplementedError
+
+  def _feed_lines(self, lines):
+    start = 0
+    while start < len(lines) and self.header.feed(lines[start]):
+      start += 1
+    rows = [line for line in lines[start:] if line.strip()]
+    if not rows:
+      return
+    self._fold(_parse_rows(rows, len(self.header.labels)))
+    self.rows += len(rows)
+
+class RangeOfMotion(StoReader):
+  """Folds .sto text into per-joint statistics in degrees as it arrives
+
+  The pelvis translations stay in metres, column_unit gives each column's unit.
+
+  Only running totals per column are kept, so memory doesn't grow with the
+  length of the recording: min and max, mean and variance merged batch by
+  batch, and a fine histogram that percentiles are read from to within
+  PERCENTILE_RESOLUTION. Like file_upload always did, exact zeros are
+  ignored, columns with nothing but zeros are left out and the time column
+  is skipped.
+  """
+  def __init__(self):
+    super().__init__()
+    self._minimums = None
+    self._maximums = None
+    self._counts = None
+    self._means = None
+    self._squares = None
+    self._histograms = None
+
+  def result(self):
+    """Returns {label: (min, max)}"""
+    return {label: (statistics['min'], statistics['max']) for label, statistics in self.statistics().items()}
+
+  def statistics(self):
+    """Returns {label: {min, max, mean, stdev, p5, p50, p95, histogram}}"""
+    if self._minimums is None:
+      return {}
+    bins_per_bar = round(HISTOGRAM_BIN_WIDTH / PERCENTILE_RESOLUTION)
+    statistics = {}
+    for i, label in enumerate(self.header.labels):
+      if label == 'time' or not np.isfinite(self._minimums[i]):
+        continue
+      count = int(self._counts[i])
+      minimum, maximum = float(self._minimums[i]), float(self._maximums[i])
+      statistics[label] = {
+        'min': minimum,
+        'max': maximum,
+        'mean': float(self._means[i]),
+        # Sample standard deviation, a single reading has none
+        'stdev': math.sqrt(self._squares[i] / (count - 1)) if count > 1 else 0.0,
+        **{f'p{percentile}': min(max(_percentile(self._histograms[i], count, percentile), minimum), maximum)
+           for percentile in PERCENTILES},
+        'histogram': {'start': HISTOGRAM_RANGE[0], 'width': HISTOGRAM_BIN_WIDTH,
+                      'counts': self._histograms[i].reshape(-1, bins_per_bar).sum(axis=1).tolist()}
+      }
+    return statistics
+
+  def _fold(self, values):
+    if not self.header.in_degrees:
+      # A copy, the series reading the same batch converts it itself
+      values = values.copy()
+      angles = _angles(self.header.labels)
+      values[:, angles] = np.degrees(values[:, angles])
+    moved = (values != 0) & ~np.isnan(values)
+    minimums = np.where(moved, values, np.inf).min(axis=0)
+    maximums = np.where(moved, values, -np.inf).max(axis=0)
+    counts = moved.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+      means = np.where(moved, values, 0).sum(axis=0) / counts
+    squares = np.where(moved, values - means, 0) ** 2
+    squares = squares.sum(axis=0)
+    histograms = _histograms(values, moved)
+    if self._minimums is None:
+      self._minimums, self._maximums, self._histograms = minimums, maximums, histograms
+      self._counts, self._means, self._squares = counts, np.nan_to_num(means), squares
+      return
+    np.minimum(self._minimums, minimums, out=self._minimums)
+    np.maximum(self._maximums, maximums, out=self._maximums)
+    self._histograms += histograms
+    # Chan et al.'s parallel update, merging this batch's mean and squared deviations into the totals
+    total = self._counts + counts
+    with np.errstate(invalid='ignore', divide='ignore'):
+      delta = np.nan_to_num(means) - self._means
+      weight = np.where(total > 0, counts / total, 0)
+      self._means += delta * weight
+      self._squares += squares + delta ** 2 * self._counts * weight
+    self._counts = total
+
+class StoTable(StoReader):
+  """Collects every row of a .sto file into one array
+
+  Angles come out in radians, or degrees if degrees is set, whatever the file
+  used. The pelvis translations stay in metres and time in seconds.
+  """
+  def __init__(self, degrees=False, dtype=np.float64):
+    super().__init__()
+    self.degrees = degrees
+    self.dtype = dtype
+    self._batches = []
+
+  def result(self):
+    """Returns (labels, values) with one column of values per label"""
+    width = len(self.header.labels) if self.header.labels else 0
+    values = np.concatenate(self._batches) if self._batches else np.empty((0, width), dtype=self.dtype)
+    return self.header.labels or [], values
+
+  def _fold(self, values):
+    if self.header.in_degrees != self.degrees:
+      # Only the rotational coordinates change unit, translations stay in metres
+      angles = _angles(self.header.labels)
+      values[:, angles] = np.degrees(values[:, angles]) if self.degrees else np.radians(values[:, angles])
+    self._batches.append(values.astype(self.dtype, copy=False))
+
+class RangeOfMotionAndSeries(StoReader):
+  """RangeOfMotion and a float32 StoTable in degrees filled from one parse of the file"""
+  def __init__(self):
+    super().__init__()
+    self.range_of_motion = RangeOfMotion()
+    self.series = StoTable(degrees=True, dtype=np.float32)
+    self.range_of_motion.header = self.series.header = self.header
+
+  def result(self):
+    """Returns (statistics, (labels, values)), statistics as RangeOfMotion.statistics() gives them"""
+    return self.range_of_motion.statistics(), self.series.result()
+
+  def _fold(self, values):
+    # The table converts values in place, so the range of motion goes first
+    self.range_of_motion._fold(values)
+    self.series._fold(values)
+
+def range_of_motion(file_data):
+  """Returns {label: (min, max)} in degrees for every joint column of a whole .sto file"""
+  reader = RangeOfMotion()
+  reader.feed(file_data)
+  return reader.close()
+
+def read_range_of_motion(file, chunk_size=READ_CHUNK_SIZE):
+  """Same as range_of_motion for a binary file object, read a chunk at a time"""
+  return _read(RangeOfMotion(), file, chunk_size)
+
+def read_table(file, chunk_size=READ_CHUNK_SIZE):
+  """Returns (labels, values) for a binary .sto file object, angles in radians"""
+  return _read(StoTable(), file, chunk_size)
+
+def read_range_of_motion_and_series(file, chunk_size=READ_CHUNK_SIZE):
+  """Returns (statistics, (labels, values)) for a binary .sto file object, angles in degrees"""
+  return _read(RangeOfMotionAndSeries(), file, chunk_size)
+
+def _read(reader, file, chunk_size):
+  decoder = codecs.getincrementaldecoder('utf-8')()
+  while chunk := file.read(chunk_size):
+    reader.feed(decoder.decode(chunk))
+  reader.feed(decoder.decode(b'', final=True))
+  return reader.close()
+
+def _histograms(values, moved):
+  # One row of PERCENTILE_RESOLUTION wide bins per column, counted in a single bincount
+  bins = round((HISTOGRAM_RANGE[1] - HISTOGRAM_RANGE[0]) / PERCENTILE_RESOLUTION)
+  with np.errstate(invalid='ignore'):
+    index = np.clip(np.floor((values - HISTOGRAM_RANGE[0]) / PERCENTILE_RESOLUTION), 0, bins - 1)
+  index = np.where(moved, index, 0).astype(np.int64) + np.arange(values.shape[1]) * bins
+  return np.bincount(index[moved], minlength=values.shape[1] * bins).reshape(values.shape[1], bins)
+
+def _percentile(histogram, count, percentile):
+  # Interpolates inside the bin the percentile falls in
+  target = percentile / 100 * count
+  cumulative = np.cumsum(histogram)
+  i = min(int(np.searchsorted(cumulative, target, side='left')), len(histogram) - 1)
+  before = cumulative[i - 1] if i > 0 else 0
+  fraction = (target - before) / histogram[i] if histogram[i] else 0.5
+  return float(HISTOGRAM_RANGE[0] + (i + fraction) * PERCENTILE_RESOLUTION)
+
+def column_unit(label):
+  """Unit of a joint column read with degrees set, the pelvis translations are in metres"""
+  return 'metres' if _is_translation(label) else 'degrees'
+
+def _angles(labels):
+  # Indices of the columns column_unit puts in degrees, time aside
+  return [i for i, label in enumerate(labels) if label != 'time' and column_unit(label) == 'degrees']
+
+def _is_translation(label):
+  # OpenSim names the pelvis position pelvis_tx, pelvis_ty and pelvis_tz
+  return label.endswith(('_tx', '_ty', '_tz'))
+
+def _is_numeric(line):
+  try:
+    float(line.split()[0])
+  except ValueError:
+    return False
+  return True
+
+def _parse_rows(rows, width):
+  try:
+    values = np.loadtxt(rows, dtype=np.float64, ndmin=2)
+  except ValueError:
+    values = None
+  if values is not None and values.shape[1] == width:
+    return values
+  # Rows shorter than the labels are padded with NaN so they don't count towards any column
+  values = np.full((len(rows), width), np.nan)
+  for i, row in enumerate(rows):
+    cells = row.split()
+    if len(cells) > width:
+      raise ValueError(f'row has {len(cells)} values but there are only {width} labels')
+    values[i, :len(cells)] = np.array(cells, dtype=np.float64)
+  return values
@@ -0,0 +1,119 @@
+"""Local stand-in for the parts of the Auth0 Management API the backend uses
+
+Run it directly to point a dev backend at it, or call start_auth0_stub() from a
+test or benchmark. Latency per request and per new connection can be added to
+mimic a real tenant (the connection cost stands in for the TCP+TLS handshake).
+
+  python stubs/auth0_server.py --port 8081 --latency 50 --handshake-latency 100
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs, unquote
+
+class Auth0StubState:
+  def __init__(self, latency=0.0, handshake_latency=0.0):
+    self.latency = latency
+    self.handshake_latency = handshake_latency
+    # user_id -> user profile
+    self.users = {}
+    # role_id -> set of user_ids
+    self.roles = {}
+    self.connections = 0
+    self.requests = 0
+    self.lock = threading.Lock()
+
+  def add_user(self, user_id, email, **profile):
+    with self.lock:
+      self.users[user_id] = {'user_id': user_id, 'email': email, **profile}
+
+class Auth0StubHandler(BaseHTTPRequestHandler):
+  protocol_version = 'HTTP/1.1'
+  disable_nagle_algorithm = True
+
+  def setup(self):
+    super().setup()
+    state = self.server.state
+    with state.lock:
+      state.connections += 1
+    time.sleep(state.handshake_latency)
+
+  def log_message(self, format, *args):
+    pass
+
+  def do_GET(self):
+    url = urlparse(self.path)
+    state = self._begin()
+    with state.lock:
+      if url.path == '/api/v2/users-by-email':
+        email = parse_qs(url.query).get('email', [''])[0]
+        return self._send(200, [user for user in state.users.values() if user['email'] == email])
+      if url.path.startswith('/api/v2/users/'):
+        user = state.users.get(unquote(url.path)[len('/api/v2/users/'):])
+        if user:
+          return self._send(200, user)
+        return self._send(404, {'error': 'Not Found'})
+      self._send(404, {'error': 'Not Found'})
+
+  def do_POST(self):
+    url = urlparse(self.path)
+    body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+    state = self._begin()
+    with state.lock:
+      if url.path == '/oauth/token':
+        return self._send(200, {'access_token': 'stub-management-token', 'expires_in': 86400, 'token_type': 'Bearer'})
+      if url.path.startswith('/api/v2/roles/') and url.path.endswith('/users'):
+        role_id = unquote(url.path)[len('/api/v2/roles/'):-len('/users')]
+        users = json.loads(body or b'{}').get('users', [])
+        state.roles.setdefault(role_id, set()).update(users)
+        return self._send(200, {})
+      self._send(404, {'error': 'Not Found'})
+
+  def do_DELETE(self):
+    url = urlparse(self.path)
+    state = self._begin()
+    with state.lock:
+      if url.path.startswith('/api/v2/users/'):
+        if state.users.pop(unquote(url.path)[len('/api/v2/users/'):], None):
+          return self._send(204, None)
+        return self._send(404, {'error': 'Not Found'})
+      self._send(404, {'error': 'Not Found'})
+
+  def _begin(self):
+    state = self.server.state
+    time.sleep(state.latency)
+    with state.lock:
+      state.requests += 1
+    return state
+
+  def _send(self, status, data):
+    body = b'' if data is None else json.dumps(data).encode()
+    self.send_response(status)
+    self.send_header('Content-Type', 'application/json')
+    self.send_header('Content-Length', str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+def start_auth0_stub(port=0, latency=0.0, handshake_latency=0.0):
+  """Starts the stub on a daemon thread and returns (server, base_url)"""
+  server = ThreadingHTTPServer(('127.0.0.1', port), Auth0StubHandler)
+  server.daemon_threads = True
+  server.state = Auth0StubState(latency=latency, handshake_latency=handshake_latency)
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  return server, f'http://127.0.0.1:{server.server_port}'
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--port', type=int, default=8081)
+  parser.add_argument('--latency', type=float, default=0, help='milliseconds added to every request')
+  parser.add_argument('--handshake-latency', type=float, default=0, help='milliseconds added to every new connection')
+  args = parser.parse_args()
+  server, base_url = start_auth0_stub(args.port, args.latency / 1000, args.handshake_latency / 1000)
+  print(f'Auth0 stub listening on {base_url}')
+  try:
+    while True:
+      time.sleep(3600)
+  except KeyboardInterrupt:
+    server.shutdown()
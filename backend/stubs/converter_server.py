@@ -0,0 +1,89 @@
+"""Local stand-in for the .sto -> glTF conversion service on port 5050
+
+Run it directly to point a dev backend at it, or call start_converter_stub()
+from a test or benchmark. It answers POST /convert with a small glTF after an
+optional delay and keeps count of requests and concurrency, so balancing and
+failover can be exercised on one machine.
+
+  python stubs/converter_server.py --port 5050 --latency 500 --capacity 4
+"""
+import argparse
+import json
+import threading
+import time
+from flask import Flask, jsonify, request
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+class ConverterStubState:
+  def __init__(self, latency=0.0, capacity=None):
+    self.latency = latency
+    # Conversions worked on at once, like the CPU cores of a real converter, the rest queue up
+    self.slots = threading.BoundedSemaphore(capacity) if capacity else None
+    # Answer every request with a 503, like an overloaded or broken converter
+    self.failing = False
+    self.requests = 0
+    self.outstanding = 0
+    self.peak_outstanding = 0
+    self.lock = threading.Lock()
+
+def create_converter_stub(state):
+  app = Flask(__name__)
+
+  @app.route('/health', methods=['GET'])
+  def health():
+    if state.failing:
+      return jsonify({'status': 'failing'}), 503
+    return jsonify({'status': 'ok'})
+
+  @app.route('/convert', methods=['POST'])
+  def convert():
+    with state.lock:
+      state.requests += 1
+      state.outstanding += 1
+      state.peak_outstanding = max(state.peak_outstanding, state.outstanding)
+    try:
+      uploaded = request.files.get('file')
+      if uploaded is None:
+        return jsonify({'error': 'No file'}), 400
+      data = uploaded.read()
+      if state.slots:
+        with state.slots:
+          time.sleep(state.latency)
+      else:
+        time.sleep(state.latency)
+      if state.failing:
+        return jsonify({'error': 'Converter unavailable'}), 503
+      gltf = {'asset': {'version': '2.0', 'generator': 'converter stub'},
+              'extras': {'filename': uploaded.filename, 'bytes': len(data)}}
+      return app.response_class(json.dumps(gltf), mimetype='model/gltf+json')
+    finally:
+      with state.lock:
+        state.outstanding -= 1
+
+  return app
+
+class QuietRequestHandler(WSGIRequestHandler):
+  def log_request(self, *args, **kwargs):
+    pass
+
+def start_converter_stub(port=0, latency=0.0, capacity=None):
+  """Starts the stub on a daemon thread and returns (server, base_url)"""
+  state = ConverterStubState(latency=latency, capacity=capacity)
+  server = make_server('127.0.0.1', port, create_converter_stub(state), threaded=True, request_handler=QuietRequestHandler)
+  server.state = state
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  return server, f'http://127.0.0.1:{server.server_port}'
+
+if __name__ == '__main__':
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument('--port', type=int, default=5050)
+  parser.add_argument('--latency', type=float, default=0, help='milliseconds spent on every conversion')
+  parser.add_argument('--capacity', type=int, default=None, help='conversions worked on at once')
+  args = parser.parse_args()
+  server, base_url = start_converter_stub(args.port, args.latency / 1000, args.capacity)
+  print(f'Converter stub listening on {base_url}')
+  try:
+    while True:
+      time.sleep(3600)
+  except KeyboardInterrupt:
+    server.shutdown()
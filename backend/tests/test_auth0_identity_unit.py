@@ -0,0 +1,20 @@
+from extensions import db
+from models.user import User
+from models.auth0_identity import Auth0Identity
+
+def test_auth0_identity_create(populate_database,app):
+  with app.app_context():
+    db.session.add(Auth0Identity(sub='google-oauth2|1',user_id=3))
+    db.session.commit()
+    user = db.session.scalars(db.select(User).join(Auth0Identity).filter(Auth0Identity.sub=='google-oauth2|1')).first()
+    assert user.id == 3
+    assert [identity.sub for identity in user.auth0_identities] == ['google-oauth2|1']
+
+def test_auth0_identity_deleted_with_user(populate_database,app):
+  with app.app_context():
+    user = db.session.get(User, 3)
+    user.auth0_identities.append(Auth0Identity(sub='auth0|1'))
+    db.session.commit()
+    db.session.delete(user)
+    db.session.commit()
+    assert db.session.get(Auth0Identity, 'auth0|1') == None
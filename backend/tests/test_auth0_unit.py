@@ -0,0 +1,86 @@
+import time
+from unittest.mock import patch, MagicMock
+from auth0 import ManagementTokenManager, Auth0Client
+from stubs.auth0_server import start_auth0_stub
+
+def token_response(token, status_code=200, expires_in=86400, headers={}):
+  response = MagicMock()
+  response.status_code = status_code
+  response.headers = headers
+  response.json.return_value = {'access_token': token, 'expires_in': expires_in}
+  return response
+
+@patch('auth0.AUTH0_DOMAIN', 'test.auth0.com')
+@patch('auth0.requests.post')
+def test_management_token_is_cached(mock_post):
+  mock_post.return_value = token_response('token')
+  manager = ManagementTokenManager()
+  assert manager.get_token() == 'token'
+  assert manager.get_token() == 'token'
+  assert mock_post.call_count == 1
+
+@patch('auth0.AUTH0_DOMAIN', 'test.auth0.com')
+@patch('auth0.time.sleep')
+@patch('auth0.requests.post')
+def test_management_token_backs_off_on_429(mock_post, mock_sleep):
+  mock_post.side_effect = [token_response(None, status_code=429, headers={'Retry-After': '2'}), token_response('token')]
+  manager = ManagementTokenManager()
+  assert manager.get_token() == 'token'
+  mock_sleep.assert_called_once_with(2.0)
+
+class SlowSession:
+  """Token grants after the first take delay seconds, like Auth0 under load or a 429 backoff"""
+  def __init__(self, delay):
+    self.delay = delay
+    self.calls = 0
+
+  def post(self, url, data=None, timeout=None):
+    self.calls += 1
+    if self.calls == 1:
+      return token_response('old', expires_in=100)
+    time.sleep(self.delay)
+    return token_response('new')
+
+@patch('auth0.AUTH0_DOMAIN', 'test.auth0.com')
+def test_management_token_refreshes_in_background():
+  session = SlowSession(delay=1)
+  manager = ManagementTokenManager(refresh_margin=200, session=session)
+  assert manager.get_token() == 'old'
+  # Inside the refresh margin the current token is returned while a new one is fetched
+  for _ in range(3):
+    start = time.monotonic()
+    assert manager.get_token() == 'old'
+    assert time.monotonic() - start < 0.2
+  # One refresh however many callers see the margin
+  assert session.calls == 2
+  deadline = time.monotonic() + 5
+  while manager.get_token() != 'new' and time.monotonic() < deadline:
+    time.sleep(0.05)
+  assert manager.get_token() == 'new'
+  assert session.calls == 2
+
+@patch('auth0.AUTH0_DOMAIN', 'test.auth0.com')
+def test_client_against_stub():
+  server, base_url = start_auth0_stub()
+  server.state.add_user('google|1', 'user@test.com')
+  server.state.add_user('auth0|1', 'user@test.com')
+  client = Auth0Client(base_url=base_url)
+  assert client.get_user('google|1')['email'] == 'user@test.com'
+  assert client.assign_role_batches({'role1': ['google|1'], 'role2': ['google|1']}) == {}
+  assert server.state.roles == {'role1': {'google|1'}, 'role2': {'google|1'}}
+  client.delete_users_by_email('user@test.com')
+  assert server.state.users == {}
+  # Only one token grant for all of the calls above
+  assert server.state.requests == 7
+  server.shutdown()
+
+@patch('auth0.AUTH0_DOMAIN', 'test.auth0.com')
+def test_user_profiles_are_cached():
+  server, base_url = start_auth0_stub()
+  server.state.add_user('google|1', 'user@test.com')
+  client = Auth0Client(base_url=base_url)
+  assert client.get_user_profile('google|1')['email'] == 'user@test.com'
+  assert client.get_user_profile('google|1')['email'] == 'user@test.com'
+  # One token grant and one profile fetch
+  assert server.state.requests == 2
+  server.shutdown()
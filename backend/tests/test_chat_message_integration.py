@@ -1,4 +1,24 @@
+from extensions import db
+from models.chat_message import ChatMessage
+
 def test_get_chat_messages_not_empty(client,populate_database,access_token):
   response = client.get('/chat_messages/3/1',headers={'Authorization': f'Bearer {access_token}'})
   assert response.status_code == 200
-  assert response.json != []
\ No newline at end of file
+  assert response.json != []
+
+def test_get_chat_messages_no_chat(client,access_token):
+  response = client.get('/chat_messages/3/1',headers={'Authorization': f'Bearer {access_token}'})
+  assert response.status_code == 422
+  assert response.json == {'error': 'Chat does not exist'}
+
+def test_get_chat_messages_pages_back_from_latest(client,populate_database,access_token,app):
+  with app.app_context():
+    db.session.add_all([ChatMessage(chat_id=1,sender=3,content=f'message {i}') for i in range(4)])
+    db.session.commit()
+  response = client.get('/chat_messages/3/1?limit=3',headers={'Authorization': f'Bearer {access_token}'})
+  assert response.status_code == 200
+  assert [message['content'] for message in response.json] == ['message 3','message 2','message 1']
+  cursor = response.headers['X-Next-Cursor']
+  response = client.get(f'/chat_messages/3/1?limit=3&cursor={cursor}',headers={'Authorization': f'Bearer {access_token}'})
+  assert [message['content'] for message in response.json] == ['message 0','content']
+  assert 'X-Next-Cursor' not in response.headers
@@ -0,0 +1,79 @@
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+import pytest
+import requests
+from werkzeug.test import EnvironBuilder
+from werkzeug.formparser import parse_form_data
+from converter import ConverterClient, ConverterError, MultipartFile, check_converter
+from gltf_converter import RigConverter
+from stubs.converter_server import start_converter_stub
+
+def test_multipart_file_streams_a_parseable_body():
+  content = b'time\tknee\n' * 10000
+  body = MultipartFile('file', 'session "1".sto', io.BytesIO(content))
+  chunks = []
+  while chunk := body.read(8192):
+    chunks.append(chunk)
+  data = b''.join(chunks)
+  assert len(data) == len(body)
+  environ = EnvironBuilder(method='POST', data=data, content_type=body.content_type).get_environ()
+  _, _, files = parse_form_data(environ)
+  assert files['file'].filename == 'session "1".sto'
+  assert files['file'].read() == content
+
+def test_converter_client_balances_within_caps():
+  servers = [start_converter_stub(latency=0.05) for _ in range(2)]
+  client = ConverterClient([base_url for _, base_url in servers], max_concurrency=2, health_interval=0)
+  with ThreadPoolExecutor(max_workers=8) as executor:
+    results = list(executor.map(lambda i: client.convert(f'{i}.sto', io.BytesIO(b'time\n0.0\n')), range(16)))
+  assert all(json.loads(result)['extras']['bytes'] == 9 for result in results)
+  for server, _ in servers:
+    assert server.state.requests == 8
+    assert server.state.peak_outstanding <= 2
+    server.shutdown()
+
+def test_converter_client_fails_over():
+  server, base_url = start_converter_stub()
+  failing, failing_url = start_converter_stub()
+  failing.state.failing = True
+  # Nothing listens on a port once its server is closed
+  closed, closed_url = start_converter_stub()
+  closed.shutdown()
+  closed.server_close()
+  client = ConverterClient([failing_url, closed_url, base_url], health_interval=0)
+  for _ in range(3):
+    client.convert('session.sto', io.BytesIO(b'time\n0.0\n'))
+  assert server.state.requests == 3
+  assert [backend['healthy'] for backend in client.stats()] == [False, False, True]
+  failing.state.failing = False
+  client.check_health()
+  assert [backend['healthy'] for backend in client.stats()] == [True, False, True]
+  server.shutdown()
+  failing.shutdown()
+
+def test_converter_client_does_not_retry_rejected_files():
+  server, base_url = start_converter_stub()
+  other, other_url = start_converter_stub()
+  client = ConverterClient([base_url, other_url], health_interval=0)
+  # No 'file' field, so the stub answers 400
+  client.session.post = lambda url, **kwargs: requests.post(url, data=b'', timeout=5)
+  with pytest.raises(ConverterError):
+    client.convert('session.sto', io.BytesIO(b''))
+  assert server.state.requests + other.state.requests == 1
+  server.shutdown()
+  other.shutdown()
+
+def test_converter_client_without_backends():
+  with pytest.raises(ConverterError):
+    ConverterClient([]).convert('session.sto', io.BytesIO(b''))
+
+def test_check_converter_needs_the_rig_in_local_mode(tmp_path):
+  missing = RigConverter(rig_path=str(tmp_path / 'RemyV2.gltf'))
+  with patch('converter.rig_converter', missing):
+    check_converter()
+    with patch('converter.CONVERTER_MODE', 'local'), pytest.raises(ConverterError, match='RemyV2.gltf'):
+      check_converter()
+  with patch('converter.CONVERTER_MODE', 'local'):
+    check_converter()
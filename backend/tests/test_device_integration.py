@@ -1,3 +1,7 @@
+from extensions import db
+from models.device import Device
+from models.user import User
+
 def test_get_devices_empty(client, access_token):
     response = client.get('/devices/', headers={'Authorization': f'Bearer {access_token}'})
     assert response.status_code == 200
@@ -73,3 +77,16 @@ def test_get_unassigned_devices_empty(client, access_token):
     assert response.status_code == 200
     assert response.json == []
 
+def test_get_devices_query_count(client, app, populate_database, access_token, count_queries):
+    with app.app_context():
+        for i in range(20):
+            patient = User(first_name='Test', last_name=f'Patient {i}', email_address=f'patient{i}@test.com', is_patient=True)
+            db.session.add(patient)
+            db.session.flush()
+            db.session.add(Device(patient_id=patient.id))
+        db.session.commit()
+    with count_queries() as queries:
+        response = client.get('/devices/', headers={'Authorization': f'Bearer {access_token}'})
+    assert response.status_code == 200
+    assert len(response.json) == 22
+    assert len(queries) == 1
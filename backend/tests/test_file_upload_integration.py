@@ -0,0 +1,263 @@
+import hashlib
+import io
+import math
+import json
+import time
+from unittest.mock import patch
+import pytest
+from extensions import db
+from gltf_converter import RigConverter, pack_glb
+from ingestion import ingestion
+from models.converted_file import ConvertedFile
+from models.ingestion_job import IngestionJob
+from models.motion_file import Motion_File
+from models.motion_reading import MotionReading
+from models.motion_series import MotionSeries
+
+def stored_job(app, status_url):
+  """The whole job row, the status endpoint only shows status, stage and motion_file_id"""
+  with app.app_context():
+    return db.session.scalars(db.select(IngestionJob).filter_by(token=status_url.rsplit('/', 1)[1])).first().dict()
+
+STO = ('motion\nversion=1\nnRows=2\nnColumns=3\ntime\tknee\telbow\n'
+       f'0.0\t{math.pi / 4}\t0\n0.5\t{-math.pi / 4}\t{math.pi / 2}\n').encode()
+
+@patch('ingestion.socket.emit')
+@patch('ingestion.upload_gltf', return_value='https://example.com/3.gltf')
+@patch('ingestion.convert', return_value=b'{"asset": {"version": "2.0"}}')
+@patch('ingestion.download_blob_chunks', return_value=[STO[:20], STO[20:]])
+def test_file_upload(download, convert, upload, emit, client, populate_database, app):
+  response = client.post('/file_upload/', json={'filename': 'session.sto', 'device_id': 1})
+  assert response.status_code == 202
+  assert response.json['status'] == 'queued'
+  assert response.json['status_url'] == f'/file_upload/jobs/{response.json["job_id"]}'
+  ingestion.flush()
+
+  job = client.get(response.json['status_url']).json
+  assert job == {'status': 'succeeded', 'stage': None, 'motion_file_id': 2}
+  assert {'download', 'convert', 'statistics', 'prepare', 'upload', 'save', 'notify', 'total'} <= set(stored_job(app, response.json['status_url'])['timings'])
+  upload.assert_called_once()
+  assert upload.call_args.args[0].startswith('3_')
+  event, = emit.call_args.args
+  assert event == 'new_file'
+  assert emit.call_args.kwargs['to'] == 1
+  with app.app_context():
+    readings = db.session.scalars(db.select(MotionReading).filter_by(motion_file_id=2)).all()
+    assert {reading.name: (reading.min, reading.max) for reading in readings} == {'knee': (-45.0, 45.0), 'elbow': (90.0, 90.0)}
+    knee, = [reading for reading in readings if reading.name == 'knee']
+    assert knee.mean == pytest.approx(0)
+    assert knee.stdev == pytest.approx(math.sqrt(2) * 45)
+    assert sum(knee.histogram['counts']) == 2
+    times, columns = db.session.get(MotionSeries, 2).columns()
+    assert list(times) == [0.0, 0.5]
+    assert columns['knee'] == pytest.approx([45.0, -45.0])
+
+@patch('ingestion.socket.emit')
+@patch('ingestion.upload_gltf', return_value='https://example.com/3.gltf')
+@patch('ingestion.convert', return_value=b'{"asset": {"version": "2.0"}}')
+@patch('ingestion.download_blob_chunks', return_value=[STO])
+def test_file_upload_repeat_reuses_conversion(download, convert, upload, emit, client, populate_database, app):
+  first = client.post('/file_upload/', json={'filename': 'session.sto', 'device_id': 1})
+  ingestion.flush()
+  second = client.post('/file_upload/', json={'filename': 'session (retry).sto', 'device_id': 1})
+  ingestion.flush()
+
+  job = client.get(second.json['status_url']).json
+  assert job['status'] == 'succeeded'
+  assert job['motion_file_id'] == client.get(first.json['status_url']).json['motion_file_id']
+  assert 'convert' not in stored_job(app, second.json['status_url'])['timings']
+  convert.assert_called_once()
+  upload.assert_called_once()
+  emit.assert_called_once()
+  with app.app_context():
+    assert db.session.scalar(db.select(db.func.count()).select_from(MotionReading)) == 3
+
+def slow_convert(*results):
+  """convert taking long enough for a retry of the same recording to start meanwhile"""
+  results = list(results)
+  def convert(filename, sto_file):
+    time.sleep(1)
+    result = results.pop(0)
+    if isinstance(result, Exception):
+      raise result
+    return result
+  return convert
+
+@patch.object(ingestion, 'retry_delay', 0.05)
+@patch('ingestion.socket.emit')
+@patch('ingestion.upload_gltf', return_value='https://example.com/3.gltf')
+@patch('ingestion.convert', side_effect=slow_convert(b'{"asset": {"version": "2.0"}}'))
+@patch('ingestion.download_blob_chunks', return_value=[STO])
+def test_file_upload_concurrent_retry_waits_for_conversion(download, convert, upload, emit, client, populate_database, app):
+  first = client.post('/file_upload/', json={'filename': 'session.sto', 'device_id': 1})
+  second = client.post('/file_upload/', json={'filename': 'session (retry).sto', 'device_id': 1})
+  ingestion.flush()
+
+  jobs = [client.get(response.json['status_url']).json for response in (first, second)]
+  assert [job['status'] for job in jobs] == ['succeeded', 'succeeded']
+  assert jobs[0]['motion_file_id'] == jobs[1]['motion_file_id']
+  convert.assert_called_once()
+  upload.assert_called_once()
+  emit.assert_called_once()
+  # The waiting job looked at the claim again without downloading the recording again
+  assert download.call_count == 2
+
+@patch.object(ingestion, 'retry_delay', 0.05)
+@patch('ingestion.socket.emit')
+@patch('ingestion.upload_gltf', return_value='https://example.com/3.gltf')
+@patch('ingestion.convert', return_value=b'{"asset": {"version": "2.0"}}')
+@patch('ingestion.download_blob_chunks', return_value=[STO])
+def test_file_upload_waits_for_a_claim_without_a_worker(download, convert, upload, emit, client, populate_database, app):
+  # A claim left behind by a worker that died mid conversion
+  with app.app_context():
+    db.session.add(ConvertedFile(patient_id=3, sha256=hashlib.sha256(STO).hexdigest()))
+    db.session.commit()
+  waiting = client.post('/file_upload/', json={'filename': 'session.sto', 'device_id': 1})
+  for _ in range(100):
+    if stored_job(app, waiting.json['status_url'])['status'] == 'waiting':
+      break
+    time.sleep(0.05)
+  assert client.get(waiting.json['status_url']).json == {'status': 'waiting', 'stage': 'lookup', 'motion_file_id': None}
+
+  # Queued again every retry_delay to look at the claim, without downloading the recording each time
+  time.sleep(0.3)
+  download.assert_called_once()
+  convert.assert_not_called()
+
+  with app.app_context():
+    db.session.execute(db.delete(ConvertedFile).filter(ConvertedFile.motion_file_id.is_(None), ConvertedFile.sha256 == hashlib.sha256(STO).hexdigest()))
+    db.session.commit()
+  ingestion.flush()
+  assert client.get(waiting.json['status_url']).json['status'] == 'succeeded'
+  # Once more to convert it after taking the claim
+  assert download.call_count == 2
+  convert.assert_called_once()
+
+@patch('ingestion.socket.emit')
+@patch('ingestion.delete_gltf')
+@patch('ingestion.upload_gltf', side_effect=lambda name, data, content_type: f'https://example.com/{name}')
+@patch('ingestion.download_blob_chunks', return_value=[STO])
+def test_file_upload_claim_taken_over_during_conversion(download, upload, delete, emit, client, populate_database, app):
+  def convert(filename, sto_file):
+    # Ran so long that another job took the claim over and saved the recording first
+    with app.app_context():
+      db.session.execute(db.update(ConvertedFile).values(motion_file_id=1))
+      db.session.commit()
+    return b'{"asset": {"version": "2.0"}}'
+  with patch('ingestion.convert', side_effect=convert):
+    response = client.post('/file_upload/', json={'filename': 'session.sto', 'device_id': 1})
+    ingestion.flush()
+
+  assert client.get(response.json['status_url']).json == {'status': 'succeeded', 'stage': None, 'motion_file_id': 1}
+  assert delete.call_args.args[0] == upload.call_args.args[0]
+  emit.assert_not_called()
+  with app.app_context():
+    assert db.session.scalar(db.select(db.func.count()).select_from(Motion_File)) == 1
+
+@patch.object(ingestion, 'retry_delay', 0.05)
+@patch('ingestion.socket.emit')
+@patch('ingestion.upload_gltf', return_value='https://example.com/3.gltf')
+@patch('ingestion.convert', side_effect=slow_convert(RuntimeError('converter unavailable'), b'{"asset": {"version": "2.0"}}'))
+@patch('ingestion.download_blob_chunks', return_value=[STO])
+def test_file_upload_concurrent_retry_converts_after_failure(download, convert, upload, emit, client, populate_database, app):
+  first = client.post('/file_upload/', json={'filename': 'session.sto', 'device_id': 1})
+  second = client.post('/file_upload/', json={'filename': 'session (retry).sto', 'device_id': 1})
+  ingestion.flush()
+
+  jobs = [client.get(response.json['status_url']).json for response in (first, second)]
+  assert sorted(job['status'] for job in jobs) == ['failed', 'succeeded']
+  assert convert.call_count == 2
+  upload.assert_called_once()
+
+@patch('ingestion.socket.emit')
+@patch('ingestion.upload_gltf', return_value='https://example.com/3.glb')
+@patch('ingestion.convert', return_value=pack_glb({'asset': {'version': '2.0'}}, b''))
+@patch('ingestion.download_blob_chunks', return_value=[STO])
+def test_file_upload_binary_gltf(download, convert, upload, emit, client, populate_database, app):
+  response = client.post('/file_upload/', json={'filename': 'session.sto', 'device_id': 1})
+  ingestion.flush()
+
+  job = client.get(response.json['status_url']).json
+  assert job['status'] == 'succeeded'
+  name, _, content_type = upload.call_args.args
+  assert name.endswith('.glb')
+  assert content_type == 'model/gltf-binary'
+  assert emit.call_args.kwargs['data']['motion_file']['type'] == 'glb'
+
+@patch('ingestion.socket.emit')
+@patch('ingestion.upload_gltf', side_effect=lambda name, data, content_type: f'https://example.com/{name}')
+@patch('ingestion.download_blob_chunks', return_value=[STO])
+def test_file_upload_stores_levels(download, upload, emit, client, populate_database, app):
+  animated = RigConverter(texture_url=None).convert('session.sto', io.BytesIO(
+    b'time\tpelvis_tilt\n' + b''.join(f'{i / 60}\t{i / 100}\n'.encode() for i in range(64))), binary=True)
+  with patch('ingestion.convert', return_value=animated):
+    response = client.post('/file_upload/', json={'filename': 'session.sto', 'device_id': 1})
+    ingestion.flush()
+
+  job = client.get(response.json['status_url']).json
+  assert job['status'] == 'succeeded'
+  assert 'levels' in stored_job(app, response.json['status_url'])['timings']
+  motion_file = emit.call_args.kwargs['data']['motion_file']
+  names = [call.args[0] for call in upload.call_args_list]
+  assert names == [motion_file['name'][:-4] + '_16.glb', motion_file['name'][:-4] + '_4.glb', motion_file['name']]
+  assert [level['step'] for level in motion_file['levels']] == [16, 4, 1]
+  assert [level.get('rig') for level in motion_file['levels']] == ['RemyV2', 'RemyV2', None]
+  assert motion_file['levels'][-1] == {'step': 1, 'name': motion_file['name'], 'url': motion_file['url']}
+  # The coarse levels leave the mesh to the rig the frontend ships, so they are a small part of the full file
+  assert len(upload.call_args_list[0].args[1]) < len(upload.call_args_list[1].args[1]) < len(animated) / 10
+
+@patch('ingestion.socket.emit')
+@patch('ingestion.upload_gltf', side_effect=lambda name, data, content_type: f'https://example.com/{name}')
+@patch('ingestion.download_blob_chunks', return_value=[STO])
+def test_file_upload_skips_levels_off_the_rig(download, upload, emit, client, populate_database, app):
+  # Nothing the frontend ships could dress an animation of some other skeleton
+  animated = RigConverter(texture_url=None).convert('session.sto', io.BytesIO(
+    b'time\tpelvis_tilt\n' + b''.join(f'{i / 60}\t{i / 100}\n'.encode() for i in range(64))), binary=False)
+  gltf = json.loads(animated)
+  for node in gltf['nodes']:
+    node['name'] = 'other:' + node.get('name', '')
+  with patch('ingestion.convert', return_value=json.dumps(gltf).encode()):
+    response = client.post('/file_upload/', json={'filename': 'session.sto', 'device_id': 1})
+    ingestion.flush()
+
+  assert client.get(response.json['status_url']).json['status'] == 'succeeded'
+  motion_file = emit.call_args.kwargs['data']['motion_file']
+  upload.assert_called_once()
+  assert motion_file['levels'] == [{'step': 1, 'name': motion_file['name'], 'url': motion_file['url']}]
+
+@patch('ingestion.convert', side_effect=RuntimeError('converter unavailable'))
+@patch('ingestion.download_blob_chunks', return_value=[STO])
+def test_file_upload_conversion_fails(download, convert, client, populate_database, app):
+  response = client.post('/file_upload/', json={'filename': 'session.sto', 'device_id': 1})
+  assert response.status_code == 202
+  ingestion.flush()
+
+  job = client.get(response.json['status_url']).json
+  assert job['status'] == 'failed'
+  assert job == {'status': 'failed', 'stage': 'convert', 'motion_file_id': None}
+  stored = stored_job(app, response.json['status_url'])
+  assert stored['error'] == 'converter unavailable'
+  assert 'upload' not in stored['timings']
+
+def test_file_upload_missing_fields(client):
+  response = client.post('/file_upload/', json={'filename': 'session.sto'})
+  assert response.status_code == 400
+  assert response.json == {'error': 'Missing required fields: filename and/or device_id'}
+
+def test_file_upload_device_without_patient(client, populate_database):
+  response = client.post('/file_upload/', json={'filename': 'session.sto', 'device_id': 2})
+  assert response.status_code == 422
+  assert response.json == {'error': 'Device is not assigned to a patient'}
+
+def test_file_upload_job_not_found(client):
+  response = client.get('/file_upload/jobs/1')
+  assert response.status_code == 404
+  assert response.json == {'error': 'Job does not exist'}
+
+@patch('ingestion.download_blob_chunks', side_effect=RuntimeError('no blob'))
+def test_file_upload_job_is_not_found_by_id(download, client, populate_database):
+  response = client.post('/file_upload/', json={'filename': 'session.sto', 'device_id': 1})
+  ingestion.flush()
+  assert len(response.json['job_id']) == 32
+  assert client.get('/file_upload/jobs/1').status_code == 404
+  assert client.get(response.json['status_url']).status_code == 200
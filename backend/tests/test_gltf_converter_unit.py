@@ -0,0 +1,193 @@
+import base64
+import io
+import json
+import math
+import struct
+import numpy as np
+import pytest
+import converter
+from converter import ConverterError
+from gltf_converter import RigConverter, animation_only, axis_angle, decimate, file_type, gltf_to_glb, quat_multiply, quat_rotate, reduce_keyframes, unpack
+
+LABELS = ['time', 'pelvis_tilt', 'pelvis_tx', 'pelvis_ty', 'pelvis_tz', 'hip_flexion_r', 'knee_angle_r', 'arm_flex_l', 'not_a_joint']
+
+def make_sto(rows=30, in_degrees=False):
+  lines = ['Coordinates', 'version=1', f'nRows={rows}', f'nColumns={len(LABELS)}',
+           f'inDegrees={"yes" if in_degrees else "no"}', 'endheader', '\t'.join(LABELS)]
+  for row in range(rows):
+    angle = math.sin(row / 5) * (57.29577951 if in_degrees else 1)
+    lines.append('\t'.join(str(value) for value in [0.5 + row / 60, angle, row / 100, 0.9, 0, angle, -angle, angle, 3]))
+  return io.BytesIO(('\n'.join(lines) + '\n').encode())
+
+@pytest.fixture(scope='module')
+def rig_converter():
+  return RigConverter(texture_url=None)
+
+def read_accessor(gltf, buffer, index):
+  accessor = gltf['accessors'][index]
+  view = gltf['bufferViews'][accessor['bufferView']]
+  width = {'SCALAR': 1, 'VEC3': 3, 'VEC4': 4}[accessor['type']]
+  data = np.frombuffer(buffer, dtype='<f4', count=accessor['count'] * width, offset=view['byteOffset'])
+  return data.reshape(accessor['count'], width) if width > 1 else data
+
+def test_convert_produces_a_self_contained_animation(rig_converter):
+  gltf = json.loads(rig_converter.convert('session.sto', make_sto()))
+  assert gltf['asset']['version'] == '2.0'
+  buffer_uri = gltf['buffers'][0]['uri']
+  assert buffer_uri.startswith('data:application/octet-stream;base64,')
+  buffer = base64.b64decode(buffer_uri.split(',', 1)[1])
+  assert len(buffer) == gltf['buffers'][0]['byteLength']
+  # No textures without a URL to fetch them from
+  assert 'images' not in gltf
+  assert 'Texture' not in json.dumps(gltf['materials'])
+
+  animation, = gltf['animations']
+  targets = {(gltf['nodes'][channel['target']['node']]['name'], channel['target']['path']) for channel in animation['channels']}
+  assert targets == {('mixamorig:Hips', 'rotation'), ('mixamorig:Hips', 'translation'), ('mixamorig:RightUpLeg', 'rotation'),
+                     ('mixamorig:RightLeg', 'rotation'), ('mixamorig:LeftArm', 'rotation')}
+  times = read_accessor(gltf, buffer, animation['samplers'][0]['input'])
+  assert times[0] == 0 and times[-1] == pytest.approx(29 / 60)
+  for sampler in animation['samplers']:
+    assert sampler['interpolation'] == 'LINEAR'
+    output = read_accessor(gltf, buffer, sampler['output'])
+    assert len(output) == 30
+    if output.shape[1] == 4:
+      assert np.linalg.norm(output, axis=1) == pytest.approx(1, abs=1e-6)
+
+def test_root_puts_the_pelvis_at_the_origin(rig_converter):
+  gltf = json.loads(rig_converter.convert('session.sto', make_sto()))
+  root = gltf['nodes'][gltf['scenes'][0]['nodes'][0]]
+  assert gltf['nodes'][root['children'][0]]['name'] == 'Armature'
+  # The frontend turns the scene -90 degrees about X, which has to stand the rig upright again
+  undo = axis_angle((1.0, 0.0, 0.0), np.array([-math.pi / 2]))[0]
+  assert quat_multiply(undo, root['rotation']) == pytest.approx([0, 0, 0, 1], abs=1e-9)
+  assert quat_rotate(undo, np.array(root['translation'])) == pytest.approx([0, -0.95, 0], abs=1e-9)
+
+def test_degrees_and_radians_give_the_same_animation(rig_converter):
+  radians, radians_buffer = rig_converter.build(make_sto())
+  degrees, degrees_buffer = rig_converter.build(make_sto(in_degrees=True))
+  for sampler, other in zip(radians['animations'][0]['samplers'], degrees['animations'][0]['samplers']):
+    assert read_accessor(radians, radians_buffer, sampler['output']) == pytest.approx(
+      read_accessor(degrees, degrees_buffer, other['output']), abs=1e-5)
+
+def test_texture_url_makes_image_paths_absolute():
+  gltf = json.loads(RigConverter(texture_url='https://example.com/Models/RemyV2').convert('session.sto', make_sto()))
+  assert all(image['uri'].startswith('https://example.com/Models/RemyV2/Remy_') for image in gltf['images'])
+
+def read_glb(data):
+  magic, version, length = struct.unpack_from('<4sII', data)
+  assert (magic, version, length) == (b'glTF', 2, len(data))
+  json_length, json_type = struct.unpack_from('<II', data, 12)
+  assert json_type == 0x4E4F534A and json_length % 4 == 0
+  bin_length, bin_type = struct.unpack_from('<II', data, 20 + json_length)
+  assert bin_type == 0x004E4942 and bin_length % 4 == 0
+  return json.loads(data[20:20 + json_length]), data[28 + json_length:28 + json_length + bin_length]
+
+def test_glb_matches_gltf(rig_converter):
+  gltf, buffer = rig_converter.build(make_sto())
+  data = rig_converter.convert('session.sto', make_sto(), binary=True)
+  assert file_type(data) == ('glb', 'model/gltf-binary')
+  glb, glb_buffer = read_glb(data)
+  assert glb['buffers'] == [{'byteLength': len(buffer)}]
+  assert glb['accessors'] == gltf['accessors']
+  assert glb_buffer[:len(buffer)] == buffer
+
+def test_gltf_to_glb_merges_embedded_buffers():
+  first, second = b'\x01\x02\x03', b'\x04' * 8
+  gltf = {'asset': {'version': '2.0'},
+          'buffers': [{'byteLength': 3, 'uri': 'data:application/octet-stream;base64,' + base64.b64encode(first).decode()},
+                      {'byteLength': 8, 'uri': 'data:application/octet-stream;base64,' + base64.b64encode(second).decode()}],
+          'bufferViews': [{'buffer': 0, 'byteLength': 3}, {'buffer': 1, 'byteOffset': 4, 'byteLength': 4}]}
+  glb, buffer = read_glb(gltf_to_glb(json.dumps(gltf)))
+  assert glb['bufferViews'] == [{'buffer': 0, 'byteOffset': 0, 'byteLength': 3}, {'buffer': 0, 'byteOffset': 8, 'byteLength': 4}]
+  assert buffer[:3] == first and buffer[8:12] == second[4:]
+  assert file_type(json.dumps(gltf).encode()) == ('gltf', 'model/gltf+json')
+  with pytest.raises(ValueError):
+    gltf_to_glb(json.dumps({'buffers': [{'uri': 'RemyV2.bin'}]}))
+
+def test_reduce_keyframes_stays_within_tolerance():
+  times = np.linspace(0, 10, 1001)
+  values = np.column_stack([np.sin(times), np.where(times < 5, times, 10 - times)])
+  frames = reduce_keyframes(times, values, 0.01)
+  assert frames[0] == 0 and frames[-1] == 1000
+  assert len(frames) < 100
+  rebuilt = np.column_stack([np.interp(times, times[frames], values[frames, i]) for i in range(2)])
+  assert np.abs(rebuilt - values).max() <= 0.01
+  # A straight line needs nothing but its ends
+  assert list(reduce_keyframes(times, times * 2, 1e-9)) == [0, 1000]
+
+def test_keyframe_reduction_gives_channels_their_own_times():
+  gltf, buffer = RigConverter(texture_url=None, rotation_tolerance=0.5, translation_tolerance=1).build(make_sto(rows=300))
+  animation, = gltf['animations']
+  for sampler in animation['samplers']:
+    times = read_accessor(gltf, buffer, sampler['input'])
+    assert len(read_accessor(gltf, buffer, sampler['output'])) == len(times)
+    assert times[0] == 0 and times[-1] == pytest.approx(299 / 60)
+  # pelvis_ty and pelvis_tz never move and tx moves in a straight line, so two keyframes rebuild it
+  translation, = [sampler for sampler, channel in zip(animation['samplers'], animation['channels']) if channel['target']['path'] == 'translation']
+  assert gltf['accessors'][translation['input']]['count'] == 2
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_decimate_keeps_every_step_th_keyframe(rig_converter, binary):
+  full = rig_converter.convert('session.sto', make_sto(rows=30), binary=binary)
+  coarse = decimate(full, 4)
+  assert file_type(coarse) == file_type(full)
+  gltf, buffer = unpack(full)
+  coarse_gltf, coarse_buffer = unpack(coarse)
+  assert len(coarse_buffer) < len(buffer)
+  for sampler, coarse_sampler in zip(gltf['animations'][0]['samplers'], coarse_gltf['animations'][0]['samplers']):
+    times = read_accessor(gltf, buffer, sampler['input'])
+    coarse_times = read_accessor(coarse_gltf, coarse_buffer, coarse_sampler['input'])
+    # 0, 4, ... 28 and the last frame
+    assert list(coarse_times) == list(times[[0, 4, 8, 12, 16, 20, 24, 28, 29]])
+    assert coarse_gltf['accessors'][coarse_sampler['input']]['max'] == [pytest.approx(float(times[-1]))]
+    assert read_accessor(coarse_gltf, coarse_buffer, coarse_sampler['output']) == pytest.approx(
+      read_accessor(gltf, buffer, sampler['output'])[[0, 4, 8, 12, 16, 20, 24, 28, 29]])
+  # The rig comes through untouched
+  skin = gltf['accessors'][gltf['skins'][0]['inverseBindMatrices']]
+  coarse_skin = coarse_gltf['accessors'][coarse_gltf['skins'][0]['inverseBindMatrices']]
+  view, coarse_view = gltf['bufferViews'][skin['bufferView']], coarse_gltf['bufferViews'][coarse_skin['bufferView']]
+  assert (buffer[view['byteOffset']:view['byteOffset'] + view['byteLength']] ==
+          coarse_buffer[coarse_view['byteOffset']:coarse_view['byteOffset'] + coarse_view['byteLength']])
+  with pytest.raises(ValueError):
+    decimate(b'{"asset": {"version": "2.0"}}', 4)
+
+@pytest.mark.parametrize('binary', [False, True])
+def test_animation_only_keeps_the_nodes_and_keyframes(rig_converter, binary):
+  full = rig_converter.convert('session.sto', make_sto(rows=30), binary=binary)
+  bare = animation_only(full)
+  assert file_type(bare) == file_type(full)
+  gltf, buffer = unpack(full)
+  bare_gltf, bare_buffer = unpack(bare)
+  assert len(bare) < len(full) / 10
+  for key in ('meshes', 'skins', 'materials', 'textures', 'images'):
+    assert key not in bare_gltf
+  assert not any({'mesh', 'skin'} & node.keys() for node in bare_gltf['nodes'])
+  assert [node.get('name') for node in bare_gltf['nodes']] == [node.get('name') for node in gltf['nodes']]
+  assert [node.get('children') for node in bare_gltf['nodes']] == [node.get('children') for node in gltf['nodes']]
+  assert bare_gltf['scenes'] == gltf['scenes']
+  animation, bare_animation = gltf['animations'][0], bare_gltf['animations'][0]
+  assert [channel['target'] for channel in bare_animation['channels']] == [channel['target'] for channel in animation['channels']]
+  for sampler, bare_sampler in zip(animation['samplers'], bare_animation['samplers']):
+    for key in ('input', 'output'):
+      assert read_accessor(bare_gltf, bare_buffer, bare_sampler[key]) == pytest.approx(read_accessor(gltf, buffer, sampler[key]))
+
+def test_can_play_only_files_built_on_the_rig(rig_converter):
+  full = rig_converter.convert('session.sto', make_sto(rows=30), binary=True)
+  assert rig_converter.name == 'RemyV2'
+  assert rig_converter.can_play(full)
+  assert rig_converter.can_play(animation_only(full))
+  gltf = json.loads(rig_converter.convert('session.sto', make_sto(rows=30)))
+  for node in gltf['nodes']:
+    node['name'] = 'other:' + node.get('name', '')
+  assert not rig_converter.can_play(json.dumps(gltf).encode())
+  assert not rig_converter.can_play(b'{"asset": {"version": "2.0"}}')
+
+def test_local_mode_raises_converter_error(monkeypatch):
+  monkeypatch.setattr(converter, 'CONVERTER_MODE', 'local')
+  with pytest.raises(ConverterError):
+    converter.convert('empty.sto', io.BytesIO(b'time\tfoo\n'))
+  gltf = json.loads(converter.convert('session.sto', make_sto()))
+  assert gltf['animations'][0]['channels']
+  monkeypatch.setattr(converter, 'CONVERTER_OUTPUT', 'glb')
+  assert file_type(converter.convert('session.sto', make_sto()))[0] == 'glb'
@@ -0,0 +1,87 @@
+import threading
+import time
+from unittest.mock import patch
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk
+from jwks import JWKSStore
+
+def make_jwk(kid):
+  private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+  pem = private_key.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+  key = jwk.construct(pem, algorithm='RS256').to_dict()
+  key.update({'kid': kid, 'use': 'sig', 'kty': 'RSA'})
+  return key
+
+KEY_A = make_jwk('a')
+KEY_B = make_jwk('b')
+
+def test_keys_are_cached():
+  store = JWKSStore('https://test/.well-known/jwks.json')
+  with patch.object(store, '_fetch', return_value={'keys': [KEY_A]}) as fetch:
+    assert store.get_key('a') is not None
+    assert store.get_key('a') is store.get_key('a')
+    assert fetch.call_count == 1
+
+def test_unknown_kid_refetches():
+  store = JWKSStore('https://test/.well-known/jwks.json', min_refresh_interval=0)
+  with patch.object(store, '_fetch', side_effect=[{'keys': [KEY_A]}, {'keys': [KEY_A, KEY_B]}]) as fetch:
+    assert store.get_key('a') is not None
+    assert store.get_key('b') is not None
+    assert fetch.call_count == 2
+
+def test_unknown_kid_is_rate_limited():
+  store = JWKSStore('https://test/.well-known/jwks.json', min_refresh_interval=60)
+  with patch.object(store, '_fetch', return_value={'keys': [KEY_A]}) as fetch:
+    assert store.get_key('a') is not None
+    assert store.get_key('missing') is None
+    assert store.get_key('missing') is None
+    assert fetch.call_count == 1
+
+def test_expired_keys_refetch():
+  store = JWKSStore('https://test/.well-known/jwks.json', ttl=0)
+  with patch.object(store, '_fetch', return_value={'keys': [KEY_A]}) as fetch:
+    store.get_key('a')
+    store.get_key('a')
+    assert fetch.call_count == 2
+
+def test_stale_keys_survive_fetch_failure():
+  store = JWKSStore('https://test/.well-known/jwks.json', ttl=0, min_refresh_interval=0)
+  with patch.object(store, '_fetch', side_effect=[{'keys': [KEY_A]}, OSError('unreachable')]):
+    assert store.get_key('a') is not None
+    assert store.get_key('a') is not None
+
+def test_concurrent_rotation_fetches_once():
+  store = JWKSStore('https://test/.well-known/jwks.json', min_refresh_interval=0)
+  def slow_fetch():
+    time.sleep(0.1)
+    return {'keys': [KEY_A]}
+  with patch.object(store, '_fetch', side_effect=slow_fetch) as fetch:
+    threads = [threading.Thread(target=store.get_key, args=('a',)) for _ in range(10)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    assert fetch.call_count == 1
+
+def test_concurrent_failure_fetches_once():
+  store = JWKSStore('https://test/.well-known/jwks.json', min_refresh_interval=60)
+  errors = []
+  def get_key():
+    try:
+      store.get_key('a')
+    except OSError as e:
+      errors.append(e)
+  def slow_fetch():
+    time.sleep(0.1)
+    raise OSError('unreachable')
+  with patch.object(store, '_fetch', side_effect=slow_fetch) as fetch:
+    threads = [threading.Thread(target=get_key) for _ in range(10)]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+    assert len(errors) == 10
+    # Later requests back off too until min_refresh_interval has passed
+    get_key()
+    assert fetch.call_count == 1
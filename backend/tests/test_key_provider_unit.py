@@ -0,0 +1,43 @@
+import pytest
+import auth
+from auth import set_key_provider
+from key_provider import LocalKeyProvider
+
+@pytest.fixture
+def local_provider():
+  previous = auth.key_provider
+  provider = LocalKeyProvider(previous.issuer, previous.audience)
+  set_key_provider(provider)
+  yield provider
+  set_key_provider(previous)
+
+def test_local_token_is_accepted(client,local_provider):
+  token = local_provider.mint_token(roles=['Physician'])
+  response = client.get('/api/private',headers={'Authorization': 'Bearer '+token})
+  assert response.status_code == 200
+
+def test_local_token_unknown_kid(client,local_provider):
+  other = LocalKeyProvider(local_provider.issuer, local_provider.audience, kid='other')
+  response = client.get('/api/private',headers={'Authorization': 'Bearer '+other.mint_token()})
+  assert response.status_code == 401
+  assert response.json == {"code": "invalid_header",
+                           "description": "Unable to find appropriate key"}
+
+def test_local_token_expired(client,local_provider):
+  token = local_provider.mint_token(expires_in=-60)
+  response = client.get('/api/private',headers={'Authorization': 'Bearer '+token})
+  assert response.status_code == 401
+  assert response.json == {"code": "token_expired",
+                           "description": "token is expired"}
+
+def test_local_token_missing_role(client,local_provider):
+  token = local_provider.mint_token(roles=['Patient'])
+  response = client.get('/physicians/',headers={'Authorization': 'Bearer '+token})
+  assert response.status_code == 401
+  assert response.json['code'] == 'unauthorized'
+
+def test_local_jwks_matches_auth0_shape(local_provider):
+  key = local_provider.jwks()['keys'][0]
+  assert key['kid'] == 'local'
+  assert key['kty'] == 'RSA'
+  assert key['use'] == 'sig'
@@ -0,0 +1,56 @@
+from metrics import Histogram, StageTimer
+
+def test_histogram_renders_cumulative_buckets():
+  histogram = Histogram('test_seconds', 'Test histogram', ('stage',), buckets=(0.1, 1.0))
+  histogram.observe(0.05, 'jwks')
+  histogram.observe(0.5, 'jwks')
+  histogram.observe(5, 'jwks')
+  rendered = histogram.render()
+  assert 'test_seconds_bucket{stage="jwks",le="0.1"} 1' in rendered
+  assert 'test_seconds_bucket{stage="jwks",le="1.0"} 2' in rendered
+  assert 'test_seconds_bucket{stage="jwks",le="+Inf"} 3' in rendered
+  assert 'test_seconds_count{stage="jwks"} 3' in rendered
+
+def test_stage_timer_records_failed_stages():
+  timer = StageTimer()
+  try:
+    with timer.stage('signature'):
+      raise ValueError()
+  except ValueError:
+    pass
+  assert [name for name, _ in timer.stages] == ['signature']
+
+def test_server_timing_header(client,access_token):
+  response = client.get('/api/private',headers={'Authorization': 'Bearer '+access_token})
+  assert response.status_code == 200
+  stages = [entry.split(';')[0] for entry in response.headers['Server-Timing'].split(', ')]
+  assert 'auth-authorization_header' in stages
+  assert 'auth-roles' in stages
+  # Every stage is timed once, under its own name
+  assert len(stages) == len(set(stages))
+  assert stages[-1] == 'auth'
+
+def test_server_timing_header_on_rejected_token(client):
+  response = client.get('/api/private',headers={'Authorization': 'Bearer not.a.token'})
+  assert response.status_code == 401
+  stages = [entry.split(';')[0] for entry in response.headers['Server-Timing'].split(', ')]
+  # Verified rather than answered from the cache, so both header stages run
+  assert 'auth-authorization_header' in stages and 'auth-token_header' in stages
+  assert len(stages) == len(set(stages))
+
+def test_metrics_endpoint(client,access_token,monkeypatch):
+  monkeypatch.setenv('METRICS_TOKEN','metrics-token')
+  client.get('/api/private',headers={'Authorization': 'Bearer '+access_token})
+  response = client.get('/metrics',headers={'Authorization': 'Bearer metrics-token'})
+  assert response.status_code == 200
+  body = response.get_data(as_text=True)
+  assert 'auth_stage_duration_seconds_count{stage="authorization_header",route="/api/private"}' in body
+  assert 'auth_stage_duration_seconds_count{stage="header",' not in body
+  assert 'auth_token_cache_hits_total' in body
+
+def test_metrics_endpoint_is_closed(client,monkeypatch):
+  monkeypatch.delenv('METRICS_TOKEN',raising=False)
+  assert client.get('/metrics').status_code == 404
+  monkeypatch.setenv('METRICS_TOKEN','metrics-token')
+  assert client.get('/metrics').status_code == 401
+  assert client.get('/metrics',headers={'Authorization': 'Bearer wrong'}).status_code == 401
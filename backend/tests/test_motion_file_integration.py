@@ -1,4 +1,10 @@
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch
+from azure.core.exceptions import ResourceNotFoundError
+import pagination
+from models.motion_reading import MotionReading, insert_motion_readings
+from extensions import db
+from models.motion_file import Motion_File
 
 def test_get_motion_files(client, populate_database, access_token):
     response = client.get('/motion_files/', headers={'Authorization': f'Bearer {access_token}'})
@@ -71,6 +77,31 @@ def test_delete_motion_file(mock_delete_blob, client, populate_database, access_
     assert response.status_code == 200
     assert response.json == {'message': 'Motion_File deleted successfully'}
 
+@patch('azure.storage.blob.BlobClient.delete_blob')
+def test_delete_motion_file_with_levels(mock_delete_blob, client, populate_database, access_token, app):
+    with app.app_context():
+        motion_file = db.session.get(Motion_File, 1)
+        motion_file.levels = [{'step': 4, 'name': 'testname_4', 'url': 'testurl_4'},
+                              {'step': 1, 'name': 'testname', 'url': 'testurl'}]
+        db.session.commit()
+    response = client.delete('/motion_files/delete/1', headers={'Authorization': f'Bearer {access_token}'})
+    assert response.status_code == 200
+    # The file and its one lower level, the full level is the file itself
+    assert mock_delete_blob.call_count == 2
+
+@patch('azure.storage.blob.BlobClient.delete_blob', side_effect=ResourceNotFoundError('The specified blob does not exist.'))
+def test_delete_motion_file_with_missing_blob(mock_delete_blob, client, populate_database, access_token, app):
+    with app.app_context():
+        motion_file = db.session.get(Motion_File, 1)
+        motion_file.levels = [{'step': 4, 'name': 'testname_4', 'url': 'testurl_4'},
+                              {'step': 1, 'name': 'testname', 'url': 'testurl'}]
+        db.session.commit()
+    response = client.delete('/motion_files/delete/1', headers={'Authorization': f'Bearer {access_token}'})
+    assert response.status_code == 200
+    assert mock_delete_blob.call_count == 2
+    with app.app_context():
+        assert db.session.get(Motion_File, 1) is None
+
 def test_delete_motion_file_not_found(client, access_token):
     response = client.delete('/motion_files/delete/1', headers={'Authorization': f'Bearer {access_token}'})
     assert response.status_code == 422
@@ -99,4 +130,101 @@ def test_get_patient_motion_files_after_date_invalid_format(client, access_token
 def test_get_patient_motion_files_after_date_not_found(client, access_token):
     response = client.get('/motion_files/patient/1/after/2025-01-01', headers={'Authorization': f'Bearer {access_token}'})
     assert response.status_code == 404
-    assert response.json == {'error': 'No motion_files found for patient 1 after 2025-01-01'}
\ No newline at end of file
+    assert response.json == {'error': 'No motion_files found for patient 1 after 2025-01-01'}
+def test_get_patient_motion_files_pages(client, populate_database, access_token, app):
+    with app.app_context():
+        # Two files share a timestamp so the id has to break the tie
+        created = datetime(2025, 3, 1, tzinfo=timezone.utc)
+        for i in range(4):
+            db.session.add(Motion_File(patient_id=3, url='url', name=f'page{i}', type='gltf', createdAt=created + timedelta(days=min(i, 2))))
+        db.session.commit()
+        expected = [motion_file.id for motion_file in db.session.scalars(
+            db.select(Motion_File).filter_by(patient_id=3).order_by(Motion_File.createdAt.desc(), Motion_File.id.desc()))]
+
+    ids, cursor = [], None
+    while True:
+        response = client.get('/motion_files/patient/3', query_string={'limit': 2, **({'cursor': cursor} if cursor else {})},
+                              headers={'Authorization': f'Bearer {access_token}'})
+        assert response.status_code == 200
+        assert len(response.json) <= 2
+        ids += [motion_file['id'] for motion_file in response.json]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+    assert ids == expected
+
+def test_get_motion_files_page_size_is_capped(client, populate_database, access_token, monkeypatch):
+    monkeypatch.setattr(pagination, 'MAX_PAGE_SIZE', 1)
+    response = client.get('/motion_files/?limit=100', headers={'Authorization': f'Bearer {access_token}'})
+    assert response.status_code == 200
+    assert len(response.json) == 1
+
+def test_get_motion_files_default_page(client, populate_database, access_token, app, monkeypatch):
+    with app.app_context():
+        db.session.add_all([Motion_File(patient_id=3, url='url', name=f'file{i}', type='gltf') for i in range(2)])
+        db.session.commit()
+    monkeypatch.setattr(pagination, 'PAGE_SIZE', 2)
+    response = client.get('/motion_files/', headers={'Authorization': f'Bearer {access_token}'})
+    assert response.status_code == 200
+    assert len(response.json) == 2
+    assert 'X-Next-Cursor' in response.headers
+
+def test_get_motion_files_bad_page(client, access_token):
+    response = client.get('/motion_files/?cursor=not-a-cursor', headers={'Authorization': f'Bearer {access_token}'})
+    assert response.status_code == 400
+    assert response.json == {'error': 'Invalid cursor'}
+    response = client.get('/motion_files/?limit=0', headers={'Authorization': f'Bearer {access_token}'})
+    assert response.status_code == 400
+
+def test_get_motion_files_query_count(client, app, populate_database, access_token, count_queries):
+    with app.app_context():
+        db.session.add_all([Motion_File(patient_id=3, url='url', name=f'file{i}', type='gltf') for i in range(20)])
+        db.session.commit()
+    with count_queries() as queries:
+        response = client.get('/motion_files/', headers={'Authorization': f'Bearer {access_token}'})
+    assert response.status_code == 200
+    assert len(response.json) == 21
+    assert all(motion_file['patient_id'] == 3 for motion_file in response.json)
+    assert len(queries) == 1
+
+def test_get_patient_motion_files_with_readings(client, app, populate_database, access_token, count_queries):
+    with app.app_context():
+        for i in range(10):
+            motion_file = Motion_File(patient_id=3, url='url', name=f'file{i}', type='gltf', createdAt=datetime(2025, 3, 1 + i, tzinfo=timezone.utc))
+            db.session.add(motion_file)
+            db.session.flush()
+            insert_motion_readings(db.session, motion_file.id, {'knee_angle_r': {'min': -i, 'max': i}, 'hip_flexion_r': {'min': 0, 'max': i}})
+        db.session.commit()
+    with count_queries() as queries:
+        response = client.get('/motion_files/patient/3/with_readings', headers={'Authorization': f'Bearer {access_token}'})
+    assert response.status_code == 200
+    assert len(queries) == 2
+    assert len(response.json) == 11
+    # Newest first, the file from populate_database was made today
+    assert [motion_file['name'] for motion_file in response.json] == ['testname'] + [f'file{i}' for i in reversed(range(10))]
+    assert [reading['name'] for reading in response.json[0]['motion_readings']] == ['testreading']
+    file9 = response.json[1]
+    assert {reading['name']: reading['max'] for reading in file9['motion_readings']} == {'knee_angle_r': 9, 'hip_flexion_r': 9}
+    assert all(reading['motion_file_id'] == file9['id'] for reading in file9['motion_readings'])
+
+    response = client.get('/motion_files/patient/3/with_readings/after/2025-03-09', headers={'Authorization': f'Bearer {access_token}'})
+    assert response.status_code == 200
+    assert [motion_file['name'] for motion_file in response.json] == ['testname', 'file9', 'file8']
+
+    response = client.get('/motion_files/patient/3/with_readings?limit=4', headers={'Authorization': f'Bearer {access_token}'})
+    assert [motion_file['name'] for motion_file in response.json] == ['testname', 'file9', 'file8', 'file7']
+    response = client.get('/motion_files/patient/3/with_readings', query_string={'limit': 4, 'cursor': response.headers['X-Next-Cursor']},
+                          headers={'Authorization': f'Bearer {access_token}'})
+    assert [motion_file['name'] for motion_file in response.json] == ['file6', 'file5', 'file4', 'file3']
+    assert all(motion_file['motion_readings'] for motion_file in response.json)
+
+def test_get_patient_motion_files_with_readings_not_found(client, access_token):
+    response = client.get('/motion_files/patient/1/with_readings', headers={'Authorization': f'Bearer {access_token}'})
+    assert response.status_code == 404
+    assert response.json == {'error': 'No motion_file assigned to this patient'}
+    response = client.get('/motion_files/patient/1/with_readings/after/2025-01-01', headers={'Authorization': f'Bearer {access_token}'})
+    assert response.status_code == 404
+    assert response.json == {'error': 'No motion_files found for patient 1 after 2025-01-01'}
+    response = client.get('/motion_files/patient/3/with_readings/after/invalid-date', headers={'Authorization': f'Bearer {access_token}'})
+    assert response.status_code == 400
+    assert response.json == {'error': 'Invalid date format. Please use YYYY-MM-DD'}
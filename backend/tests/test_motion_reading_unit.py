@@ -0,0 +1,20 @@
+from extensions import db
+from models.motion_reading import MotionReading, insert_motion_readings
+
+def test_insert_motion_readings_is_one_statement(app, populate_database, count_queries):
+  readings = {f'joint_{i}': {'min': -i, 'max': i, 'mean': 0.0} for i in range(40)}
+  with app.app_context():
+    with count_queries() as statements:
+      motion_readings = insert_motion_readings(db.session, 1, readings)
+    db.session.commit()
+
+    inserts = [statement for statement in statements if statement.startswith('INSERT INTO motion_readings')]
+    assert len(inserts) == 1
+    assert 'RETURNING' in inserts[0]
+    assert [reading.name for reading in motion_readings] == list(readings)
+    assert all(reading.id is not None for reading in motion_readings)
+    assert db.session.scalar(db.select(db.func.count()).select_from(MotionReading).filter_by(motion_file_id=1)) == 41
+
+def test_insert_no_motion_readings(app):
+  with app.app_context():
+    assert insert_motion_readings(db.session, 1, {}) == []
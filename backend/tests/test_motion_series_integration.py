@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+from extensions import db
+from models.motion_series import MotionSeries
+
+LABELS = ['time', 'knee_angle_r', 'hip_flexion_r', 'elbow_flex_l', 'pelvis_ty']
+
+@pytest.fixture
+def motion_series(app, populate_database):
+  times = np.arange(120) / 60
+  values = np.column_stack([times, times * 10, -times, np.full(120, 45.0), np.full(120, 0.95)])
+  with app.app_context():
+    db.session.add(MotionSeries.from_table(LABELS, values, motion_file_id=1))
+    db.session.commit()
+
+def test_get_motion_series(client, motion_series, access_token):
+  response = client.get('/motion_series/1', headers={'Authorization': f'Bearer {access_token}'})
+  assert response.status_code == 200
+  assert response.json['sample_rate'] == pytest.approx(60)
+  assert len(response.json['time']) == 120
+  assert set(response.json['joints']) == {'knee_angle_r', 'hip_flexion_r', 'elbow_flex_l', 'pelvis_ty'}
+  assert response.json['joints']['elbow_flex_l'] == [45.0] * 120
+  assert response.json['joints']['pelvis_ty'] == [0.95] * 120
+  assert response.json['units'] == {'knee_angle_r': 'degrees', 'hip_flexion_r': 'degrees', 'elbow_flex_l': 'degrees', 'pelvis_ty': 'metres'}
+
+def test_get_motion_series_joints_and_window(client, motion_series, access_token):
+  response = client.get('/motion_series/1?joints=hip_flexion_r,knee_angle_r&start=0.5&end=1',
+                        headers={'Authorization': f'Bearer {access_token}'})
+  assert response.status_code == 200
+  assert response.json['time'] == pytest.approx(np.arange(30, 61) / 60, abs=1e-4)
+  assert set(response.json['joints']) == {'hip_flexion_r', 'knee_angle_r'}
+  assert response.json['units'] == {'hip_flexion_r': 'degrees', 'knee_angle_r': 'degrees'}
+  assert response.json['joints']['knee_angle_r'] == pytest.approx(np.arange(30, 61) / 6, abs=1e-4)
+
+def test_get_motion_series_unknown_joint(client, motion_series, access_token):
+  response = client.get('/motion_series/1?joints=knee_angle_r,tail', headers={'Authorization': f'Bearer {access_token}'})
+  assert response.status_code == 400
+  assert response.json == {'error': 'Unknown joints: tail'}
+
+def test_get_motion_series_bad_window(client, motion_series, access_token):
+  response = client.get('/motion_series/1?start=soon', headers={'Authorization': f'Bearer {access_token}'})
+  assert response.status_code == 400
+
+def test_get_motion_series_not_found(client, access_token):
+  response = client.get('/motion_series/1', headers={'Authorization': f'Bearer {access_token}'})
+  assert response.status_code == 422
+  assert response.json == {'error': 'Motion series does not exist'}
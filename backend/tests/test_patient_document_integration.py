@@ -1,4 +1,6 @@
 from unittest.mock import patch
+from extensions import db
+from models.patient_document import PatientDocument, DocumentType
 
 def test_get_all_patient_documents(client, populate_database, access_token):
     response = client.get('/patient_documents/', headers={'Authorization': f'Bearer {access_token}'})
@@ -203,4 +205,15 @@ def test_get_patient_documents_after_date(client, populate_database, access_toke
 def test_get_patient_documents_after_date_invalid_format(client, access_token):
     response = client.get('/patient_documents/patient/3/after/invalid-date', headers={'Authorization': f'Bearer {access_token}'})
     assert response.status_code == 400
-    assert response.json['error'] == 'Invalid date format. Please use YYYY-MM-DD'
\ No newline at end of file
+    assert response.json['error'] == 'Invalid date format. Please use YYYY-MM-DD'
+def test_get_patient_documents_for_patient_pages(client, populate_database, access_token, app):
+    with app.app_context():
+        db.session.add_all([PatientDocument(patient_id=3, url='url', name=f'page{i}', type=DocumentType.LAB_RESULT) for i in range(2)])
+        db.session.commit()
+    response = client.get('/patient_documents/patient/3?limit=2', headers={'Authorization': f'Bearer {access_token}'})
+    assert response.status_code == 200
+    assert [document['name'] for document in response.json] == ['page1', 'page0']
+    response = client.get(f'/patient_documents/patient/3?cursor={response.headers["X-Next-Cursor"]}',
+                          headers={'Authorization': f'Bearer {access_token}'})
+    assert [document['name'] for document in response.json] == ['testname']
+    assert 'X-Next-Cursor' not in response.headers
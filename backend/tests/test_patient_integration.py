@@ -1,3 +1,7 @@
+from extensions import db
+from models.user import User
+from models.patient_physician import PatientPhysician
+
 def test_patients_get_empty(client,access_token):
   response = client.get('/patients/',headers={'Authorization': 'Bearer '+access_token})
   assert response.status_code == 200
@@ -77,4 +81,24 @@ def test_patient_delete_valid(client,populate_database,access_token):
 def test_patient_delete_invalid(client,access_token):
   response = client.delete('/patients/1',headers={'Authorization': 'Bearer '+access_token})
   assert response.status_code == 422
-  assert response.json == {'error': 'Patient does not exist'}
\ No newline at end of file
+  assert response.json == {'error': 'Patient does not exist'}
+
+def test_patients_get_query_count(client,app,populate_database,access_token,count_queries):
+  # The users, then each side of patient_physicians, however many patients there are
+  with app.app_context():
+    for i in range(20):
+      patient = User(first_name='Test',last_name=f'Patient {i}',email_address=f'patient{i}@test.com',is_patient=True)
+      db.session.add(patient)
+      db.session.flush()
+      db.session.add(PatientPhysician(patient_id=patient.id,physician_id=1))
+    db.session.commit()
+  with count_queries() as queries:
+    response = client.get('/patients/',headers={'Authorization': 'Bearer '+access_token})
+  assert response.status_code == 200
+  assert len(response.json) == 21
+  assert all(patient['physician']['id'] == 1 for patient in response.json[1:])
+  assert len(queries) == 3
+  with count_queries() as queries:
+    response = client.get('/physicians/',headers={'Authorization': 'Bearer '+access_token})
+  assert len(response.json[0]['patients']) == 20
+  assert len(queries) == 3
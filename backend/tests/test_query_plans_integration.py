@@ -0,0 +1,53 @@
+import pytest
+from datetime import datetime, timezone
+from extensions import db
+from ingestion import find_converted
+from pagination import encode_cursor
+
+CURSOR = encode_cursor(datetime(2100, 1, 1, tzinfo=timezone.utc), 1)
+
+# The endpoints a patient's history is read through, they should all reach their rows through an index
+ENDPOINTS = [
+  f'/motion_files/?cursor={CURSOR}',
+  '/motion_files/patient/3',
+  f'/motion_files/patient/3?cursor={CURSOR}',
+  '/motion_files/patient/3/after/2025-01-01',
+  '/motion_files/patient/3/with_readings/after/2025-01-01',
+  '/motion_readings/1',
+  '/patient_documents/patient/3',
+  f'/patient_documents/patient/3?cursor={CURSOR}',
+  '/patient_documents/patient/3/type/lab_result',
+  '/patient_documents/patient/3/after/2025-01-01',
+  '/chat_messages/3/1',
+  f'/chat_messages/3/1?cursor={CURSOR}',
+  '/medications/patient/3',
+  '/devices/patient/3',
+]
+
+def explain(statement, parameters):
+  # The test tables are a few rows, where a sequential scan is always cheapest. With it priced
+  # out the planner takes any usable index, so a Seq Scan left in the plan means there is none.
+  db.session.execute(db.text('SET LOCAL enable_seqscan = off'))
+  plan = db.session.connection().exec_driver_sql('EXPLAIN ' + statement, parameters).scalars().all()
+  db.session.rollback()
+  return '\n'.join(plan)
+
+@pytest.mark.parametrize('url', ENDPOINTS)
+def test_endpoint_queries_use_indexes(client, app, populate_database, access_token, count_queries, url):
+  with count_queries(parameters=True) as queries:
+    response = client.get(url, headers={'Authorization': f'Bearer {access_token}'})
+  assert response.status_code == 200
+  selects = [(statement, parameters) for statement, parameters in queries if statement.lstrip().startswith('SELECT')]
+  assert selects
+  with app.app_context():
+    for statement, parameters in selects:
+      plan = explain(statement, parameters)
+      assert 'Seq Scan' not in plan, f'{statement}\n{plan}'
+
+def test_find_converted_uses_indexes(app, populate_database, count_queries):
+  with app.app_context():
+    with count_queries(parameters=True) as queries:
+      find_converted('0' * 64, 3)
+    (statement, parameters), = queries
+    plan = explain(statement, parameters)
+  assert 'Seq Scan' not in plan, plan
@@ -0,0 +1,32 @@
+from unittest.mock import patch
+from extensions import db
+from models.user import User
+from auth0 import Auth0Client
+from role_sync import RoleSyncWorker
+from stubs.auth0_server import start_auth0_stub
+
+@patch('auth0.AUTH0_DOMAIN', 'test.auth0.com')
+def test_role_sync_batches_and_clears_pending(populate_database,app):
+  server, base_url = start_auth0_stub()
+  server.state.add_user('auth0|patient', 'test_patient@test.com')
+  server.state.add_user('google|patient', 'test_patient@test.com')
+  server.state.add_user('auth0|physician', 'test_physician@test.com')
+  with app.app_context():
+    db.session.execute(db.update(User).values(pending=True))
+    db.session.commit()
+  worker = RoleSyncWorker(client=Auth0Client(base_url=base_url), batch_window=0.2)
+  worker.init_app(app)
+  worker.enqueue(['patient-role'], user_id=3, email='test_patient@test.com')
+  worker.enqueue(['patient-role', 'physician-role'], user_id=1, auth0_ids=['auth0|physician'])
+  # Not signed up with Auth0 yet, so this one stays pending
+  worker.enqueue(['admin-role'], user_id=2, email='test_admin@test.com')
+  worker.flush()
+  assert server.state.roles == {
+    'patient-role': {'auth0|patient', 'google|patient', 'auth0|physician'},
+    'physician-role': {'auth0|physician'}
+  }
+  with app.app_context():
+    assert db.session.get(User, 1).pending == False
+    assert db.session.get(User, 2).pending == True
+    assert db.session.get(User, 3).pending == False
+  server.shutdown()
@@ -0,0 +1,35 @@
+import json
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from extensions import db
+from models.medication import Medication
+from models.motion_file import Motion_File
+from models.patient_document import PatientDocument, DocumentType
+from models.user import User
+from serializers import SERIALIZERS, serialize
+
+def test_every_model_is_registered():
+  assert {User, Motion_File, PatientDocument, Medication} <= set(SERIALIZERS)
+
+def test_serialize_matches_the_columns(app, populate_database):
+  with app.app_context():
+    for model in SERIALIZERS:
+      for row in db.session.scalars(db.select(model)):
+        assert list(serialize(row)) == [column.name for column in model.__table__.columns]
+
+def test_serialize_converts_enums(app):
+  created = datetime(2025, 3, 1, 12, 30, 15, 250000, tzinfo=timezone(timedelta(hours=-5)))
+  document = PatientDocument(id=1, name='labs', url='url', type=DocumentType.LAB_RESULT, patient_id=3, createdAt=created)
+  assert serialize(document) == {'id': 1, 'name': 'labs', 'url': 'url', 'type': 'lab_result', 'createdAt': created,
+                                 'updatedAt': None, 'patient_id': 3}
+  with app.app_context():
+    assert json.loads(app.json.dumps(serialize(document)))['createdAt'] == '2025-03-01T12:30:15.250000-05:00'
+    # A naive value has not been stored yet and is taken as UTC
+    medication = Medication(name='name', dosage='dosage', instructions='instructions', patient_id=3, last_taken=datetime(2025, 3, 1))
+    assert json.loads(app.json.dumps(medication.dict()))['last_taken'] == '2025-03-01T00:00:00+00:00'
+
+def test_jsonify_goes_through_orjson(app):
+  with app.app_context():
+    response = app.json.response({'b': np.float32(1.5), 'a': datetime(2025, 3, 1, tzinfo=timezone.utc), 1: [np.arange(2)]})
+  assert response.mimetype == 'application/json'
+  assert response.get_data(as_text=True) == '{"1":[[0,1]],"a":"2025-03-01T00:00:00+00:00","b":1.5}'
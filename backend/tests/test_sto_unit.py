@@ -0,0 +1,113 @@
+import math
+import numpy as np
+import pytest
+from sto import RangeOfMotion, RangeOfMotionAndSeries, StoTable, range_of_motion
+
+ROWS = [
+  f'0.0\t0\t{math.pi / 2}\t0',
+  f'0.5\t{math.pi / 4}\t{-math.pi / 2}\t0',
+  f'1.0\t{-math.pi / 4}\t0\t0'
+]
+# Labels on line 4 and no endheader, the way the converter has always written them
+STO = '\n'.join(['motion', 'version=1', 'nRows=3', 'nColumns=4', 'time\tknee\telbow\twrist'] + ROWS + [''])
+OPENSIM_STO = '\n'.join(['Coordinates', 'version=1', 'nRows=3', 'nColumns=4', 'inDegrees=no', '',
+                         'Units are S.I. units', 'endheader', 'time\tknee\telbow\twrist'] + ROWS + [''])
+
+def test_range_of_motion_in_degrees():
+  assert range_of_motion(STO) == pytest.approx({'knee': (-45.0, 45.0), 'elbow': (-90.0, 90.0)})
+
+def test_range_of_motion_ignores_zeros_and_time():
+  readings = range_of_motion(STO)
+  # wrist never moves off zero and time isn't a joint
+  assert 'wrist' not in readings
+  assert 'time' not in readings
+
+def test_header_ends_at_endheader():
+  reader = RangeOfMotion()
+  reader.feed(OPENSIM_STO)
+  assert reader.close() == range_of_motion(STO)
+  assert reader.header.labels == ['time', 'knee', 'elbow', 'wrist']
+  assert reader.header.metadata['nRows'] == '3'
+
+def test_values_already_in_degrees():
+  readings = range_of_motion(OPENSIM_STO.replace('inDegrees=no', 'inDegrees=yes'))
+  assert readings['knee'] == pytest.approx((-math.pi / 4, math.pi / 4))
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 64])
+def test_chunks_split_anywhere(chunk_size):
+  reader = RangeOfMotion()
+  for i in range(0, len(OPENSIM_STO), chunk_size):
+    reader.feed(OPENSIM_STO[i:i + chunk_size])
+  assert reader.close() == range_of_motion(OPENSIM_STO)
+  assert reader.rows == 3
+
+def test_last_row_without_newline():
+  assert range_of_motion(STO.rstrip('\n')) == range_of_motion(STO)
+
+def test_short_rows_are_padded():
+  readings = range_of_motion(STO + f'1.5\t{math.pi}\n')
+  assert readings['knee'] == pytest.approx((-45.0, 180.0))
+  assert readings['elbow'] == pytest.approx((-90.0, 90.0))
+
+def test_rows_longer_than_labels_are_rejected():
+  with pytest.raises(ValueError):
+    range_of_motion(STO + '1.5\t0\t0\t0\t0\n')
+
+def test_no_rows():
+  assert range_of_motion('\n'.join(STO.split('\n')[:5])) == {}
+
+def test_range_of_motion_and_series_share_one_parse():
+  reader = RangeOfMotionAndSeries()
+  reader.feed(OPENSIM_STO)
+  statistics, (labels, values) = reader.close()
+  assert {label: (joint['min'], joint['max']) for label, joint in statistics.items()} == range_of_motion(OPENSIM_STO)
+  assert labels == ['time', 'knee', 'elbow', 'wrist']
+  assert values.dtype == np.float32
+  assert values[:, 0] == pytest.approx([0.0, 0.5, 1.0])
+  assert values[:, 1] == pytest.approx([0.0, 45.0, -45.0])
+
+def test_table_keeps_translations_in_metres():
+  reader = StoTable()
+  reader.feed('inDegrees=yes\nendheader\ntime\tknee_angle_r\tpelvis_tx\n0.0\t90\t1.5\n')
+  labels, values = reader.close()
+  assert values[0] == pytest.approx([0.0, math.pi / 2, 1.5])
+
+def test_statistics_keep_translations_in_metres():
+  reader = RangeOfMotionAndSeries()
+  reader.feed(f'inDegrees=no\nendheader\ntime\tknee_angle_r\tpelvis_ty\n0.0\t{math.pi / 2}\t0.9\n0.5\t{math.pi / 4}\t1.1\n')
+  statistics, (labels, values) = reader.close()
+  assert (statistics['knee_angle_r']['min'], statistics['knee_angle_r']['max']) == (pytest.approx(45.0), pytest.approx(90.0))
+  assert (statistics['pelvis_ty']['min'], statistics['pelvis_ty']['max']) == (pytest.approx(0.9), pytest.approx(1.1))
+  # The same units the series endpoint reports
+  assert values[:, 1:] == pytest.approx(np.array([[90.0, 0.9], [45.0, 1.1]]))
+
+def test_statistics_match_numpy_across_chunks():
+  rng = np.random.default_rng(0)
+  angles = rng.normal(20, 15, (5000, 2))
+  angles[::50, 1] = 0
+  text = 'inDegrees=yes\nendheader\ntime\thip\tknee\n' + ''.join(f'{i / 60}\t{hip}\t{knee}\n' for i, (hip, knee) in enumerate(angles))
+  reader = RangeOfMotion()
+  for i in range(0, len(text), 4096):
+    reader.feed(text[i:i + 4096])
+  reader.close()
+  statistics = reader.statistics()
+  for label, column in (('hip', angles[:, 0]), ('knee', angles[:, 1][angles[:, 1] != 0])):
+    joint = statistics[label]
+    assert joint['mean'] == pytest.approx(column.mean())
+    assert joint['stdev'] == pytest.approx(column.std(ddof=1))
+    for percentile in (5, 50, 95):
+      assert joint[f'p{percentile}'] == pytest.approx(np.percentile(column, percentile), abs=0.25)
+    assert sum(joint['histogram']['counts']) == len(column)
+    assert len(joint['histogram']['counts']) == 36
+  # 20 +- 15 degrees mostly lands in the bins from 0 to 40
+  assert sum(statistics['hip']['histogram']['counts'][18:22]) > 3000
+
+def test_statistics_of_a_single_reading():
+  statistics = RangeOfMotion()
+  statistics.feed('inDegrees=yes\nendheader\ntime\tknee\n0.0\t200\n')
+  statistics.close()
+  knee = statistics.statistics()['knee']
+  assert (knee['min'], knee['max'], knee['mean'], knee['stdev']) == (200.0, 200.0, 200.0, 0.0)
+  # Beyond the histogram, so it is counted in the last bin and the percentiles stay within the readings
+  assert knee['histogram']['counts'][-1] == 1
+  assert knee['p5'] == knee['p95'] == 200.0
@@ -0,0 +1,32 @@
+import time
+from token_cache import VerifiedTokenCache
+
+def test_cache_hit_and_miss():
+  cache = VerifiedTokenCache(maxsize=10)
+  payload = {'sub': 'user', 'exp': time.time() + 60}
+  assert cache.get('token') is None
+  cache.put('token', payload)
+  assert cache.get('token') == payload
+  assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 1, 'maxsize': 10}
+
+def test_cache_expires_with_token():
+  cache = VerifiedTokenCache(maxsize=10)
+  cache.put('token', {'sub': 'user', 'exp': time.time() - 1})
+  assert cache.get('token') is None
+  assert cache.stats()['size'] == 0
+
+def test_cache_skips_tokens_without_exp():
+  cache = VerifiedTokenCache(maxsize=10)
+  cache.put('token', {'sub': 'user'})
+  assert cache.get('token') is None
+
+def test_cache_evicts_least_recently_used():
+  cache = VerifiedTokenCache(maxsize=2)
+  exp = time.time() + 60
+  cache.put('a', {'sub': 'a', 'exp': exp})
+  cache.put('b', {'sub': 'b', 'exp': exp})
+  cache.get('a')
+  cache.put('c', {'sub': 'c', 'exp': exp})
+  assert cache.get('b') is None
+  assert cache.get('a') is not None
+  assert cache.get('c') is not None
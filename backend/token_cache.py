@@ -0,0 +1,70 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 1024))
+
+class VerifiedTokenCache:
+  """Bounded LRU of token payloads that already passed signature and claims checks
+
+  Entries are keyed by a SHA-256 of the raw token so the tokens themselves are
+  never held in memory, and an entry is dropped once the token's exp passes.
+  """
+  def __init__(self, maxsize=TOKEN_CACHE_SIZE):
+    self.maxsize = maxsize
+    self.hits = 0
+    self.misses = 0
+    self._entries = OrderedDict()
+    self._lock = threading.Lock()
+
+  def get(self, token):
+    key = self._key(token)
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None:
+        self.misses += 1
+        return None
+      expires_at, payload = entry
+      if expires_at <= time.time():
+        del self._entries[key]
+        self.misses += 1
+        return None
+      self._entries.move_to_end(key)
+      self.hits += 1
+      return payload
+
+  def put(self, token, payload):
+    expires_at = payload.get('exp')
+    # Tokens without an expiry are always verified in full
+    if not isinstance(expires_at, (int, float)) or self.maxsize <= 0:
+      return
+    key = self._key(token)
+    with self._lock:
+      self._entries[key] = (expires_at, payload)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.maxsize:
+        self._entries.popitem(last=False)
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+      self.hits = 0
+      self.misses = 0
+
+  def stats(self):
+    with self._lock:
+      return {
+        'hits': self.hits,
+        'misses': self.misses,
+        'size': len(self._entries),
+        'maxsize': self.maxsize
+      }
+
+  @staticmethod
+  def _key(token):
+    return hashlib.sha256(token.encode()).digest()
@@ -1,8 +1,10 @@
 import { BACKEND_URL } from '../constants.js'
 import { useAuth0 } from '@auth0/auth0-react'
+import { pageUrl } from './pagination.jsx'
 
-export async function getMessages(data,token){
-  return fetch(`${BACKEND_URL}/chat_messages/${data.patient_id}/${data.physician_id}`,{
+// A page of the chat history, newest first, the page after cursor or the latest one without it
+export async function getMessages(data,token,cursor){
+  return fetch(pageUrl(`${BACKEND_URL}/chat_messages/${data.patient_id}/${data.physician_id}`, cursor),{
     method: 'GET',
     headers: {
       'Accept': 'application/json',
@@ -1,9 +1,11 @@
 // API service for motion files
 import { BACKEND_URL } from '../constants.js'
+import { pageUrl } from './pagination.jsx'
 
-export const getMotionFiles = async (patientId, token) => {
-  console.log(`${BACKEND_URL}/motion_files/patient/${patientId}`)
-  const response = await fetch(`${BACKEND_URL}/motion_files/patient/${patientId}`, {
+// Get a patient's newest motion files, one page of them newest first
+export const getMotionFiles = async (patientId, token, limit) => {
+  const query = limit ? `?limit=${limit}` : '';
+  const response = await fetch(`${BACKEND_URL}/motion_files/patient/${patientId}${query}`, {
     method: 'GET',
     headers: {
       'Authorization': `Bearer ${token}`,
@@ -25,6 +27,18 @@ export const getMotionFilesAfterDate = async (patientId, date, token) => {
   return response;
 };
 
+// Get a page of motion files with their motion readings embedded, newest first, the page after cursor or the latest one
+export const getMotionFilesWithReadings = async (patientId, token, cursor) => {
+  const response = await fetch(pageUrl(`${BACKEND_URL}/motion_files/patient/${patientId}/with_readings`, cursor), {
+    method: 'GET',
+    headers: {
+      'Authorization': `Bearer ${token}`,
+      'Content-Type': 'application/json'
+    }
+  });
+  return response;
+};
+
 // Get a specific motion file by ID
 export const getMotionFileById = async (fileId, token) => {
   const response = await fetch(`${BACKEND_URL}/motion_files/${fileId}`, {
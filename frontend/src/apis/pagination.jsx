@@ -0,0 +1,14 @@
+// Listings come back a page at a time, newest first, with the next page's cursor in this header
+export const NEXT_CURSOR_HEADER = 'X-Next-Cursor';
+
+// The url of the page a cursor points at, the first page without one
+export const pageUrl = (url, cursor) => {
+  if (!cursor) {
+    return url;
+  }
+  const separator = url.includes('?') ? '&' : '?';
+  return `${url}${separator}cursor=${encodeURIComponent(cursor)}`;
+};
+
+// The cursor of the page after a response's, null on the last page
+export const nextCursor = (response) => response.headers.get(NEXT_CURSOR_HEADER);
@@ -1,9 +1,10 @@
 // API service for patient documents
 import { BACKEND_URL } from '@/constants.js'
+import { pageUrl } from './pagination.jsx'
 
-// Get all documents for a patient
-export const getPatientDocuments = async (patientId, token) => {
-  const response = await fetch(`${BACKEND_URL}/patient_documents/patient/${patientId}`, {
+// Get a page of a patient's documents, newest first, the page after cursor or the latest one
+export const getPatientDocuments = async (patientId, token, cursor) => {
+  const response = await fetch(pageUrl(`${BACKEND_URL}/patient_documents/patient/${patientId}`, cursor), {
     method: 'GET',
     headers: {
       'Authorization': `Bearer ${token}`,
@@ -1,7 +1,7 @@
 import React, { useState, useMemo } from "react";
 import { Calendar, FileText, Search } from "lucide-react";
 
-const MotionFilesTab = ({ selectedPatient, formatDate, handleViewFile }) => {
+const MotionFilesTab = ({ selectedPatient, formatDate, handleViewFile, hasOlderFiles, loadingOlderFiles, onLoadOlderFiles }) => {
   const [fileSort, setFileSort] = useState("newest");
   const [dateFilter, setDateFilter] = useState("");
   const [isFiltering, setIsFiltering] = useState(false);
@@ -162,6 +162,16 @@ const MotionFilesTab = ({ selectedPatient, formatDate, handleViewFile }) => {
           </div>
         )}
       </div>
+      {/* Files come a page at a time, newest first */}
+      {hasOlderFiles && (
+        <button
+          onClick={onLoadOlderFiles}
+          disabled={loadingOlderFiles}
+          className="w-full mt-2 text-sm bg-gray-200 text-gray-700 px-2 py-1 rounded hover:bg-gray-300 disabled:opacity-50"
+        >
+          {loadingOlderFiles ? "Loading..." : "Load older files"}
+        </button>
+      )}
     </div>
   );
 };
@@ -2,6 +2,9 @@ import React, { useState, useEffect } from "react";
 import { Activity, ChevronDown, ChevronUp } from "lucide-react";
 import { useAuth0 } from "@auth0/auth0-react";
 
+// The pelvis translations are in metres, every other joint in degrees
+const unitOf = (name) => (/_t[xyz]$/.test(name) ? " m" : "°");
+
 const MotionReadingsTab = ({ selectedPatient, selectedMotionFile, formatDate }) => {
   const { getAccessTokenSilently } = useAuth0();
   const [motionReadings, setMotionReadings] = useState([]);
@@ -137,11 +140,11 @@ const MotionReadingsTab = ({ selectedPatient, selectedMotionFile, formatDate })
                   <div className="grid grid-cols-2 gap-2 mt-1">
                     <div className="text-xs bg-blue-50 p-1 rounded">
                       <span className="text-gray-600">Min:</span>{" "}
-                      <span className="font-medium text-gray-900">{reading.min.toFixed(2)}°</span>
+                      <span className="font-medium text-gray-900">{reading.min.toFixed(2)}{unitOf(reading.name)}</span>
                     </div>
                     <div className="text-xs bg-blue-50 p-1 rounded">
                       <span className="text-gray-600">Max:</span>{" "}
-                      <span className="font-medium text-gray-900">{reading.max.toFixed(2)}°</span>
+                      <span className="font-medium text-gray-900">{reading.max.toFixed(2)}{unitOf(reading.name)}</span>
                     </div>
                   </div>
                 </div>
@@ -2,6 +2,7 @@ import React, { useRef, useEffect } from "react";
 import * as THREE from "three";
 import { GLTFLoader } from "three/examples/jsm/loaders/GLTFLoader.js";
 import { OrbitControls } from "three/examples/jsm/controls/OrbitControls.js";
+import * as SkeletonUtils from "three/examples/jsm/utils/SkeletonUtils.js";
 
 const PatientModel = ({file,token}) => {
 
@@ -84,45 +85,106 @@ const PatientModel = ({file,token}) => {
     //   loader.setPath('/Models')
     // }
     let mixer;
+    let model;
+    //Coarse levels only hold the skeleton and its animation, the meshes come from the rig served with the frontend
+    const rigs = {};
+    const loadRig = (name) => {
+      if(!rigs[name]){
+        rigs[name] = loader.loadAsync(`/Models/${name}/${name}.gltf`);
+      }
+      return rigs[name];
+    };
+    const dress = (skeleton, rig) => {
+      const copy = SkeletonUtils.clone(rig);
+      const meshes = [];
+      copy.traverse((child) => {
+        if (child.isMesh) meshes.push(child);
+      });
+      meshes.forEach((mesh) => {
+        //Same node names in both, the level keeps every node of the rig
+        const parent = skeleton.getObjectByName(mesh.parent.name);
+        if(!parent) return;
+        parent.add(mesh);
+        if(mesh.isSkinnedMesh){
+          const bones = mesh.skeleton.bones.map((bone) => skeleton.getObjectByName(bone.name));
+          mesh.bind(new THREE.Skeleton(bones, mesh.skeleton.boneInverses), mesh.bindMatrix);
+        }
+      });
+      return skeleton;
+    };
     if(file && token){
-      loader.load(
-        `${file.url}?${token}`,
-        (gltf) => {
-          const mesh = gltf.scene;
-          //Need to rotate model to be upright because opensim swaps z and y axis
-          const rotationMatrix = new THREE.Matrix4();
-          rotationMatrix.makeRotationX(-Math.PI / 2);
-          mesh.applyMatrix4(rotationMatrix);
-          mesh.scale.set(3, 3, 3);
-          //Some models are broken into multiple meshes
-          //This casts the shadow for each mesh part
-          mesh.traverse((child) => {
-            if (child.isMesh) {
-              child.castShadow = true;
-              child.receiveShadow = true;
+      //Coarse levels are much smaller, show the first one and swap in finer ones as they arrive
+      const levels = file.levels?.length ? file.levels : [{ url: file.url }];
+      const loadLevel = (index) => {
+        const next = () => {
+          if(!stopAnimating && index + 1 < levels.length){
+            loadLevel(index + 1);
+          }
+        };
+        loader.load(
+          `${levels[index].url}?${token}`,
+          async (gltf) => {
+            if(stopAnimating) return
+            let mesh = gltf.scene;
+            if(levels[index].rig){
+              try {
+                const rig = await loadRig(levels[index].rig);
+                if(stopAnimating) return
+                mesh = dress(gltf.scene, rig.scene);
+              } catch (error) {
+                console.error(error);
+                next();
+                return;
+              }
+            }
+            //Need to rotate model to be upright because opensim swaps z and y axis
+            const rotationMatrix = new THREE.Matrix4();
+            rotationMatrix.makeRotationX(-Math.PI / 2);
+            mesh.applyMatrix4(rotationMatrix);
+            mesh.scale.set(3, 3, 3);
+            //Some models are broken into multiple meshes
+            //This casts the shadow for each mesh part
+            mesh.traverse((child) => {
+              if (child.isMesh) {
+                child.castShadow = true;
+                child.receiveShadow = true;
+              }
+            });
+
+            //Translates entire models initial position
+            mesh.position.set(0, 0, 0);
+            //Carry on from the same point of the animation as the coarser level
+            const time = mixer ? mixer.time : 0;
+            if(model){
+              mixer.stopAllAction();
+              scene.remove(model);
+              disposeObject(model);
             }
-          });
-
-          //Translates entire models initial position
-          mesh.position.set(0, 0, 0);
-          scene.add(mesh);
-
-          mixer = new THREE.AnimationMixer(mesh);
-          gltf.animations.forEach((clip) => {
-            mixer.clipAction(clip).play();
-          });
-        },
-        (xhr) => {
-          // Shows loading percentage
-          const progress = (xhr.loaded / xhr.total) * 100;
-          if(progress%10 <= .05){
-            console.log(`Loading: ${progress.toFixed(2)}%`);
+            scene.add(mesh);
+            model = mesh;
+
+            mixer = new THREE.AnimationMixer(mesh);
+            gltf.animations.forEach((clip) => {
+              mixer.clipAction(clip).play();
+            });
+            mixer.setTime(time);
+            next();
+          },
+          (xhr) => {
+            // Shows loading percentage
+            const progress = (xhr.loaded / xhr.total) * 100;
+            if(progress%10 <= .05){
+              console.log(`Loading: ${progress.toFixed(2)}%`);
+            }
+          },
+          (error) => {
+            console.error(error);
+            //A missing level should not leave the model unshown, carry on with the finer ones
+            next();
           }
-        },
-        (error) => {
-          console.error(error);
-        }
-      );
+        );
+      };
+      loadLevel(0);
     }
 
     //When window is resized adjust camera and render size
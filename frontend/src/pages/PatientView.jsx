@@ -17,6 +17,7 @@ import {
 } from "lucide-react";
 import { useAuth0 } from "@auth0/auth0-react";
 import { getMessages } from '../apis/messagesService';
+import { nextCursor } from '../apis/pagination';
 import { useSocket } from '../components/SocketProvider';
 import AccessibilityMenu from '../components/AccessibilityMenu';
 import MedicalRecords from '../components/MedicalRecords';
@@ -38,6 +39,9 @@ const PatientView = ({userInfo}) => {
   
   // messages state
   const [messages, setMessages] = useState([]);
+  // Cursor of the page of older messages, null once the whole history is loaded
+  const [messagesCursor, setMessagesCursor] = useState(null);
+  const [loadingOlderMessages, setLoadingOlderMessages] = useState(false);
 
   const [latestMotionFile, setLatestMotionFile] = useState(null);
   const [sasToken, setSasToken] = useState(null);
@@ -67,12 +71,12 @@ const PatientView = ({userInfo}) => {
   ];
   const socket = useSocket()
 
-  // Auto-scroll to bottom when messages change or when tab switches to messages
+  // Auto-scroll to bottom when a new message arrives or when tab switches to messages, not when older ones are loaded
   useEffect(() => {
     if (activeTab === "messages") {
       scrollToBottom();
     }
-  }, [messages, activeTab]);
+  }, [messages[messages.length - 1], activeTab]);
 
   // When tab changes away from records, reset selected document type
   useEffect(() => {
@@ -114,17 +118,13 @@ const PatientView = ({userInfo}) => {
       try {
         const token = await getAccessTokenSilently();
         
-        // Fetch motion files
-        const response = await getMotionFiles(userInfo.id, token);
+        // Fetch only the latest motion file, pages come newest first
+        const response = await getMotionFiles(userInfo.id, token, 1);
         if (response.ok) {
           const files = await response.json();
           if (files && files.length > 0) {
-            // Sort files by creation date (newest first)
-            const sortedFiles = files.sort((a, b) => 
-              new Date(b.createdAt) - new Date(a.createdAt)
-            );
             // Set the latest file
-            setLatestMotionFile(sortedFiles[0]);
+            setLatestMotionFile(files[0]);
             
             // Get SAS token for accessing the file
             const sasResponse = await getSasToken('motion-files', token);
@@ -188,7 +188,9 @@ const PatientView = ({userInfo}) => {
         const response = await getMessages({'patient_id':userInfo.id,'physician_id':userInfo.physician.id},token)
         const data = await response.json()
         if(response.ok){
-          setMessages(data);
+          // The newest page, newest first
+          setMessages(data.reverse());
+          setMessagesCursor(nextCursor(response));
           
           // If messages tab is already active when messages load, mark them as read
           if (activeTab === "messages") {
@@ -217,6 +219,45 @@ const PatientView = ({userInfo}) => {
     fetchMessages();
   }, [activeTab]);
 
+  // Scrolling to the top of the chat loads the page of messages before the ones shown
+  const handleMessagesScroll = async (e) => {
+    const container = e.currentTarget;
+    if (container.scrollTop > 0 || !messagesCursor || loadingOlderMessages) {
+      return;
+    }
+    setLoadingOlderMessages(true);
+    try {
+      const token = await getAccessTokenSilently()
+      const response = await getMessages({'patient_id':userInfo.id,'physician_id':userInfo.physician.id},token,messagesCursor)
+      const data = await response.json()
+      if(!response.ok){
+        throw new Error(data.error)
+      }
+      const previousHeight = container.scrollHeight;
+      setMessages(messages => [...data.reverse(), ...messages]);
+      setMessagesCursor(nextCursor(response));
+      // They are read as they are shown
+      const messageIds = data.map(msg => msg.id);
+      setReadMessageIds(prevReadIds => {
+        const combinedIds = [...new Set([...prevReadIds, ...messageIds])];
+        localStorage.setItem('readMessageIds', JSON.stringify(combinedIds));
+        return combinedIds;
+      });
+      // Keep the messages that were in view where they were
+      setTimeout(() => {
+        container.scrollTop = container.scrollHeight - previousHeight;
+      }, 0);
+    } catch (error) {
+      console.error("Error fetching older messages:", error);
+      setNotification({
+        type: 'error',
+        message: `Failed to load messages: ${error.message}`
+      });
+    } finally {
+      setLoadingOlderMessages(false);
+    }
+  };
+
   useEffect(() => {
     function onMessageEvent(data) {
       setMessages(messages => [...messages, data])
@@ -472,9 +513,12 @@ const PatientView = ({userInfo}) => {
                 </h2>
                 
                 {/* Message History */}
-                <div className="bg-gray-100 rounded-lg p-4 h-96 overflow-y-auto mb-4" aria-live="polite">
+                <div className="bg-gray-100 rounded-lg p-4 h-96 overflow-y-auto mb-4" aria-live="polite" onScroll={handleMessagesScroll}>
                   {messages && messages.length > 0 ? (
                     <div className="space-y-4">
+                      {loadingOlderMessages && (
+                        <p className="text-center text-xs text-gray-500">Loading older messages...</p>
+                      )}
                       {messages.map((msg, index) => {
                         const isFromMe = msg.sender == userInfo.id;
                         
@@ -21,7 +21,8 @@ import {
 } from "lucide-react";
 import { useSocket } from '../components/SocketProvider'
 import { getMessages } from '../apis/messagesService'
-import { getMotionFiles } from "../apis/motionFileService";
+import { getMotionFilesWithReadings } from "../apis/motionFileService";
+import { nextCursor } from "../apis/pagination";
 import MotionReadingsTab from '../components/MotionReadingsTab'
 import MotionFilesTab from '../components/MotionFilesTab'
 import AccessibilityMenu from '../components/AccessibilityMenu';
@@ -58,6 +59,9 @@ const PhysicianView = ({userInfo}) => {
   );
 
   const [selectedMotionFile, setSelectedMotionFile] = useState(null);
+  // Each patient keeps the cursors of its older messages and motion files, null once all are loaded
+  const [loadingOlderMessages, setLoadingOlderMessages] = useState(false);
+  const [loadingOlderMotionFiles, setLoadingOlderMotionFiles] = useState(false);
   const [notification, setNotification] = useState(null);
   const [confirmDialog, setConfirmDialog] = useState({
     isOpen: false,
@@ -77,12 +81,12 @@ const PhysicianView = ({userInfo}) => {
     selectedPatientRef.current = selectedPatient
   }, [selectedPatient]);
 
-  // Scroll to bottom of messages when new messages are added or when switching to messages tab
+  // Scroll to bottom of messages when new messages are added or when switching to messages tab, not when older ones are loaded
   useEffect(() => {
     if (activeTab === "messages" && selectedPatient) {
       scrollToBottom();
     }
-  }, [selectedPatient?.messages, activeTab]);
+  }, [selectedPatient?.messages?.[selectedPatient.messages.length - 1], activeTab]);
 
   // Update localStorage whenever readMessageIds changes
   useEffect(() => {
@@ -103,6 +107,77 @@ const PhysicianView = ({userInfo}) => {
     }, 100);
   };
 
+  // Applies update to a patient in the list and, if it is the one selected, to the selection
+  const updatePatient = (patientId, update) => {
+    setPatients(oldPatients => oldPatients.map(p => p.id === patientId ? update(p) : p));
+    setSelectedPatient(oldPatient => oldPatient && oldPatient.id === patientId ? update(oldPatient) : oldPatient);
+  };
+
+  // Scrolling to the top of the chat loads the page of messages before the ones shown
+  const handleMessagesScroll = async (e) => {
+    const container = e.currentTarget;
+    const patient = selectedPatient;
+    if (container.scrollTop > 0 || !patient?.messagesCursor || loadingOlderMessages) {
+      return;
+    }
+    setLoadingOlderMessages(true);
+    try {
+      const token = await getAccessTokenSilently();
+      const response = await getMessages({ 'physician_id': userInfo.id, 'patient_id': patient.id }, token, patient.messagesCursor);
+      const data = await response.json();
+      if (!response.ok) {
+        throw new Error(data.error);
+      }
+      const previousHeight = container.scrollHeight;
+      const older = data.reverse();
+      updatePatient(patient.id, p => ({ ...p, messages: [...older, ...(p.messages || [])], messagesCursor: nextCursor(response) }));
+      // They are read as they are shown
+      const messageIds = older.map(msg => msg.id);
+      setReadMessageIds(prevReadIds => {
+        const combinedIds = [...new Set([...prevReadIds, ...messageIds])];
+        localStorage.setItem('physicianReadMessageIds', JSON.stringify(combinedIds));
+        return combinedIds;
+      });
+      // Keep the messages that were in view where they were
+      setTimeout(() => {
+        container.scrollTop = container.scrollHeight - previousHeight;
+      }, 0);
+    } catch (error) {
+      console.error("Error fetching older messages:", error);
+      showNotification("Failed to load older messages", "error");
+    } finally {
+      setLoadingOlderMessages(false);
+    }
+  };
+
+  // The motion files list asks for the page of files before the ones shown
+  const loadOlderMotionFiles = async () => {
+    const patient = selectedPatient;
+    if (!patient?.motionFilesCursor || loadingOlderMotionFiles) {
+      return;
+    }
+    setLoadingOlderMotionFiles(true);
+    try {
+      const token = await getAccessTokenSilently();
+      const response = await getMotionFilesWithReadings(patient.id, token, patient.motionFilesCursor);
+      if (!response.ok) {
+        throw new Error("Failed to fetch motion files");
+      }
+      const files = (await response.json()).reverse();
+      setMotionReadings(prevReadings => {
+        const newReadings = { ...prevReadings };
+        files.forEach(file => { newReadings[file.id] = file.motion_readings; });
+        return newReadings;
+      });
+      updatePatient(patient.id, p => ({ ...p, motionFiles: [...files, ...(p.motionFiles || [])], motionFilesCursor: nextCursor(response) }));
+    } catch (error) {
+      console.error("Error fetching older motion files:", error);
+      showNotification("Failed to load older motion files", "error");
+    } finally {
+      setLoadingOlderMotionFiles(false);
+    }
+  };
+
   const showNotification = (message, type = 'success') => {
     setNotification({ message, type });
   };
@@ -440,7 +515,9 @@ const PhysicianView = ({userInfo}) => {
         try {
           const response = await getMessages({ 'physician_id': userInfo.id, 'patient_id': userInfo.patients[i].id }, token);
           const data = await response.json()
-          userInfo.patients[i].messages = data;
+          // Only the newest page, older ones are loaded when the chat is scrolled up
+          userInfo.patients[i].messages = data.reverse();
+          userInfo.patients[i].messagesCursor = nextCursor(response);
 
           // If this patient is already selected and messages tab is active, mark messages as read
           if (selectedPatient && selectedPatient.id === userInfo.patients[i].id && activeTab === "messages") {
@@ -469,16 +546,24 @@ const PhysicianView = ({userInfo}) => {
       if (!patientPresent) return;
       try {
         const token = await getAccessTokenSilently();
-        const response = await getMotionFiles(selectedPatient.id, token);
+        const response = await getMotionFilesWithReadings(selectedPatient.id, token);
         if (response.ok) {
-          const files = await response.json();
+          // The newest page, older files are loaded from the motion files list
+          const files = (await response.json()).reverse();
+          const motionFilesCursor = nextCursor(response);
+          // Readings come with the files, so viewing one doesn't have to fetch them
+          setMotionReadings(prevReadings => {
+            const newReadings = { ...prevReadings };
+            files.forEach(file => { newReadings[file.id] = file.motion_readings; });
+            return newReadings;
+          });
           setSelectedPatient((oldPatient) => {
-            return {...oldPatient, motionFiles: files};
+            return {...oldPatient, motionFiles: files, motionFilesCursor};
           })
           setPatients((oldPatients) => {
             const updatedPatients = oldPatients.map((p) => {
               if (p.id === selectedPatient.id) {
-                p = {...p, motionFiles: files};
+                p = {...p, motionFiles: files, motionFilesCursor};
                 return p;
               }
               return p;
@@ -753,6 +838,9 @@ const PhysicianView = ({userInfo}) => {
                           selectedPatient={selectedPatient}
                           formatDate={formatDate}
                           handleViewFile={handleViewFile}
+                          hasOlderFiles={Boolean(selectedPatient.motionFilesCursor)}
+                          loadingOlderFiles={loadingOlderMotionFiles}
+                          onLoadOlderFiles={loadOlderMotionFiles}
                         />
                       )}
                       
@@ -773,9 +861,12 @@ const PhysicianView = ({userInfo}) => {
                       <MessageSquare className="h-5 w-5 mr-2 text-blue-600" />
                       Message History
                     </h3>
-                    <div className="bg-gray-100 rounded-lg p-4 h-96 overflow-y-auto mb-4">
+                    <div className="bg-gray-100 rounded-lg p-4 h-96 overflow-y-auto mb-4" onScroll={handleMessagesScroll}>
                       {selectedPatient.messages && selectedPatient.messages.length > 0 ? (
                         <div className="space-y-4">
+                          {loadingOlderMessages && (
+                            <p className="text-center text-xs text-gray-500">Loading older messages...</p>
+                          )}
                           {selectedPatient.messages.map((msg, index) => (
                             <div
                               key={index}
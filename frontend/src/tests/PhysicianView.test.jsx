@@ -4,7 +4,7 @@ import { render, screen, fireEvent, waitFor } from '@testing-library/react';
 import { MemoryRouter } from 'react-router-dom';
 
 import { getPatients, createPatientByPhysician, deletePatientByID } from '../apis/patientService';
-import { getMotionFiles } from '../apis/motionFileService';
+import { getMotionFilesWithReadings } from '../apis/motionFileService';
 import { getMessages } from '../apis/messagesService';
 import { getSasToken } from '../apis/sasTokenService';
 import PhysicianView from '../pages/PhysicianView';
@@ -24,8 +24,9 @@ vi.mock('../apis/patientService', () => ({
 }));
 
 vi.mock('../apis/motionFileService', () => ({
-  getMotionFiles: vi.fn().mockResolvedValue({
+  getMotionFilesWithReadings: vi.fn().mockResolvedValue({
     ok: true,
+    headers: { get: () => null },
     json: () => Promise.resolve([])
   })
 }));
@@ -33,6 +34,7 @@ vi.mock('../apis/motionFileService', () => ({
 vi.mock('../apis/messagesService', () => ({
   getMessages: vi.fn().mockResolvedValue({
     ok: true,
+    headers: { get: () => null },
     json: () => Promise.resolve([])
   })
 }));